@@ -22,6 +22,11 @@ class Config:
     elib_wx config options
     """
     dummy_icao_code: str = "XXXX"
+    # maximum number of reports kept in the process-wide report cache (0 disables it, see elib_wx.report_cache)
+    report_cache_size: int = 0
+    # seconds failed METAR fetches and unknown ICAO codes are remembered for (0 disables it, see
+    # elib_wx.negative_cache)
+    negative_cache_ttl: float = 0
 
 
 LOGGER = logging.getLogger('elib.wx')
@@ -35,3 +40,7 @@ from elib_wx.exc import (
 from elib_wx.avwx.exceptions import BadStationError, InvalidRequestError, SourceError
 # noinspection PyPep8
 from elib_wx.weather import Weather
+# noinspection PyPep8
+from elib_wx.weather_render import render_speech_many
+# noinspection PyPep8
+from elib_wx.weather_forecast import ForecastTimeline
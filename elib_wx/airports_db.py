@@ -12,6 +12,8 @@ import typing
 
 import pkg_resources
 
+from elib_wx import negative_cache
+
 LOGGER = logging.getLogger('elib.wx')
 
 LOGGER.debug('reading airports.db')
@@ -31,6 +33,8 @@ def get_airport_name_from_icao(icao: str) -> str:
     """
     Obtains the name of an airport based on its ICAO code
 
+    Unknown ICAO codes are kept in the negative cache, if enabled (see elib_wx.negative_cache).
+
     :param icao: ICAO code
     :type icao: str
     :return: airport name
@@ -42,6 +46,9 @@ def get_airport_name_from_icao(icao: str) -> str:
             return f'unknown airport ({icao})'
     with _DB_LOCK:
         icao = icao.upper()
+        use_negative_cache = negative_cache.NEGATIVE_CACHE.is_enabled()
+        if use_negative_cache and negative_cache.NEGATIVE_CACHE.get(('airport', icao)):
+            return f'unknown airport ({icao})'
         cursor = _DB.cursor()
         row: tuple = cursor.execute(f"SELECT name FROM airports WHERE icao = '{icao}'").fetchone()
         if row is None:
@@ -49,6 +56,8 @@ def get_airport_name_from_icao(icao: str) -> str:
             LOGGER.warning('airport with ICAO "%s" not found; if you believe this is an error, please '
                            'contact me via the issue page of the project: %s',
                            icao, 'placeholder')
+            if use_negative_cache:
+                negative_cache.NEGATIVE_CACHE.add(('airport', icao), True)
             return f'unknown airport ({icao})'
         airport_name: str = row[0]
         return airport_name
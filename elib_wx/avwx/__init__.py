@@ -13,7 +13,7 @@ from datetime import datetime
 from os import path
 
 # module
-from . import metar, service, speech, structs, summary, taf, translate
+from . import metar, profiling, service, speech, structs, summary, taf, translate
 from .core import valid_station
 from .exceptions import BadStationError
 from .static import INFO_KEYS
@@ -6,18 +6,24 @@ Modified by etcher@daribouca.net
 """
 # pylint: disable=too-many-lines
 
+import calendar
+import contextlib
+import functools
 import logging
+import re
+import sys
+import threading
 import typing
-from copy import copy
 from datetime import datetime, timedelta
 from itertools import permutations
 
-from dateutil.relativedelta import relativedelta
+from dataclasses import replace
 
 from .exceptions import BadStationError
 from .static import (
-    CARDINAL_DIRECTIONS, CLOUD_LIST, CLOUD_TRANSLATIONS, FLIGHT_RULES, FRACTIONS, IN_REGIONS, METAR_RMK, M_IN_REGIONS,
-    M_NA_REGIONS, NA_REGIONS, NUMBER_REPL, SPECIAL_NUMBERS, TAF_NEWLINE, TAF_NEWLINE_STARTSWITH, TAF_RMK,
+    CARDINAL_DIRECTIONS, CLOUD_LIST, CLOUD_TRANSLATIONS, FLIGHT_RULES, FRACTIONS, IN_REGIONS, IN_UNITS, METAR_RMK,
+    M_IN_REGIONS, M_NA_REGIONS, NA_REGIONS, NA_UNITS, NUMBER_REPL, SPECIAL_NUMBERS, TAF_NEWLINE, TAF_NEWLINE_STARTSWITH,
+    TAF_RMK,
 )
 from .structs import Cloud, Fraction, Number, Timestamp, Units
 
@@ -60,6 +66,11 @@ def uses_na_format(station: str) -> bool:
     raise BadStationError(station, "station ICAO doesn't start with a recognized character set")
 
 
+def _is_unknown_item(item: str) -> bool:
+    # only '/' (or only 'X') characters, ignoring dots; used as is by sanitize_report_list, which checks every item
+    return not item.strip('./') or not item.strip('.X')
+
+
 def is_unknown(val: str) -> bool:
     """
     Returns True if val contains only '/' characters
@@ -67,11 +78,9 @@ def is_unknown(val: str) -> bool:
     LOGGER.debug('checking if value is defined: %s', val)
     if val is None:
         raise TypeError('val should not be None')
-    clean_val = str(val).replace('.', '')
-    for char in ('/', 'X'):
-        if clean_val == char * len(clean_val):
-            LOGGER.debug('value is not defined: %s', val)
-            return True
+    if _is_unknown_item(str(val)):
+        LOGGER.debug('value is not defined: %s', val)
+        return True
     LOGGER.debug('value is defined: %s', val)
     return False
 
@@ -124,6 +133,8 @@ def spoken_number(num: str) -> str:
     Ex: 1.2 -> one point two
         1 1/2 -> one and one half
     """
+    if num in SPOKEN_HEADINGS:
+        return SPOKEN_HEADINGS[num]
     ret = []
     LOGGER.debug('converting number to spoken text: %s', num)
     for part in num.split(' '):
@@ -136,6 +147,12 @@ def spoken_number(num: str) -> str:
     return result
 
 
+# spoken version of every 3-digit heading, used for wind directions
+# (filled after creation, as spoken_number looks it up while building it)
+SPOKEN_HEADINGS: typing.Dict[str, str] = {}
+SPOKEN_HEADINGS.update({f'{degree:03}': spoken_number(f'{degree:03}') for degree in range(361)})
+
+
 def _make_number(num: typing.Optional[str] = None,
                  repr_: typing.Optional[str] = None,
                  speak: typing.Optional[str] = None) -> typing.Optional[Number]:
@@ -160,6 +177,25 @@ def _make_number(num: typing.Optional[str] = None,
     return None
 
 
+# Units are immutable: reports start from one of these instances, and stages that read a different unit switch to
+# another shared instance (see replace_unit)
+NA_DEFAULT_UNITS = Units(**NA_UNITS)
+IN_DEFAULT_UNITS = Units(**IN_UNITS)
+
+
+@functools.lru_cache(maxsize=128)
+def replace_unit(units: Units, name: str, value: str) -> Units:
+    """
+    Returns a shared Units instance with the "name" unit set to "value"
+    """
+    if getattr(units, name) == value:
+        return units
+    return replace(units, **{name: value})
+
+
+# Number and Fraction are immutable: identical numbers (very common: '00', '10', '9999', 'CAVOK', ...) are built
+# once and shared between reports
+@functools.lru_cache(maxsize=4096)
 def make_number(num: typing.Optional[str] = None,
                 repr_: typing.Optional[str] = None,
                 speak: typing.Optional[str] = None) -> typing.Optional[Number]:
@@ -180,6 +216,17 @@ def make_number(num: typing.Optional[str] = None,
     return _make_number(num, repr_, speak)
 
 
+def split_wx_codes(wxcodes: typing.Iterable[str]) -> typing.FrozenSet[str]:
+    """
+    Returns the set of all 2-character sequences found in a list of weather codes
+
+    Checking a 2-letter code against this set is equivalent to looking for it in every weather code
+
+    Ex: ['+TSRA', 'BR'] -> {'+T', 'TS', 'SR', 'RA', 'BR'}
+    """
+    return frozenset(code[i:i + 2] for code in wxcodes for i in range(len(code) - 1))
+
+
 def find_first_in_list(txt: str, str_list: typing.List[str]) -> int:
     """
     Returns the index of the earliest occurrence of an item from a list in a string
@@ -188,11 +235,17 @@ def find_first_in_list(txt: str, str_list: typing.List[str]) -> int:
     """
     start = len(txt) + 1
     for item in str_list:
-        if start > txt.find(item) > -1:
-            start = txt.find(item)
+        index = txt.find(item)
+        if start > index > -1:
+            start = index
     return start if len(txt) + 1 > start > -1 else -1
 
 
+# earliest occurrence of any remarks 'signifier', same result as find_first_in_list with a single scan of the report
+_METAR_RMK_RE = re.compile('|'.join(re.escape(item) for item in METAR_RMK))
+_TAF_RMK_RE = re.compile('|'.join(re.escape(item) for item in TAF_RMK))
+
+
 def get_remarks(txt: str) -> typing.Tuple[typing.List[str], str]:
     """
     Returns the report split into components and the remarks string
@@ -207,23 +260,23 @@ def get_remarks(txt: str) -> typing.Tuple[typing.List[str], str]:
         if len(txt) - 6 > index > -1 and txt[index + 2:index + 6].isdigit():
             alt_index = index
     # Then look for earliest remarks 'signifier'
-    sig_index = find_first_in_list(txt, METAR_RMK)
-    if sig_index == -1:
-        sig_index = len(txt) + 1
+    sig_match = _METAR_RMK_RE.search(txt)
+    sig_index = sig_match.start() if sig_match else len(txt) + 1
     if sig_index > alt_index > -1:
         return txt[:alt_index + 6].strip().split(' '), txt[alt_index + 7:]
     if alt_index > sig_index > -1:
         return txt[:sig_index].strip().split(' '), txt[sig_index + 1:]
-    return txt.strip().split(' '), ''
+    return txt.split(' '), ''
 
 
 def get_taf_remarks(txt: str) -> typing.Tuple[str, str]:
     """
     Returns report and remarks separated if found
     """
-    remarks_start = find_first_in_list(txt, TAF_RMK)
-    if remarks_start == -1:
+    remarks_match = _TAF_RMK_RE.search(txt)
+    if remarks_match is None:
         return txt, ''
+    remarks_start = remarks_match.start()
     remarks = txt[remarks_start:]
     txt = txt[:remarks_start].strip()
     return txt, remarks
@@ -236,10 +289,11 @@ def sanitize_report_string(txt: str) -> str:
     """
     Provides sanitation for operations that work better when the report is a string
 
-    Returns the first pass sanitized report string
+    Returns the first pass sanitized report string (the given string itself if nothing changed)
     """
     if len(txt) < 4:
         return txt
+    original = txt
     # Standardize whitespace
     txt = ' '.join(txt.split())
     # Prevent changes to station ID
@@ -263,7 +317,9 @@ def sanitize_report_string(txt: str) -> str:
                 if counter > txt.count(cloud):
                     break
                 counter += 1
-    return stid + txt
+    sanitized = stid + txt
+    # parsed reports keep both strings, share them when they are identical
+    return original if sanitized == original else sanitized
 
 
 # noinspection SpellCheckingInspection
@@ -275,14 +331,17 @@ LINE_FIXES = {
 }
 
 
+_LINE_FIXES_RE = re.compile('|'.join(re.escape(key) for key in LINE_FIXES))
+
+
 def sanitize_line(txt: str) -> str:
     """
     Fixes common mistakes with 'new line' signifier so that they can be recognized
     """
-    for key in LINE_FIXES:
-        index = txt.find(key)
-        if index > -1:
-            txt = txt[:index] + LINE_FIXES[key] + txt[index + len(key):]
+    # fixes are applied in order, and a fix can only create a match for a later key if a key already matched
+    if _LINE_FIXES_RE.search(txt):
+        for key, fix in LINE_FIXES.items():
+            txt = txt.replace(key, fix, 1)
     # Fix when space is missing following new line signifier
     for item in ['BECMG', 'TEMPO']:
         if item in txt and item + ' ' not in txt:
@@ -348,9 +407,23 @@ ITEM_REMV = ['AUTO', 'COR', 'NSC', 'NCD', '$', 'KT', 'M', '.', 'RTD', 'SPECI', '
 ITEM_REPL = {'CALM': '00000KT'}
 VIS_PERMUTATIONS = [''.join(p) for p in permutations('P6SM')]
 VIS_PERMUTATIONS.remove('6MPS')
+_VIS_PERMUTATIONS = frozenset(VIS_PERMUTATIONS)
 
 
-def sanitize_report_list(wxdata: typing.List[str],  # noqa pylint: disable=too-many-branches,too-many-locals
+def _is_wind_missing_kt(item: str, ilen: int) -> bool:
+    # 36010T or 36010G20T
+    if not (item[:5].isdigit() or item.startswith('VRB')):
+        return False
+    if ilen == 6:
+        return item[5] in ('K', 'T')
+    return ilen == 9 and item[8] in ('K', 'T') and item[5] == 'G'
+
+
+def _is_joined_tx_tn(item: str) -> bool:
+    return (item.startswith('TX') and 'TN' not in item) or (item.startswith('TN') and item.find('TX') != -1)
+
+
+def sanitize_report_list(wxdata: typing.List[str],  # noqa pylint: disable=too-many-branches
                          remove_clr_and_skc: bool = True
                          ) -> typing.Tuple[typing.List[str], typing.List[str], str]:
     """
@@ -363,78 +436,71 @@ def sanitize_report_list(wxdata: typing.List[str],  # noqa pylint: disable=too-m
     """
     shear = ''
     runway_vis = []
-    for i, item in reversed(list(enumerate(wxdata))):
+    # items are checked once, from the end of the report, and kept items are collected in reverse order;
+    # "joined" holds what was joined to the current item because a space did not belong between them
+    kept: typing.List[str] = []
+    joined = ''
+    for i in range(len(wxdata) - 1, -1, -1):
+        item = wxdata[i]
+        current = item + joined if joined else item
+        joined = ''
         ilen = len(item)
-        _i5d = item[:5].isdigit()
-        _i3d = item[1:3].isdigit()
-        _ivrb = item.startswith('VRB')
-        try:
-            _i5kt = item[5] in ['K', 'T']
-        except IndexError:
-            _i5kt = False
-        try:
-            _i8kt = item[8] in ['K', 'T']
-        except IndexError:
-            _i8kt = False
-        cond1 = (ilen == 6 and _i5kt and (_i5d or _ivrb))
-        cond2 = (ilen == 9 and _i8kt and item[5] == 'G' and (_i5d or _ivrb))
         # Remove elements containing only '/'
         # noinspection SpellCheckingInspection
-        if is_unknown(item):
-            wxdata.pop(i)
+        if _is_unknown_item(item):
+            continue
         # Identify Runway Visibility
-        elif ilen > 4 and item[0] == 'R' and (item[3] == '/' or item[4] == '/') and _i3d:
-            runway_vis.append(wxdata.pop(i))
+        if ilen > 4 and item[0] == 'R' and (item[3] == '/' or item[4] == '/') and item[1:3].isdigit():
+            runway_vis.append(current)
         # Remove RE from wx codes, REVCTS -> VCTS
-        elif ilen in [4, 6] and item.startswith('RE'):
-            wxdata[i] = item[2:]
+        elif ilen in (4, 6) and item.startswith('RE'):
+            kept.append(item[2:])
         # Fix a slew of easily identifiable conditions where a space does not belong
         elif i and extra_space_exists(wxdata[i - 1], item):
-            wxdata[i - 1] += wxdata.pop(i)
+            joined = current
         # Remove spurious elements
         elif item in ITEM_REMV:
-            wxdata.pop(i)
+            continue
         # Remove 'Sky Clear' from METAR but not TAF
-        elif remove_clr_and_skc and item in ['CLR', 'SKC']:
-            wxdata.pop(i)
+        elif remove_clr_and_skc and item in ('CLR', 'SKC'):
+            continue
         # Replace certain items
         elif item in ITEM_REPL:
-            wxdata[i] = ITEM_REPL[item]
+            kept.append(ITEM_REPL[item])
         # Remove amend signifier from start of report ('CCA', 'CCB',etc)
         elif ilen == 3 and item.startswith('CC') and item[2].isalpha():
-            wxdata.pop(i)
+            continue
         # Identify Wind Shear
         elif ilen > 6 and item.startswith('WS') and item[5] == '/':
-            shear = wxdata.pop(i).replace('KT', '')
+            shear = current.replace('KT', '')
         # Fix inconsistent 'P6SM' Ex: TP6SM or 6PSM -> P6SM
-        elif ilen > 3 and item[-4:] in VIS_PERMUTATIONS:
-            wxdata[i] = 'P6SM'
+        elif ilen > 3 and item[-4:] in _VIS_PERMUTATIONS:
+            kept.append('P6SM')
         # Fix wind T
-        elif cond1 or cond2:
-            wxdata[i] = item[:-1] + 'KT'
+        elif ilen in (6, 9) and _is_wind_missing_kt(item, ilen):
+            kept.append(item[:-1] + 'KT')
         # Fix joined TX-TN
-        elif ilen > 16 and len(item.split('/')) == 3:
-            if item.startswith('TX') and 'TN' not in item:
-                tn_index = item.find('TN')
-                wxdata.insert(i + 1, item[:tn_index])
-                wxdata[i] = item[tn_index:]
-            elif item.startswith('TN') and item.find('TX') != -1:
-                tx_index = item.find('TX')
-                wxdata.insert(i + 1, item[:tx_index])
-                wxdata[i] = item[tx_index:]
+        elif ilen > 16 and item.count('/') == 2 and _is_joined_tx_tn(item):
+            split_index = item.find('TN' if item.startswith('TX') else 'TX')
+            kept.append(item[:split_index])
+            kept.append(item[split_index:])
+        else:
+            kept.append(current)
+    kept.reverse()
+    wxdata[:] = kept
     return wxdata, runway_vis, shear
 
 
 # pylint: disable=too-many-branches
 def get_altimeter(wxdata: typing.List[str], units: Units, version: str = 'NA'  # noqa
-                  ) -> typing.Tuple[typing.List[str], typing.Optional[Number]]:
+                  ) -> typing.Tuple[typing.List[str], typing.Optional[Number], Units]:
     """
-    Returns the report list and the removed altimeter item
+    Returns the report list, the removed altimeter item and the units (updated if the altimeter unit differs)
 
     Version is 'NA' (North American / default) or 'IN' (International)
     """
     if not wxdata:
-        return wxdata, None
+        return wxdata, None, units
     altimeter = ''
     target: str = wxdata[-1]
     if version == 'NA':
@@ -447,7 +513,7 @@ def get_altimeter(wxdata: typing.List[str], units: Units, version: str = 'NA'  #
                 wxdata.pop()
                 altimeter = wxdata.pop()[1:]
             else:
-                units.altimeter = 'hPa'
+                units = replace_unit(units, 'altimeter', 'hPa')
                 altimeter = wxdata.pop()[1:].lstrip('.')
         # Else grab the digits
         elif len(target) == 4 and target.isdigit():
@@ -464,27 +530,27 @@ def get_altimeter(wxdata: typing.List[str], units: Units, version: str = 'NA'  #
                 wxdata.pop()
                 altimeter = wxdata.pop()[1:]
             else:
-                units.altimeter = 'inHg'
+                units = replace_unit(units, 'altimeter', 'inHg')
                 altimeter = wxdata.pop()[1:]
     # Some stations report both, but we only need one
     if wxdata and (wxdata[-1][0] == 'A' or wxdata[-1][0] == 'Q'):
         wxdata.pop()
     # convert to Number
     if not altimeter:
-        return wxdata, None
+        return wxdata, None, units
     if units.altimeter == 'inHg' and '.' not in altimeter:
         value = altimeter[:2] + '.' + altimeter[2:]
     else:
         value = altimeter
     if altimeter == 'M' * len(altimeter):
-        return wxdata, None
+        return wxdata, None, units
     while value and not value[0].isdigit():
         value = value[1:]
     if value.endswith('INS'):
         value = value[:-3]
     if altimeter.endswith('INS'):
         altimeter = altimeter[:-3]
-    return wxdata, make_number(value, altimeter)
+    return wxdata, make_number(value, altimeter), units
 
 
 def get_taf_alt_ice_turb(wxdata: typing.List[str]
@@ -493,15 +559,21 @@ def get_taf_alt_ice_turb(wxdata: typing.List[str]
     Returns the report list and removed: Altimeter string, Icing list, Turbulence list
     """
     altimeter = ''
-    icing, turbulence = [], []
-    for i, item in reversed(list(enumerate(wxdata))):
+    icing, turbulence, kept = [], [], []
+    for item in wxdata:
         if len(item) > 6 and item.startswith('QNH') and item[3:7].isdigit():
-            altimeter = wxdata.pop(i)[3:7]
-        elif item.isdigit():
-            if item[0] == '6':
-                icing.append(wxdata.pop(i))
-            elif item[0] == '5':
-                turbulence.append(wxdata.pop(i))
+            # the first altimeter is the one reported
+            altimeter = altimeter or item[3:7]
+        elif item.isdigit() and item[0] == '6':
+            icing.append(item)
+        elif item.isdigit() and item[0] == '5':
+            turbulence.append(item)
+        else:
+            kept.append(item)
+    # icing and turbulence are listed from the end of the report
+    icing.reverse()
+    turbulence.reverse()
+    wxdata[:] = kept
     return wxdata, altimeter, icing, turbulence
 
 
@@ -520,7 +592,8 @@ def get_temp_and_dew(wxdata: typing.List[str]
     """
     Returns the report list and removed temperature and dewpoint strings
     """
-    for i, item in reversed(list(enumerate(wxdata))):
+    for i in range(len(wxdata) - 1, -1, -1):
+        item = wxdata[i]
         if '/' in item:
             # ///07
             if item[0] == '/':
@@ -565,18 +638,18 @@ def get_wind(wxdata: typing.List[str], units: Units  # noqa pylint: disable=too-
                                typing.Optional[Number],
                                typing.Optional[Number],
                                typing.Optional[Number],
-                               typing.List[typing.Optional[Number]]]:
+                               typing.List[typing.Optional[Number]],
+                               Units]:
     """
     Returns the report list and removed:
     Direction string, speed string, gust string, variable direction list
+
+    followed by the units (updated if the wind speed unit differs)
     """
     direction, speed, gust = '', '', ''
     variable: typing.List[typing.Optional[Number]] = []
     if wxdata:
-        item = copy(wxdata[0])
-        for rep in ['(E)']:
-            item = item.replace(rep, '')
-        item = item.replace('O', '0')
+        item = wxdata[0].replace('(E)', '').replace('O', '0')
         # 09010KT, 09010G15KT
         _cond1 = any((item.endswith('KT'), item.endswith('KTS'), item.endswith('MPS'), item.endswith('KMH')))
         _cond2 = bool(len(item) == 5 or (len(item) >= 8 and item.find('G') != -1) and item.find('/') == -1)
@@ -588,10 +661,10 @@ def get_wind(wxdata: typing.List[str], units: Units  # noqa pylint: disable=too-
             elif item.endswith('KTS'):
                 item = item.replace('KTS', '')
             elif item.endswith('MPS'):
-                units.wind_speed = 'm/s'
+                units = replace_unit(units, 'wind_speed', 'm/s')
                 item = item.replace('MPS', '')
             elif item.endswith('KMH'):
-                units.wind_speed = 'km/h'
+                units = replace_unit(units, 'wind_speed', 'km/h')
                 item = item.replace('KMH', '')
             direction = item[:3]
             if 'G' in item:
@@ -620,16 +693,17 @@ def get_wind(wxdata: typing.List[str], units: Units  # noqa pylint: disable=too-
     _resulting_direction = make_number(direction, speak=direction)
     _resulting_speed = make_number(speed)
     _resulting_gust = make_number(gust)
-    return wxdata, _resulting_direction, _resulting_speed, _resulting_gust, variable
+    return wxdata, _resulting_direction, _resulting_speed, _resulting_gust, variable, units
 
 
-def get_visibility(wxdata: typing.List[str], units: Units) -> typing.Tuple[typing.List[str], typing.Optional[Number]]:
+def get_visibility(wxdata: typing.List[str],
+                   units: Units) -> typing.Tuple[typing.List[str], typing.Optional[Number], Units]:
     """
-    Returns the report list and removed visibility string
+    Returns the report list, the removed visibility string and the units (updated if the visibility unit differs)
     """
     visibility = ''
     if wxdata:
-        item = copy(wxdata[0])
+        item = wxdata[0]
         # Vis reported in statue miles
         if item.endswith('SM'):  # 10SM
             if item in ('P6SM', 'M1/4SM'):
@@ -639,28 +713,28 @@ def get_visibility(wxdata: typing.List[str], units: Units) -> typing.Tuple[typin
             else:
                 visibility = item[:item.find('SM')]  # 1/2SM
             wxdata.pop(0)
-            units.visibility = 'sm'
+            units = replace_unit(units, 'visibility', 'sm')
         # Vis reported in meters
         elif len(item) == 4 and item.isdigit():
             visibility = wxdata.pop(0)
-            units.visibility = 'm'
+            units = replace_unit(units, 'visibility', 'm')
         elif 7 >= len(item) >= 5 and item[:4].isdigit() and (item[4] in ['M', 'N', 'S', 'E', 'W'] or item[4:] == 'NDV'):
             visibility = wxdata.pop(0)[:4]
-            units.visibility = 'm'
+            units = replace_unit(units, 'visibility', 'm')
         elif len(item) == 5 and item[1:].isdigit() and item[0] in ['M', 'P', 'B']:
             visibility = wxdata.pop(0)[1:]
-            units.visibility = 'm'
+            units = replace_unit(units, 'visibility', 'm')
         elif item.endswith('KM') and item[:item.find('KM')].isdigit():
             visibility = item[:item.find('KM')] + '000'
             wxdata.pop(0)
-            units.visibility = 'm'
+            units = replace_unit(units, 'visibility', 'm')
         # Vis statute miles but split Ex: 2 1/2SM
         elif len(wxdata) > 1 and wxdata[1].endswith('SM') and '/' in wxdata[1] and item.isdigit():
             vis1 = wxdata.pop(0)  # 2
             vis2 = wxdata.pop(0).replace('SM', '')  # 1/2
             visibility = str(int(vis1) * int(vis2[2]) + int(vis2[0])) + vis2[1:]  # 5/2
-            units.visibility = 'sm'
-    return wxdata, make_number(visibility)
+            units = replace_unit(units, 'visibility', 'sm')
+    return wxdata, make_number(visibility), units
 
 
 def starts_new_line(item: str) -> bool:
@@ -734,14 +808,18 @@ def _is_tempo_or_prob(report_type: str) -> bool:
     return False
 
 
-def _get_next_time(lines: typing.List[dict], target: str) -> str:
+def _get_next_start_times(lines: typing.List[dict]) -> typing.List[str]:
     """
-    Returns the next FROM target value or empty
+    Returns, for each line, the start time of the closest following FROM line that has one, or empty
     """
-    for line in lines:
-        if line[target] and not _is_tempo_or_prob(line['type']):
-            return line[target]
-    return ''
+    next_start_times = []
+    next_start_time = ''
+    for line in reversed(lines):
+        next_start_times.append(next_start_time)
+        if line['start_time'] and not _is_tempo_or_prob(line['type']):
+            next_start_time = line['start_time']
+    next_start_times.reverse()
+    return next_start_times
 
 
 def find_missing_taf_times(lines: typing.List[dict], start: str, end: str) -> typing.List[dict]:
@@ -752,17 +830,21 @@ def find_missing_taf_times(lines: typing.List[dict], start: str, end: str) -> ty
         return lines
     # Assign start time
     lines[0]['start_time'] = start
-    # Fix other times
+    # Fill empty start times with the end time of the previous FROM line, and empty end times with the start
+    # time of the next one
+    next_start_times = _get_next_start_times(lines)
+    previous_end_time = ''
     last_fm_line = 0
     for i, line in enumerate(lines):
         if _is_tempo_or_prob(line['type']):
             continue
         last_fm_line = i
-        # Search remaining lines to fill empty end or previous for empty start
-        for target, other, direc in (('start', 'end', -1), ('end', 'start', 1)):
-            target += '_time'
-            if not line[target]:
-                line[target] = _get_next_time(lines[i::direc][1:], other + '_time')
+        if not line['start_time']:
+            line['start_time'] = previous_end_time
+        if not line['end_time']:
+            line['end_time'] = next_start_times[i]
+        if line['end_time']:
+            previous_end_time = line['end_time']
     # Special case for final forecast
     if last_fm_line:
         lines[last_fm_line]['end_time'] = end
@@ -882,7 +964,9 @@ def make_cloud(cloud: str) -> Cloud:
 
     This function assumes the input is potentially valid
     """
-    return Cloud(cloud, *split_cloud(cloud))
+    cloud_type, altitude, modifier = split_cloud(cloud)
+    # types and modifiers are shared by most cloud layers
+    return Cloud(cloud, cloud_type and sys.intern(cloud_type), altitude, modifier and sys.intern(modifier))
 
 
 def get_clouds(wxdata: typing.List[str]) -> typing.Tuple[typing.List[str], typing.List[Cloud]]:
@@ -890,15 +974,21 @@ def get_clouds(wxdata: typing.List[str]) -> typing.Tuple[typing.List[str], typin
     Returns the report list and removed list of split cloud layers
     """
     clouds = []
-    for i, item in reversed(list(enumerate(wxdata))):
+    kept = []
+    for item in wxdata:
         if item[:3] in CLOUD_LIST or item[:2] == 'VV':
-            cloud: str = wxdata.pop(i)
+            cloud: str = item
             if '/' in cloud:
                 cloud = cloud.split('/')[0]
             # if cloud.endswith('TCU'):
             #     cloud = cloud.replace('TCU', 'CU')
             made_cloud = make_cloud(cloud)
             clouds.append(made_cloud)
+        else:
+            kept.append(item)
+    # clouds are listed from the end of the report (kept for layers at the same altitude)
+    clouds.reverse()
+    wxdata[:] = kept
     try:
         return wxdata, sorted(clouds, key=lambda cloud_: (cloud_.altitude, cloud_.type))
     except TypeError:
@@ -939,25 +1029,60 @@ def get_flight_rules(vis: Number, ceiling: typing.Optional[Cloud]) -> int:
     return 0  # VFR
 
 
+def _searched_prior_lines(prior_count: int, position: int) -> int:
+    """
+    Returns how many prior lines a closest-first search goes through to reach the line at "position"
+
+    Prior lines are numbered from 1 (earliest) to "prior_count" (closest); position 0 means no such line, and the
+    search then goes through all of them.
+    """
+    return prior_count - position + 1 if position else prior_count
+
+
 def get_taf_flight_rules(lines: typing.List[dict]) -> typing.List[dict]:
     """
     Get flight rules by looking for missing data in prior reports
+
+    Missing visibility and clouds are read from prior FROM (non TEMPO/PROB) lines, closest first, and the search
+    stops at the first prior line after which both are known. The closest prior line is always searched, even if
+    the line has its own visibility and clouds, and a clear sky (SKC/CLR) in any searched line clears the clouds.
+
+    Instead of searching prior lines again for each line, the position of the closest prior line with a
+    visibility, with clouds and with a clear sky is carried forward, and the length of the search is computed
+    from those positions.
     """
-    for i, line in enumerate(lines):
+    prior_count = 0
+    prior_vis: typing.Any = ''
+    prior_vis_position = 0
+    prior_clouds: typing.List[Cloud] = []
+    prior_clouds_position = 0
+    prior_clear_position = 0
+    for line in lines:
         temp_vis, temp_cloud = line['visibility'], line['clouds']
-        for report in reversed(lines[:i]):
-            if not _is_tempo_or_prob(report['type']):
-                if temp_vis == '':
-                    temp_vis = report['visibility']
-                if 'SKC' in report['other'] or 'CLR' in report['other']:
-                    temp_cloud = 'temp-clear'
-                elif not temp_cloud:
-                    temp_cloud = report['clouds']
-                if temp_vis != '' and temp_cloud != []:
-                    break
-        if temp_cloud == 'temp-clear':
-            temp_cloud = []
+        if prior_count:
+            # the closest prior line is always searched
+            searched = 1
+            if temp_vis == '':
+                temp_vis = prior_vis
+                searched = _searched_prior_lines(prior_count, prior_vis_position)
+            if temp_cloud == []:
+                # a clear sky also ends the search for clouds
+                closest_position = max(prior_clear_position, prior_clouds_position)
+                searched = max(searched, _searched_prior_lines(prior_count, closest_position))
+            if prior_clear_position and _searched_prior_lines(prior_count, prior_clear_position) <= searched:
+                temp_cloud = []
+            elif not temp_cloud and prior_clouds_position \
+                    and _searched_prior_lines(prior_count, prior_clouds_position) <= searched:
+                temp_cloud = prior_clouds
         line['flight_rules'] = FLIGHT_RULES[get_flight_rules(temp_vis, get_ceiling(temp_cloud))]
+        if not _is_tempo_or_prob(line['type']):
+            prior_count += 1
+            if line['visibility'] != '':
+                prior_vis, prior_vis_position = line['visibility'], prior_count
+            if 'SKC' in line['other'] or 'CLR' in line['other']:
+                prior_clear_position = prior_count
+            elif line['clouds']:
+                prior_clouds, prior_clouds_position = line['clouds'], prior_count
     return lines
 
 
@@ -977,11 +1102,53 @@ def get_ceiling(clouds: typing.List[Cloud]) -> typing.Optional[Cloud]:
     return None
 
 
-def parse_date(date: str, hour_threshold: int = 200) -> typing.Optional[datetime]:
+class _ParseContext(threading.local):
+    now: typing.Optional[datetime] = None
+    dates: typing.Dict[typing.Tuple[str, int], datetime] = {}
+
+
+_PARSE_CONTEXT = _ParseContext()
+
+
+@contextlib.contextmanager
+def parse_context(now: typing.Optional[datetime] = None) -> typing.Iterator[datetime]:
+    """
+    Parses all report timestamps within the context against a single reference time
+
+    The current UTC time is captured once when entering the context, unless "now" (naive, UTC) is given, e.g. to
+    replay historical reports. A nested context without "now" keeps the reference time of the enclosing one.
+    Identical timestamps are only parsed once within a context.
+    """
+    if now is None and _PARSE_CONTEXT.now is not None:
+        yield _PARSE_CONTEXT.now
+        return
+    previous = _PARSE_CONTEXT.now, _PARSE_CONTEXT.dates
+    _PARSE_CONTEXT.now = datetime.utcnow() if now is None else now
+    _PARSE_CONTEXT.dates = {}
+    try:
+        yield _PARSE_CONTEXT.now
+    finally:
+        _PARSE_CONTEXT.now, _PARSE_CONTEXT.dates = previous
+
+
+def _add_months(date: datetime, months: int) -> datetime:
+    """
+    Returns the date moved by a number of months, clamping the day to the length of the target month
+    """
+    month_index = date.month - 1 + months
+    year, month = date.year + month_index // 12, month_index % 12 + 1
+    return date.replace(year=year, month=month, day=min(date.day, calendar.monthrange(year, month)[1]))
+
+
+def parse_date(date: str,
+               hour_threshold: int = 200,
+               now: typing.Optional[datetime] = None
+               ) -> typing.Optional[datetime]:
     """
     Parses a report timestamp in ddhhZ or ddhhmmZ format
 
-    This function assumes the given timestamp is within the hour threshold from current date
+    This function assumes the given timestamp is within the hour threshold from "now", which defaults to the
+    reference time of the current parse context (see parse_context), or to the current UTC time
     """
     # Format date string
     if not isinstance(date, str):
@@ -989,25 +1156,43 @@ def parse_date(date: str, hour_threshold: int = 200) -> typing.Optional[datetime
     date = date.strip('Z')
     if len(date) == 4:
         date += '00'
-    if not (len(date) == 6 and date.isdigit()):
+    if not (len(date) == 6 and date.isdigit()) or not 1 <= int(date[0:2]) <= 31:
         return None
+    if now is not None:
+        return _parse_date(date, hour_threshold, now)
+    if _PARSE_CONTEXT.now is None:
+        return _parse_date(date, hour_threshold, datetime.utcnow())
+    key = (date, hour_threshold)
+    parsed = _PARSE_CONTEXT.dates.get(key)
+    if parsed is None:
+        parsed = _PARSE_CONTEXT.dates[key] = _parse_date(date, hour_threshold, _PARSE_CONTEXT.now)
+    return parsed
+
+
+def _parse_date(date: str, hour_threshold: int, now: datetime) -> datetime:
+    day, hour, minute = int(date[0:2]), int(date[2:4]) % 24, int(date[4:6]) % 60
+    if day > calendar.monthrange(now.year, now.month)[1]:
+        # The day doesn't exist in the reference month (e.g. the 31st on the 1st of September), so the report is
+        # from the closest adjacent month that has it
+        guesses = []
+        for months in (-1, 1):
+            month_start = _add_months(now.replace(day=1), months)
+            if day <= calendar.monthrange(month_start.year, month_start.month)[1]:
+                guesses.append(month_start.replace(day=day, hour=hour, minute=minute, second=0, microsecond=0))
+        return min(guesses, key=lambda guess_: abs(guess_ - now))
     # Create initial guess
-    now = datetime.utcnow()
-    guess = now.replace(day=int(date[0:2]),
-                        hour=int(date[2:4]) % 24,
-                        minute=int(date[4:6]) % 60,
-                        second=0, microsecond=0)
+    guess = now.replace(day=day, hour=hour, minute=minute, second=0, microsecond=0)
     hourdiff = (guess - now) / timedelta(minutes=1) / 60
     # Handle changing months
     if hourdiff > hour_threshold:
-        guess += relativedelta(months=-1)
+        guess = _add_months(guess, -1)
     elif hourdiff < -hour_threshold:
-        guess += relativedelta(months=+1)
+        guess = _add_months(guess, 1)
     return guess
 
 
-def make_timestamp(timestamp: str) -> Timestamp:
+def make_timestamp(timestamp: str, now: typing.Optional[datetime] = None) -> Timestamp:
     """
     Returns a Timestamp dataclass for a report timestamp in ddhhZ or ddhhmmZ format
     """
-    return Timestamp(timestamp, parse_date(timestamp))
+    return Timestamp(timestamp, parse_date(timestamp, now=now))
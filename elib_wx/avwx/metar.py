@@ -10,13 +10,49 @@ import logging
 # stdlib
 # module
 import typing
+from datetime import datetime
 
 from elib_wx.avwx import core, remarks, service
-from elib_wx.avwx.static import FLIGHT_RULES, IN_UNITS, NA_UNITS
+from elib_wx.avwx.static import FLIGHT_RULES
 from elib_wx.avwx.structs import MetarData, Units
 
 LOGGER = logging.getLogger('elib.wx')
 
+# Optional hook timing the stages of parse_na and parse_in (see avwx.profiling). It is called with the name of the
+# stage, the stage function and its arguments, and returns the result of the stage.
+STAGE_TIMER: typing.Optional[typing.Callable[..., typing.Any]] = None
+
+
+class _TimedStages:  # pylint: disable=too-few-public-methods
+    """
+    Stands in for a module of stage functions, calling them through the STAGE_TIMER hook
+
+    Only used while the hook is set: otherwise the stages are called on the modules themselves.
+    """
+    __slots__ = ('_module', '_prefix', '_timer')
+
+    def __init__(self, module: typing.Any, prefix: str, timer: typing.Callable[..., typing.Any]) -> None:
+        self._module = module
+        self._prefix = prefix
+        self._timer = timer
+
+    def __getattr__(self, name: str) -> typing.Callable[..., typing.Any]:
+        func = getattr(self._module, name)
+        stage, timer = self._prefix + name, self._timer
+
+        def _timed_stage(*args: typing.Any) -> typing.Any:
+            return timer(stage, func, *args)
+
+        return _timed_stage
+
+
+def _stage_modules() -> typing.Tuple[typing.Any, typing.Any]:
+    # chosen once per parse: the core and remarks modules themselves, or their timed stand-ins if the hook is set
+    timer = STAGE_TIMER
+    if timer is None:
+        return core, remarks
+    return _TimedStages(core, '', timer), _TimedStages(remarks, 'remarks.', timer)
+
 
 def fetch(station: str) -> str:
     """
@@ -29,37 +65,45 @@ def fetch(station: str) -> str:
     return service.get_service(station)('metar').fetch(station)
 
 
-def parse(station: str, txt: str) -> typing.Tuple[MetarData, Units]:
+def parse(station: str,
+          txt: str,
+          reference_time: typing.Optional[datetime] = None
+          ) -> typing.Tuple[MetarData, Units]:
     """
     Returns MetarData and Units dataclasses with parsed data and their associated units
+
+    The report timestamp is parsed against "reference_time" (naive, UTC) if given, e.g. the observation time of an
+    archived report, else against the reference time of the current parse context (see core.parse_context)
     """
     core.valid_station(station)
-    return parse_na(txt) if core.uses_na_format(station[:2]) else parse_in(txt)
+    with core.parse_context(reference_time):
+        return parse_na(txt) if core.uses_na_format(station[:2]) else parse_in(txt)
 
 
 def parse_na(txt: str) -> typing.Tuple[MetarData, Units]:
     """
     Parser for the North American METAR variant
     """
-    units = Units(**NA_UNITS)
-    clean = core.sanitize_report_string(txt)
+    core_stages, remarks_stages = _stage_modules()
+    units = core.NA_DEFAULT_UNITS
+    clean = core_stages.sanitize_report_string(txt)
     wxresp: typing.Dict[str, typing.Any] = {'raw': txt, 'sanitized': clean}
-    wxdata, wxresp['remarks'] = core.get_remarks(clean)
-    wxdata, wxresp['runway_visibility'], _ = core.sanitize_report_list(wxdata)
-    wxdata, wxresp['station'], wxresp['time'] = core.get_station_and_time(wxdata)
-    wxdata, wxresp['clouds'] = core.get_clouds(wxdata)
-    wxdata, wind_dir, wind_speed, wind_gust, wind_var = core.get_wind(wxdata, units)
+    wxdata, wxresp['remarks'] = core_stages.get_remarks(clean)
+    wxdata, wxresp['runway_visibility'], _ = core_stages.sanitize_report_list(wxdata)
+    wxdata, wxresp['station'], wxresp['time'] = core_stages.get_station_and_time(wxdata)
+    wxdata, wxresp['clouds'] = core_stages.get_clouds(wxdata)
+    wxdata, wind_dir, wind_speed, wind_gust, wind_var, units = core_stages.get_wind(wxdata, units)
     wxresp['wind_direction'] = wind_dir
     wxresp['wind_speed'] = wind_speed
     wxresp['wind_gust'] = wind_gust
     wxresp['wind_variable_direction'] = wind_var
-    wxdata, wxresp['altimeter'] = core.get_altimeter(wxdata, units)
-    wxdata, wxresp['visibility'] = core.get_visibility(wxdata, units)
-    wxresp['other'], wxresp['temperature'], wxresp['dewpoint'] = core.get_temp_and_dew(wxdata)
-    condition = core.get_flight_rules(wxresp['visibility'], core.get_ceiling(wxresp['clouds']))
+    wxdata, wxresp['altimeter'], units = core_stages.get_altimeter(wxdata, units)
+    wxdata, wxresp['visibility'], units = core_stages.get_visibility(wxdata, units)
+    wxresp['other'], wxresp['temperature'], wxresp['dewpoint'] = core_stages.get_temp_and_dew(wxdata)
+    condition = core_stages.get_flight_rules(wxresp['visibility'], core.get_ceiling(wxresp['clouds']))
     wxresp['flight_rules'] = FLIGHT_RULES[condition]
-    wxresp['remarks_info'] = remarks.parse(wxresp['remarks'])
-    wxresp['time'] = core.make_timestamp(wxresp['time'])
+    wxresp['remarks_info'] = remarks_stages.parse(wxresp['remarks'])
+    wxresp['time'] = core_stages.make_timestamp(wxresp['time'])
     return MetarData(**wxresp), units
 
 
@@ -67,29 +111,30 @@ def parse_in(txt: str) -> typing.Tuple[MetarData, Units]:
     """
     Parser for the International METAR variant
     """
-    units = Units(**IN_UNITS)
-    clean = core.sanitize_report_string(txt)
+    core_stages, remarks_stages = _stage_modules()
+    units = core.IN_DEFAULT_UNITS
+    clean = core_stages.sanitize_report_string(txt)
     wxresp: typing.Dict[str, typing.Any] = {'raw': txt, 'sanitized': clean}
-    wxdata, wxresp['remarks'] = core.get_remarks(clean)
-    wxdata, wxresp['runway_visibility'], _ = core.sanitize_report_list(wxdata)
-    wxdata, wxresp['station'], wxresp['time'] = core.get_station_and_time(wxdata)
+    wxdata, wxresp['remarks'] = core_stages.get_remarks(clean)
+    wxdata, wxresp['runway_visibility'], _ = core_stages.sanitize_report_list(wxdata)
+    wxdata, wxresp['station'], wxresp['time'] = core_stages.get_station_and_time(wxdata)
     if 'CAVOK' not in wxdata:
-        wxdata, wxresp['clouds'] = core.get_clouds(wxdata)
-    wxdata, wind_dir, wind_speed, wind_gust, wind_var = core.get_wind(wxdata, units)
+        wxdata, wxresp['clouds'] = core_stages.get_clouds(wxdata)
+    wxdata, wind_dir, wind_speed, wind_gust, wind_var, units = core_stages.get_wind(wxdata, units)
     wxresp['wind_direction'] = wind_dir
     wxresp['wind_speed'] = wind_speed
     wxresp['wind_gust'] = wind_gust
     wxresp['wind_variable_direction'] = wind_var
-    wxdata, wxresp['altimeter'] = core.get_altimeter(wxdata, units, 'IN')
+    wxdata, wxresp['altimeter'], units = core_stages.get_altimeter(wxdata, units, 'IN')
     if 'CAVOK' in wxdata:
         wxresp['visibility'] = core.make_number('CAVOK')
         wxresp['clouds'] = []
         wxdata.remove('CAVOK')
     else:
-        wxdata, wxresp['visibility'] = core.get_visibility(wxdata, units)
-    wxresp['other'], wxresp['temperature'], wxresp['dewpoint'] = core.get_temp_and_dew(wxdata)
-    condition = core.get_flight_rules(wxresp['visibility'], core.get_ceiling(wxresp['clouds']))
+        wxdata, wxresp['visibility'], units = core_stages.get_visibility(wxdata, units)
+    wxresp['other'], wxresp['temperature'], wxresp['dewpoint'] = core_stages.get_temp_and_dew(wxdata)
+    condition = core_stages.get_flight_rules(wxresp['visibility'], core.get_ceiling(wxresp['clouds']))
     wxresp['flight_rules'] = FLIGHT_RULES[condition]
-    wxresp['remarks_info'] = remarks.parse(wxresp['remarks'])
-    wxresp['time'] = core.make_timestamp(wxresp['time'])
+    wxresp['remarks_info'] = remarks_stages.parse(wxresp['remarks'])
+    wxresp['time'] = core_stages.make_timestamp(wxresp['time'])
     return MetarData(**wxresp), units
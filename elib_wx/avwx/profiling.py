@@ -0,0 +1,154 @@
+# coding=utf-8
+"""
+Opt-in per-stage profiling of METAR parsing
+
+While a profiling context is active, the stages of metar.parse (get_remarks, get_clouds, remarks.parse, ...) are timed
+and counted through the metar.STAGE_TIMER hook. Outside of it, the hook is unset and stages are called directly.
+
+Profiling is process-wide: all threads parsing METARs while a context is active are recorded.
+"""
+import contextlib
+import threading
+import time
+import typing
+
+import dataclasses
+
+from . import metar
+
+
+@dataclasses.dataclass
+class StageStats:
+    """
+    Wall time and call counts of a parsing stage
+
+    Failed calls (the stage raised) are counted both in "calls" and "errors", and their time is included.
+    """
+    calls: int = 0
+    errors: int = 0
+    total_seconds: float = 0.0
+    max_seconds: float = 0.0
+
+
+class ParseProfiler:
+    """
+    Collects the statistics of each parsing stage
+    """
+
+    def __init__(self) -> None:
+        self._stages: typing.Dict[str, StageStats] = {}
+        self._lock = threading.Lock()
+
+    def record(self, stage: str, elapsed: float, failed: bool = False) -> None:
+        """
+        Records a call to a stage
+
+        :param stage: name of the stage
+        :type stage: str
+        :param elapsed: wall time of the call, in seconds
+        :type elapsed: float
+        :param failed: True if the stage raised
+        :type failed: bool
+        """
+        with self._lock:
+            stats = self._stages.get(stage)
+            if stats is None:
+                stats = self._stages[stage] = StageStats()
+            stats.calls += 1
+            stats.total_seconds += elapsed
+            if elapsed > stats.max_seconds:
+                stats.max_seconds = elapsed
+            if failed:
+                stats.errors += 1
+
+    def stats(self) -> typing.Dict[str, StageStats]:
+        """
+        :return: copy of the statistics of each stage that has been called, by stage name
+        :rtype: dict
+        """
+        with self._lock:
+            return {stage: dataclasses.replace(stats) for stage, stats in self._stages.items()}
+
+    def as_dict(self) -> typing.Dict[str, typing.Dict[str, typing.Union[int, float]]]:
+        """
+        :return: statistics of each stage that has been called, as plain dictionaries
+        :rtype: dict
+        """
+        return {stage: dataclasses.asdict(stats) for stage, stats in self.stats().items()}
+
+    def as_prometheus(self, prefix: str = 'elib_wx_metar_parse') -> str:
+        """
+        Exports the statistics in the Prometheus text exposition format
+
+        :param prefix: prefix of the metric names
+        :type prefix: str
+        :return: metrics, one sample per stage and metric
+        :rtype: str
+        """
+        stats = sorted(self.stats().items())
+        lines = []
+        for metric, help_text, metric_type, attribute in (
+                ('stage_calls_total', 'Number of calls to each parsing stage', 'counter', 'calls'),
+                ('stage_errors_total', 'Number of calls to each parsing stage that raised', 'counter', 'errors'),
+                ('stage_seconds_total', 'Wall time spent in each parsing stage', 'counter', 'total_seconds'),
+                ('stage_max_seconds', 'Longest call to each parsing stage', 'gauge', 'max_seconds'),
+        ):
+            name = f'{prefix}_{metric}'
+            lines.append(f'# HELP {name} {help_text}')
+            lines.append(f'# TYPE {name} {metric_type}')
+            for stage, stage_stats in stats:
+                lines.append(f'{name}{{stage="{stage}"}} {getattr(stage_stats, attribute)}')
+        return '\n'.join(lines) + '\n'
+
+    def reset(self) -> None:
+        """
+        Removes all statistics
+        """
+        with self._lock:
+            self._stages.clear()
+
+
+_ACTIVE_PROFILERS: typing.List[ParseProfiler] = []
+_ACTIVE_PROFILERS_LOCK = threading.Lock()
+
+
+def _record(stage: str, elapsed: float, failed: bool = False) -> None:
+    for profiler in tuple(_ACTIVE_PROFILERS):
+        profiler.record(stage, elapsed, failed)
+
+
+def _time_stage(stage: str, func: typing.Callable[..., typing.Any], *args: typing.Any) -> typing.Any:
+    start = time.perf_counter()
+    try:
+        result = func(*args)
+    except Exception:
+        _record(stage, time.perf_counter() - start, failed=True)
+        raise
+    _record(stage, time.perf_counter() - start)
+    return result
+
+
+@contextlib.contextmanager
+def profile_metar_parsing(profiler: typing.Optional[ParseProfiler] = None) -> typing.Iterator[ParseProfiler]:
+    """
+    Profiles the stages of metar.parse within the context
+
+    Contexts can be nested or used from several threads; each active profiler records all the calls.
+
+    :param profiler: profiler to record into (defaults to a new one)
+    :type profiler: ParseProfiler
+    :return: context manager yielding the profiler
+    :rtype: ParseProfiler
+    """
+    if profiler is None:
+        profiler = ParseProfiler()
+    with _ACTIVE_PROFILERS_LOCK:
+        _ACTIVE_PROFILERS.append(profiler)
+        metar.STAGE_TIMER = _time_stage
+    try:
+        yield profiler
+    finally:
+        with _ACTIVE_PROFILERS_LOCK:
+            _ACTIVE_PROFILERS.remove(profiler)
+            if not _ACTIVE_PROFILERS:
+                metar.STAGE_TIMER = None
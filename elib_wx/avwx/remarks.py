@@ -4,12 +4,13 @@ Michael duPont - michael@mdupont.com
 Original source: https://github.com/flyinactor91/AVWX-Engine
 Modified by etcher@daribouca.net
 """
+import re
 import typing
 
 # module
 from . import core
 from .static import PRESSURE_TENDENCIES, REMARKS_ELEMENTS, REMARKS_GROUPS, WX_TRANSLATIONS
-from .structs import RemarksData
+from .structs import RemarkGroup, RemarksData
 
 
 def _tdec(code: str, unit: typing.Optional[str] = 'C') -> typing.Optional[str]:
@@ -77,54 +78,84 @@ LEN5_DECODE = {
 }
 
 
+# pylint: disable=bad-continuation
+_REMARK_GROUP_RE = re.compile(
+    r'(?P<len5>[12679]\d{4}|5[0-8]\d{3})'  # 5-digit encoded elements, see LEN5_DECODE
+    r'|(?P<temperature_minmax_24>\d{9})'  # 24-hour min/max temperature: 401001015
+    r'|(?P<digits>\d+)'  # any other digit-only element (ignored)
+    r'|(?P<sea_level_pressure>SLP\d{3}.*)'  # sea level pressure: SLP218
+    r'|(?P<temperature_decimal>T\d{8})'  # temperature/dew point with decimal: T02220183
+    r'|(?P<precipitation>P\d{4})'  # hourly precipitation amount: P0123
+    r'|(?P<weather_began_ended>..[BE]\d{2})'  # weather began/ended: RAB15
+)
+REMARKS_GROUPS_BY_CODE = {key.strip(): value for key, value in REMARKS_GROUPS.items()}
+
+
+def decode(remarks: str) -> typing.List[RemarkGroup]:
+    """
+    Decodes the groups of a remarks string
+
+    Static multi-word groups come first, followed by the other groups in order of appearance (the first word,
+    usually "RMK", is skipped). Unknown or malformed groups are left out, and duplicates are only kept once.
+    """
+    groups = [RemarkGroup('group', key.strip()) for key in REMARKS_GROUPS if key in remarks]
+    seen = {group.code for group in groups}
+    for code in remarks.split()[1:]:
+        if code in seen:
+            continue
+        if code in REMARKS_ELEMENTS:
+            kind: typing.Optional[str] = 'element'
+        else:
+            match = _REMARK_GROUP_RE.fullmatch(code)
+            kind = match.lastgroup if match else None
+            if kind == 'digits' or kind == 'weather_began_ended' and code[:2] not in WX_TRANSLATIONS:
+                kind = None
+        if kind:
+            seen.add(code)
+            groups.append(RemarkGroup(kind, code))
+    return groups
+
+
 def parse(rmk: str) -> RemarksData:
     """
-    Finds temperature and dewpoint decimal values from the remarks
+    Finds temperature and dewpoint decimal values from the remarks, and decodes the remarks groups
     """
     rmkdata: typing.Dict[str, typing.Any] = {}
     for item in rmk.split(' '):
         if len(item) in [5, 9] and item[0] == 'T' and item[1:].isdigit():
             rmkdata['temperature_decimal'] = core.make_number(_tdec(item[1:5], None))
             rmkdata['dewpoint_decimal'] = core.make_number(_tdec(item[5:], None))
-    return RemarksData(**rmkdata)
-
-
-def translate(remarks: str) -> typing.Dict[str, str]:  # noqa
+    return RemarksData(groups=decode(rmk), **rmkdata)
+
+
+def _translate_group(group: RemarkGroup) -> str:
+    code = group.code
+    if group.kind == 'group':
+        return REMARKS_GROUPS_BY_CODE[code]
+    if group.kind == 'element':
+        return REMARKS_ELEMENTS[code]
+    if group.kind == 'len5':
+        return LEN5_DECODE[code[0]](code)  # type: ignore
+    if group.kind == 'temperature_minmax_24':
+        return f'24-hour temperature: max {_tdec(code[1:5])} min {_tdec(code[5:])}'
+    if group.kind == 'sea_level_pressure':
+        return f'Sea level pressure: 10{code[3:5]}.{code[5]} hPa'
+    if group.kind == 'temperature_decimal':
+        return f'Temperature {_tdec(code[1:5])} and dewpoint {_tdec(code[5:])}'
+    if group.kind == 'precipitation':
+        return f'Hourly precipitation: {int(code[1:3])}.{code[3:]} in.'
+    if group.kind == 'weather_began_ended':
+        state = 'began' if code[2] == 'B' else 'ended'
+        return f'{WX_TRANSLATIONS[code[:2]]} {state} at :{code[3:]}'
+    raise ValueError(f'unknown remark group: {group}')
+
+
+def translate(remarks: str, groups: typing.Optional[typing.List[RemarkGroup]] = None) -> typing.Dict[str, str]:
     """
     Translates elements in the remarks string
+
+    Already decoded groups (from RemarksData) can be given to avoid decoding the remarks again.
     """
-    ret = {}
-    # Add and replace static multi-word elements
-    for key in REMARKS_GROUPS:
-        if key in remarks:
-            ret[key.strip()] = REMARKS_GROUPS[key]
-            remarks.replace(key, ' ')
-    # For each remaining element
-    for rmk in remarks.split()[1:]:
-        rlen = len(rmk)
-        # Static single-word elements
-        if rmk in REMARKS_ELEMENTS:
-            ret[rmk] = REMARKS_ELEMENTS[rmk]
-        # Digit-only encoded elements
-        elif rmk.isdigit():
-            if rlen == 5 and rmk[0] in LEN5_DECODE:
-                _ret = LEN5_DECODE[rmk[0]](rmk)  # type: ignore
-                rmk_: str = _ret
-                ret[rmk] = rmk_
-            # 24-hour min/max temperature
-            elif rlen == 9:
-                ret[rmk] = f'24-hour temperature: max {_tdec(rmk[1:5])} min {_tdec(rmk[5:])}'
-        # Sea level pressure: SLP218
-        elif rmk.startswith('SLP'):
-            ret[rmk] = f'Sea level pressure: 10{rmk[3:5]}.{rmk[5]} hPa'
-        # Temp/Dew with decimal: T02220183
-        elif rlen == 9 and rmk[0] == 'T' and rmk[1:].isdigit():
-            ret[rmk] = f'Temperature {_tdec(rmk[1:5])} and dewpoint {_tdec(rmk[5:])}'
-        # Precipitation amount: P0123
-        elif rlen == 5 and rmk[0] == 'P' and rmk[1:].isdigit():
-            ret[rmk] = f'Hourly precipitation: {int(rmk[1:3])}.{rmk[3:]} in.'
-        # Weather began/ended
-        elif rlen == 5 and rmk[2] in ('B', 'E') and rmk[3:].isdigit() and rmk[:2] in WX_TRANSLATIONS:
-            state = 'began' if rmk[2] == 'B' else 'ended'
-            ret[rmk] = f'{WX_TRANSLATIONS[rmk[:2]]} {state} at :{rmk[3:]}'
-    return ret
+    if groups is None:
+        groups = decode(remarks)
+    return {group.code: _translate_group(group) for group in groups}
@@ -6,10 +6,15 @@ Modified by etcher@daribouca.net
 """
 # pylint: disable=too-many-branches,too-many-boolean-expressions,too-many-return-statements,bad-continuation
 # pylint: disable=not-callable,signature-differs
+import bisect
 import logging
+import threading
+import time
 import typing
+from copy import deepcopy
 
 import requests
+from dataclasses import dataclass, field
 from xmltodict import parse as parsexml
 
 from elib_wx.avwx.core import valid_station
@@ -17,6 +22,150 @@ from elib_wx.avwx.exceptions import InvalidRequestError, SourceError
 
 LOGGER = logging.getLogger('elib.wx')
 
+# upper bounds of the histogram buckets (the last bucket has no upper bound)
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+RESPONSE_BYTES_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144)
+
+
+@dataclass
+class FetchSample:
+    """
+    Represents a single request to a service
+
+    "seconds" only covers the request itself. "status_code" and "response_bytes" are None if no response was
+    received. "error" is the name of the exception raised by fetch, if any.
+    """
+    service: str
+    rtype: str
+    seconds: float = 0.0
+    status_code: typing.Optional[int] = None
+    response_bytes: typing.Optional[int] = None
+    error: typing.Optional[str] = None
+
+
+@dataclass
+class Histogram:
+    """
+    Represents the distribution of observed values
+
+    "counts" has one more item than "bounds", for values above the last bound
+    """
+    bounds: typing.Tuple[float, ...]
+    counts: typing.List[int] = field(default_factory=list)
+    count: int = 0
+    sum: float = 0
+
+    def __post_init__(self) -> None:
+        if not self.counts:
+            self.counts = [0] * (len(self.bounds) + 1)
+
+    def observe(self, value: float) -> None:
+        """
+        Adds a value to the bucket of the lowest bound it does not exceed
+        """
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.sum += value
+
+
+@dataclass
+class FetchStats:
+    """
+    Represents the requests made to a service for a report type
+    """
+    requests: int = 0
+    latency: Histogram = field(default_factory=lambda: Histogram(LATENCY_BUCKETS))
+    response_bytes: Histogram = field(default_factory=lambda: Histogram(RESPONSE_BYTES_BUCKETS))
+    status_codes: typing.Dict[int, int] = field(default_factory=dict)
+    errors: typing.Dict[str, int] = field(default_factory=dict)
+
+
+class FetchMetricsExporter:
+    """
+    Base class for receiving the metrics of the requests made by services
+    """
+
+    def record(self, sample: FetchSample) -> None:
+        """
+        Records a request. Implemented by child classes
+        """
+        raise NotImplementedError()
+
+
+class InMemoryFetchMetrics(FetchMetricsExporter):
+    """
+    Keeps the metrics of the requests in memory, keyed by service class name and report type
+    """
+
+    def __init__(self) -> None:
+        self._stats: typing.Dict[typing.Tuple[str, str], FetchStats] = {}
+        self._lock = threading.Lock()
+
+    def record(self, sample: FetchSample) -> None:
+        """
+        Adds a request to the statistics of its service and report type
+        """
+        with self._lock:
+            stats = self._stats.get((sample.service, sample.rtype))
+            if stats is None:
+                stats = self._stats[(sample.service, sample.rtype)] = FetchStats()
+            stats.requests += 1
+            stats.latency.observe(sample.seconds)
+            if sample.status_code is not None:
+                stats.status_codes[sample.status_code] = stats.status_codes.get(sample.status_code, 0) + 1
+            if sample.response_bytes is not None:
+                stats.response_bytes.observe(sample.response_bytes)
+            if sample.error is not None:
+                stats.errors[sample.error] = stats.errors.get(sample.error, 0) + 1
+
+    def stats(self) -> typing.Dict[typing.Tuple[str, str], FetchStats]:
+        """
+        Returns a copy of the statistics, keyed by service class name and report type
+        """
+        with self._lock:
+            return deepcopy(self._stats)
+
+    def get(self, service: str, rtype: str) -> FetchStats:
+        """
+        Returns a copy of the statistics of a service for a report type (empty if it made no request)
+        """
+        with self._lock:
+            return deepcopy(self._stats.get((service, rtype), FetchStats()))
+
+    def reset(self) -> None:
+        """
+        Removes all statistics
+        """
+        with self._lock:
+            self._stats.clear()
+
+
+FETCH_METRICS = InMemoryFetchMetrics()
+_METRICS_EXPORTER: FetchMetricsExporter = FETCH_METRICS
+
+
+def set_metrics_exporter(exporter: typing.Optional[FetchMetricsExporter]) -> None:
+    """
+    Sets the exporter receiving the metrics of all requests (None restores the default in-memory collector,
+    FETCH_METRICS)
+    """
+    global _METRICS_EXPORTER  # pylint: disable=global-statement
+    _METRICS_EXPORTER = FETCH_METRICS if exporter is None else exporter
+
+
+def get_metrics_exporter() -> FetchMetricsExporter:
+    """
+    Returns the exporter receiving the metrics of all requests
+    """
+    return _METRICS_EXPORTER
+
+
+def _export(sample: FetchSample) -> None:
+    try:
+        _METRICS_EXPORTER.record(sample)
+    except Exception:  # pylint: disable=broad-except
+        LOGGER.exception('%s: unable to export fetch metrics', sample.service)
+
 
 class Service:
     """
@@ -46,17 +195,31 @@ class Service:
     def fetch(self, station: str) -> str:
         """
         Fetches a report string from the service
+
+        Metrics of the request are sent to the metrics exporter (see set_metrics_exporter)
         """
         LOGGER.debug('%s: %s: fetching data for station', self.__class__.__name__, station)
         valid_station(station)
+        sample = FetchSample(self.__class__.__name__, self.rtype)
+        start = time.perf_counter()
         try:
-            resp = getattr(requests, self.method.lower())(self.url.format(self.rtype, station))
-            if resp.status_code != 200:
-                raise SourceError(f'{self.__class__.__name__} server returned {resp.status_code}')
-        except requests.exceptions.ConnectionError:
-            raise ConnectionError(f'Unable to connect to {self.__class__.__name__} server')
-        LOGGER.debug('%s: %s: extracting report', self.__class__.__name__, station)
-        report = self._extract(resp.text, station)
+            try:
+                resp = getattr(requests, self.method.lower())(self.url.format(self.rtype, station))
+                sample.seconds = time.perf_counter() - start
+                sample.status_code, sample.response_bytes = resp.status_code, len(resp.content)
+                if resp.status_code != 200:
+                    raise SourceError(f'{self.__class__.__name__} server returned {resp.status_code}')
+            except requests.exceptions.ConnectionError:
+                raise ConnectionError(f'Unable to connect to {self.__class__.__name__} server')
+            LOGGER.debug('%s: %s: extracting report', self.__class__.__name__, station)
+            report = self._extract(resp.text, station)
+        except Exception as error:
+            if sample.status_code is None:
+                sample.seconds = time.perf_counter() - start
+            sample.error = error.__class__.__name__
+            raise
+        finally:
+            _export(sample)
         # This split join replaces all *whitespace elements with a single space
         report = ' '.join(report.split())
         LOGGER.debug('%s: %s: report: %s', self.__class__.__name__, station, report)
@@ -8,7 +8,36 @@ Modified by etcher@daribouca.net
 import typing
 from datetime import datetime
 
-from dataclasses import dataclass
+from dataclasses import dataclass, field, fields, is_dataclass
+
+
+def _get_frozen_state(self):
+    return tuple(getattr(self, field_.name) for field_ in fields(self))
+
+
+def _set_frozen_state(self, state):
+    for field_, value in zip(fields(self), state):
+        object.__setattr__(self, field_.name, value)
+
+
+def slotted(cls):
+    """
+    Re-creates a dataclass with __slots__, so that its instances do not have a __dict__
+
+    Dataclasses can only be created with slots from Python 3.10 on (fields with a default value conflict with
+    __slots__), so this re-creates the class the same way. Base classes must be slotted as well.
+    """
+    base_field_names = {field_.name for base in cls.__bases__ if is_dataclass(base) for field_ in fields(base)}
+    own_field_names = tuple(field_.name for field_ in fields(cls) if field_.name not in base_field_names)
+    cls_dict = dict(cls.__dict__)
+    cls_dict['__slots__'] = own_field_names
+    for name in own_field_names + ('__dict__', '__weakref__'):
+        cls_dict.pop(name, None)
+    if cls.__dataclass_params__.frozen:
+        # default pickling of slotted objects sets attributes, which frozen dataclasses forbid
+        cls_dict['__getstate__'] = _get_frozen_state
+        cls_dict['__setstate__'] = _set_frozen_state
+    return type(cls)(cls.__name__, cls.__bases__, cls_dict)
 
 
 @dataclass
@@ -28,10 +57,13 @@ class StationInfo:
     state: str
 
 
-@dataclass
+@slotted
+@dataclass(frozen=True)
 class Units:
     """
     METAR/TAF units
+
+    Units are immutable, as identical instances are shared between reports (see core.replace_unit)
     """
     altimeter: str
     altitude: str
@@ -40,7 +72,8 @@ class Units:
     wind_speed: str
 
 
-@dataclass
+@slotted
+@dataclass(frozen=True)
 class Number:
     """
     Represents a number
@@ -50,7 +83,8 @@ class Number:
     spoken: typing.Optional[str]
 
 
-@dataclass
+@slotted
+@dataclass(frozen=True)
 class Fraction(Number):
     """
     Represents a fractional number
@@ -60,7 +94,8 @@ class Fraction(Number):
     normalized: str
 
 
-@dataclass
+@slotted
+@dataclass(frozen=True)
 class Timestamp:
     """
     Represents a date time object
@@ -69,6 +104,7 @@ class Timestamp:
     dt: typing.Optional[datetime]
 
 
+@slotted
 @dataclass
 class Cloud:
     """
@@ -80,13 +116,26 @@ class Cloud:
     modifier: typing.Optional[str] = None
 
 
+@slotted
+@dataclass(frozen=True)
+class RemarkGroup:
+    """
+    Represents a single decoded group of the remarks
+    """
+    kind: str
+    code: str
+
+
 @dataclass
 class RemarksData:
     """
     Represents remark's data
+
+    "groups" holds the decoded remarks groups (see remarks.decode), so that they are only decoded once per report.
     """
     dewpoint_decimal: typing.Optional[float] = None
     temperature_decimal: typing.Optional[float] = None
+    groups: typing.List[RemarkGroup] = field(default_factory=list, compare=False)
 
 
 @dataclass
@@ -140,6 +189,21 @@ class MetarData:
     temperature: Number
     wind_variable_direction: typing.List[Number]
 
+    @property
+    def wx_codes(self) -> typing.FrozenSet[str]:
+        """
+        Set of 2-letter weather code components (RA, TS, VC, ...) found in "other"
+
+        Computed once, and only re-computed if "other" changes
+        """
+        from .core import split_wx_codes  # circular import
+        key = tuple(self.other)
+        cache = self.__dict__.get('_wx_codes')
+        if cache is None or cache[0] != key:
+            cache = key, split_wx_codes(key)
+            self.__dict__['_wx_codes'] = cache
+        return cache[1]
+
 
 @dataclass
 class TafLineData:
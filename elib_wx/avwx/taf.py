@@ -5,11 +5,11 @@ Original source: https://github.com/flyinactor91/AVWX-Engine
 Modified by etcher@daribouca.net
 """
 import typing
-
 # stdlib
+from datetime import datetime
+
 # module
 from . import core, service
-from .static import IN_UNITS, NA_UNITS
 from .structs import TafData, TafLineData, Units
 
 
@@ -23,10 +23,22 @@ def fetch(station: str) -> str:
     return service.get_service(station)('taf').fetch(station)
 
 
-def parse(station: str, txt: str) -> typing.Tuple[TafData, Units]:
+def parse(station: str,
+          txt: str,
+          reference_time: typing.Optional[datetime] = None
+          ) -> typing.Tuple[TafData, Units]:
     """
     Returns TafData and Units dataclasses with parsed data and their associated units
+
+    All the timestamps of the report are parsed against the same reference time: "reference_time" (naive, UTC) if
+    given, e.g. the issue time of an archived report, else the one of the current parse context (see
+    core.parse_context)
     """
+    with core.parse_context(reference_time):
+        return _parse(station, txt)
+
+
+def _parse(station: str, txt: str) -> typing.Tuple[TafData, Units]:
     core.valid_station(station)
     while len(txt) > 3 and txt[:4] in ('TAF ', 'AMD ', 'COR '):
         txt = txt[4:]
@@ -43,15 +55,15 @@ def parse(station: str, txt: str) -> typing.Tuple[TafData, Units]:
     txt = txt.replace(time, '').strip()
     if core.uses_na_format(station):
         use_na = True
-        units = Units(**NA_UNITS)
+        units = core.NA_DEFAULT_UNITS
     else:
         use_na = False
-        units = Units(**IN_UNITS)
+        units = core.IN_DEFAULT_UNITS
     # Find and remove remarks
     txt, retwx['remarks'] = core.get_taf_remarks(txt)
     # Split and parse each line
     lines = core.split_taf(txt)
-    parsed_lines = parse_lines(lines, units, use_na)
+    parsed_lines, units = parse_lines(lines, units, use_na)
     # Perform additional info extract and corrections
     if parsed_lines:
         parsed_lines[-1]['other'], retwx['max_temp'], retwx['min_temp'] \
@@ -76,14 +88,14 @@ def parse(station: str, txt: str) -> typing.Tuple[TafData, Units]:
 
 def parse_lines(lines: typing.List[str],
                 units: Units,
-                use_na: bool = True) -> typing.List[typing.Dict[str, typing.Any]]:
+                use_na: bool = True) -> typing.Tuple[typing.List[typing.Dict[str, typing.Any]], Units]:
     """
-    Returns a list of parsed line dictionaries
+    Returns a list of parsed line dictionaries and the units (updated by the lines that use other units)
     """
     parsed_lines = []
     prob = ''
-    while lines:
-        raw_line = lines[0].strip()
+    for raw_line in lines:
+        raw_line = raw_line.strip()
         line = core.sanitize_line(raw_line)
         # Remove prob from the beginning of a line
         if line.startswith('PROB'):
@@ -96,7 +108,7 @@ def parse_lines(lines: typing.List[str],
                 prob = line[:6]
                 line = line[6:].strip()
         if line:
-            parsed_line = (parse_na_line if use_na else parse_in_line)(line, units)
+            parsed_line, units = (parse_na_line if use_na else parse_in_line)(line, units)
             for key in ('start_time', 'end_time'):
                 parsed_line[key] = core.make_timestamp(parsed_line[key])
             parsed_line['probability'] = core.make_number(prob[4:])
@@ -104,41 +116,44 @@ def parse_lines(lines: typing.List[str],
             parsed_line['sanitized'] = prob + ' ' + line if prob else line
             prob = ''
             parsed_lines.append(parsed_line)
-        lines.pop(0)
-    return parsed_lines
+    return parsed_lines, units
 
 
-def parse_na_line(txt: str, units: Units) -> typing.Dict[str, typing.Any]:
+def parse_na_line(txt: str, units: Units) -> typing.Tuple[typing.Dict[str, typing.Any], Units]:
     """
     Parser for the North American TAF forcast varient
+
+    Returns the parsed line and the units (updated if the line uses other units)
     """
     retwx: typing.Dict[str, typing.Any] = {}
     wxdata = txt.split(' ')
     wxdata, _, retwx['wind_shear'] = core.sanitize_report_list(wxdata)
     wxdata, retwx['type'], retwx['start_time'], retwx['end_time'] = core.get_type_and_times(wxdata)
-    wxdata, wind_dir, wind_speed, wind_gust, _ = core.get_wind(wxdata, units)
+    wxdata, wind_dir, wind_speed, wind_gust, _, units = core.get_wind(wxdata, units)
     retwx['wind_direction'] = wind_dir
     retwx['wind_speed'] = wind_speed
     retwx['wind_gust'] = wind_gust
-    wxdata, retwx['visibility'] = core.get_visibility(wxdata, units)
+    wxdata, retwx['visibility'], units = core.get_visibility(wxdata, units)
     wxdata, retwx['clouds'] = core.get_clouds(wxdata)
     other, altimeter, icing, turbulense = core.get_taf_alt_ice_turb(wxdata)
     retwx['other'] = other
     retwx['altimeter'] = altimeter
     retwx['icing'] = icing
     retwx['turbulance'] = turbulense
-    return retwx
+    return retwx, units
 
 
-def parse_in_line(txt: str, units: Units) -> typing.Dict[str, typing.Any]:
+def parse_in_line(txt: str, units: Units) -> typing.Tuple[typing.Dict[str, typing.Any], Units]:
     """
     Parser for the International TAF forcast varient
+
+    Returns the parsed line and the units (updated if the line uses other units)
     """
     retwx: typing.Dict[str, typing.Any] = {}
     wxdata = txt.split(' ')
     wxdata, _, retwx['wind_shear'] = core.sanitize_report_list(wxdata)
     wxdata, retwx['type'], retwx['start_time'], retwx['end_time'] = core.get_type_and_times(wxdata)
-    wxdata, wind_dir, wind_speed, wind_gust, _ = core.get_wind(wxdata, units)
+    wxdata, wind_dir, wind_speed, wind_gust, _, units = core.get_wind(wxdata, units)
     retwx['wind_direction'] = wind_dir
     retwx['wind_speed'] = wind_speed
     retwx['wind_gust'] = wind_gust
@@ -147,7 +162,7 @@ def parse_in_line(txt: str, units: Units) -> typing.Dict[str, typing.Any]:
         retwx['clouds'] = []
         wxdata.pop(wxdata.index('CAVOK'))
     else:
-        wxdata, retwx['visibility'] = core.get_visibility(wxdata, units)
+        wxdata, retwx['visibility'], units = core.get_visibility(wxdata, units)
         wxdata, retwx['clouds'] = core.get_clouds(wxdata)
     retwx['other'], retwx['altimeter'], retwx['icing'], retwx['turbulance'] = core.get_taf_alt_ice_turb(wxdata)
-    return retwx
+    return retwx, units
@@ -4,6 +4,7 @@ Michael duPont - michael@mdupont.com
 Original source: https://github.com/flyinactor91/AVWX-Engine
 Modified by etcher@daribouca.net
 """
+import bisect
 import logging
 import typing
 
@@ -16,7 +17,14 @@ from .structs import (Cloud, MetarData, MetarTrans, Number, TafData, TafLineData
 LOGGER = logging.getLogger('elib.wx')
 
 
-def get_cardinal_direction(direction: float) -> str:  # noqa
+# lower bound (in degrees) of each cardinal direction, starting with NNE
+_CARDINAL_BOUNDS = (12, 34, 57, 79, 102, 124, 147, 169, 192, 214, 237, 259, 282, 304, 327, 349)
+_CARDINALS = ('N', 'NNE', 'NE', 'ENE', 'E', 'ESE', 'SE', 'SSE', 'S', 'SSW', 'SW', 'WSW', 'W', 'WNW', 'NW', 'NNW', 'N')
+# cardinal direction for every degree in [0 360[
+CARDINAL_DIRECTIONS_TABLE = tuple(_CARDINALS[bisect.bisect_right(_CARDINAL_BOUNDS, degree)] for degree in range(360))
+
+
+def get_cardinal_direction(direction: float) -> str:
     """
     Returns the cardinal direction (NSEW) for a degree direction
 
@@ -30,46 +38,7 @@ def get_cardinal_direction(direction: float) -> str:  # noqa
 
     (270) -- 281/282 -- 303/304 -- (315) -- 326/327 -- 348/349 -- (360)
     """
-    ret = ''
-    if not isinstance(direction, int):
-        direction = int(direction)
-    # Convert to range [0 360]
-    while direction < 0:
-        direction += 360
-    direction %= 360
-    if 304 <= direction <= 360 or 0 <= direction <= 56:
-        ret += 'N'
-        if 304 <= direction <= 348:
-            if 327 <= direction <= 348:
-                ret += 'N'
-            ret += 'W'
-        elif 12 <= direction <= 56:
-            if 12 <= direction <= 33:
-                ret += 'N'
-            ret += 'E'
-    elif 124 <= direction <= 236:
-        ret += 'S'
-        if 124 <= direction <= 168:
-            if 147 <= direction <= 168:
-                ret += 'S'
-            ret += 'E'
-        elif 192 <= direction <= 236:
-            if 192 <= direction <= 213:
-                ret += 'S'
-            ret += 'W'
-    elif 57 <= direction <= 123:
-        ret += 'E'
-        if 57 <= direction <= 78:
-            ret += 'NE'
-        elif 102 <= direction <= 123:
-            ret += 'SE'
-    elif 237 <= direction <= 303:
-        ret += 'W'
-        if 237 <= direction <= 258:
-            ret += 'SW'
-        elif 282 <= direction <= 303:
-            ret += 'NW'
-    return ret
+    return CARDINAL_DIRECTIONS_TABLE[int(direction) % 360]
 
 
 WIND_DIR_REPR = {
@@ -343,7 +312,7 @@ def metar(wxdata: MetarData, units: Units) -> MetarTrans:
                                 units.wind_speed)
     translations['temperature'] = temperature(wxdata.temperature, units.temperature)
     translations['dewpoint'] = temperature(wxdata.dewpoint, units.temperature)
-    translations['remarks'] = remarks.translate(wxdata.remarks)
+    translations['remarks'] = remarks.translate(wxdata.remarks, getattr(wxdata.remarks_info, 'groups', None))
     return MetarTrans(**translations)
 
 
@@ -0,0 +1,136 @@
+# coding=utf-8
+"""
+Process-wide cache of negative results: failed METAR fetches and unknown ICAO codes
+
+While a negative result is cached, fetching the METAR for the same station raises a new error of the same type
+and message without querying the service, and looking up the name of the same unknown airport returns without
+querying the database. Each negative result is logged once per TTL window instead of once per call.
+
+The cache is disabled by default; set "Config.negative_cache_ttl" to the number of seconds a negative result is
+kept for to enable it.
+"""
+import threading
+import time
+import typing
+
+import dataclasses
+
+from elib_wx import LOGGER, Config, avwx
+
+_CacheKey = typing.Tuple[str, str]
+
+# errors that are worth caching: the service was queried and did not return a report
+FETCH_ERRORS = (avwx.exceptions.InvalidRequestError, avwx.exceptions.SourceError, ConnectionError)
+
+# above this number of entries, expired entries are removed when a new one is added
+_PURGE_THRESHOLD = 1024
+
+
+@dataclasses.dataclass
+class NegativeCacheStats:
+    """
+    Statistics of the negative cache
+
+    "hits" counts the negative results returned from the cache, without querying the service or database.
+    """
+    size: int
+    ttl: float
+    hits: int
+
+
+class NegativeCache:
+    """
+    Cache of negative results, each kept for "Config.negative_cache_ttl" seconds
+    """
+
+    def __init__(self, clock: typing.Callable[[], float] = time.monotonic) -> None:
+        self._clock = clock
+        self._entries: typing.Dict[_CacheKey, typing.Tuple[float, typing.Any]] = {}
+        self._lock = threading.Lock()
+        self._hits = 0
+
+    @staticmethod
+    def is_enabled() -> bool:
+        """
+        :return: True if the negative cache is enabled
+        :rtype: bool
+        """
+        return Config.negative_cache_ttl > 0
+
+    def get(self, key: _CacheKey) -> typing.Optional[typing.Any]:
+        """
+        :param key: kind of result and station ICAO
+        :type key: tuple
+        :return: cached negative result, if any and not expired
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, result = entry
+            if self._clock() >= expires_at:
+                del self._entries[key]
+                return None
+            self._hits += 1
+            return result
+
+    def add(self, key: _CacheKey, result: typing.Any) -> None:
+        """
+        Keeps a negative result until the end of its TTL window
+
+        :param key: kind of result and station ICAO
+        :type key: tuple
+        :param result: negative result
+        """
+        with self._lock:
+            now = self._clock()
+            if len(self._entries) >= _PURGE_THRESHOLD:
+                for expired_key in [key_ for key_, (expires_at, _) in self._entries.items() if now >= expires_at]:
+                    del self._entries[expired_key]
+            self._entries[key] = (now + Config.negative_cache_ttl, result)
+
+    def fetch_metar(self, station_icao: str) -> str:
+        """
+        Fetches the METAR for a station, unless fetching it failed within the TTL window
+
+        :param station_icao: ICAO code of the station
+        :type station_icao: str
+        :return: raw METAR string
+        :rtype: str
+        :raises: an error of the same type and message as the one raised by the last failed fetch, while it is cached
+        """
+        if not self.is_enabled():
+            return avwx.metar.fetch(station_icao)
+        key = ('metar', station_icao)
+        cached_error = self.get(key)
+        if cached_error is not None:
+            error_type, message = cached_error
+            LOGGER.debug('%s: METAR fetch failed recently, not retrying: %s', station_icao, message)
+            # a new error for each caller, instead of sharing an instance (and its traceback) between threads
+            raise error_type(message)
+        try:
+            return avwx.metar.fetch(station_icao)
+        except FETCH_ERRORS as error:
+            self.add(key, (type(error), str(error)))
+            LOGGER.warning('%s: unable to fetch METAR, not retrying for %s seconds: %s',
+                           station_icao, Config.negative_cache_ttl, error)
+            raise
+
+    def stats(self) -> NegativeCacheStats:
+        """
+        :return: current statistics of the cache
+        :rtype: NegativeCacheStats
+        """
+        with self._lock:
+            return NegativeCacheStats(size=len(self._entries), ttl=Config.negative_cache_ttl, hits=self._hits)
+
+    def clear(self) -> None:
+        """
+        Removes all negative results from the cache and resets statistics
+        """
+        with self._lock:
+            self._entries.clear()
+            self._hits = 0
+
+
+NEGATIVE_CACHE = NegativeCache()
@@ -0,0 +1,158 @@
+# coding=utf-8
+"""
+Replays archived METAR and TAF reports against their own observation time
+
+METAR and TAF timestamps only carry a day of month and a time; they are dated relative to a reference time, which
+defaults to the current UTC time. When replaying an archive, each report is dated relative to the observation time
+stored alongside it instead, so that old reports keep their actual year and month.
+
+Archives are text files with one report per line, prefixed by its observation time (UTC):
+
+    201808121050 UGTB 121050Z 24008KT 9999 FEW030 12/07 Q1021 NOSIG
+    2018-08-12T10:53Z METAR KLAW 121053Z AUTO VRB05KT 10SM BKN020 16/12 A2992=
+
+Observation times are either compact ("YYYYMMDDHHMM") or ISO 8601 ("YYYY-MM-DDTHH:MM[:SS][Z]"). A leading report
+type ("METAR", "SPECI" or "TAF") and a trailing "=" are removed. Empty lines and lines starting with "#" are ignored.
+"""
+import datetime
+import typing
+from pathlib import Path
+
+import dataclasses
+
+from elib_wx import LOGGER, avwx
+from elib_wx.exc import ELIBWxError
+from elib_wx.weather import Weather
+
+_REPORT_TYPES = ('METAR', 'SPECI', 'TAF')
+
+
+@dataclasses.dataclass(frozen=True)
+class ArchivedReport:
+    """
+    Raw report and the time it was observed at (naive, UTC)
+    """
+    observation_time: datetime.datetime
+    report: str
+
+    @property
+    def station(self) -> str:
+        """
+        :return: ICAO code of the station
+        :rtype: str
+        """
+        return self.report.split(' ', 1)[0]
+
+    def parse_metar(self) -> typing.Tuple[avwx.metar.MetarData, avwx.structs.Units]:
+        """
+        Parses the report as a METAR dated relative to its observation time
+
+        :return: parsed METAR data and units
+        :rtype: tuple of MetarData and Units
+        """
+        return avwx.metar.parse(self.station, self.report, self.observation_time)
+
+    def parse_taf(self) -> typing.Tuple[avwx.taf.TafData, avwx.structs.Units]:
+        """
+        Parses the report as a TAF dated relative to its observation time
+
+        :return: parsed TAF data and units
+        :rtype: tuple of TafData and Units
+        """
+        return avwx.taf.parse(self.station, self.report, self.observation_time)
+
+
+def parse_observation_time(observation_time: str) -> datetime.datetime:
+    """
+    Parses a compact ("YYYYMMDDHHMM") or ISO 8601 ("YYYY-MM-DDTHH:MM[:SS][Z]") observation time
+
+    :param observation_time: observation time, in UTC
+    :type observation_time: str
+    :return: naive datetime, in UTC
+    :rtype: datetime.datetime
+    """
+    if observation_time.endswith('Z'):
+        observation_time = observation_time[:-1]
+    if len(observation_time) == 12 and observation_time.isdigit():
+        return datetime.datetime(int(observation_time[:4]), int(observation_time[4:6]), int(observation_time[6:8]),
+                                 int(observation_time[8:10]), int(observation_time[10:12]))
+    if len(observation_time) in (16, 19) and observation_time[4] == '-' and observation_time[10] in 'T ':
+        return datetime.datetime(int(observation_time[:4]), int(observation_time[5:7]), int(observation_time[8:10]),
+                                 int(observation_time[11:13]), int(observation_time[14:16]),
+                                 int(observation_time[17:19] or 0))
+    raise ValueError(f'invalid observation time: {observation_time}')
+
+
+def _parse_line(line: str) -> typing.Optional[ArchivedReport]:
+    line = line.strip()
+    if not line or line.startswith('#'):
+        return None
+    observation_time, _, report = line.partition(' ')
+    report = report.strip().rstrip('=').rstrip()
+    first_word, _, rest = report.partition(' ')
+    if first_word in _REPORT_TYPES:
+        report = rest.lstrip()
+    if not report:
+        raise ValueError('missing report')
+    return ArchivedReport(parse_observation_time(observation_time), report)
+
+
+def read_archive(lines: typing.Iterable[str]) -> typing.Iterator[ArchivedReport]:
+    """
+    Reads archived reports, one per line, prefixed by their observation time
+
+    Lines that cannot be read are logged and skipped.
+
+    :param lines: lines of the archive
+    :type lines: iterable of str
+    :return: iterator over the archived reports, in the order of the archive
+    :rtype: iterator of ArchivedReport
+    """
+    for line_number, line in enumerate(lines, start=1):
+        try:
+            archived_report = _parse_line(line)
+        except ValueError as error:
+            LOGGER.warning('skipping archive line %s: %s: %r', line_number, error, line)
+            continue
+        if archived_report is not None:
+            yield archived_report
+
+
+def open_archive(archive_path: typing.Union[str, Path], encoding: str = 'utf8') -> typing.Iterator[ArchivedReport]:
+    """
+    Streams the reports of an archive file, without loading the whole file in memory
+
+    :param archive_path: path to the archive file
+    :type archive_path: str or Path
+    :param encoding: encoding of the archive file
+    :type encoding: str
+    :return: iterator over the archived reports, in the order of the archive
+    :rtype: iterator of ArchivedReport
+    """
+    with Path(archive_path).open(encoding=encoding) as stream:
+        yield from read_archive(stream)
+
+
+def replay_weather(archive: typing.Union[str, Path, typing.Iterable[str]],
+                   **weather_kwargs: typing.Any,
+                   ) -> typing.Iterator[Weather]:
+    """
+    Creates a Weather object for each METAR of an archive, dated relative to its observation time
+
+    Reports that cannot be parsed are logged and skipped.
+
+    :param archive: path to an archive file, or lines of an archive
+    :type archive: str, Path or iterable of str
+    :param weather_kwargs: additional arguments for Weather (seed, lazy, ...)
+    :return: iterator over the Weather objects, in the order of the archive
+    :rtype: iterator of Weather
+    """
+    if isinstance(archive, (str, Path)):
+        archived_reports = open_archive(archive)
+    else:
+        archived_reports = read_archive(archive)
+    for archived_report in archived_reports:
+        try:
+            yield Weather(archived_report.report, reference_time=archived_report.observation_time, **weather_kwargs)
+        except (ELIBWxError, ValueError, IndexError) as error:
+            LOGGER.warning('skipping archived report: %s: %s', error, archived_report.report)
@@ -0,0 +1,172 @@
+# coding=utf-8
+"""
+Process-wide LRU cache of parsed and rendered METAR reports
+
+Weather objects built from the same raw METAR string (even in different threads) share the parsed MetarData and
+Units, as well as the rendered strings, instead of parsing and translating the report again.
+
+The cache is disabled by default; set "Config.report_cache_size" to the maximum number of reports to keep to
+enable it. Cached MetarData and Units are shared between Weather objects, and must be treated as read-only.
+
+Rendered strings are only shared for Weather objects that have not been modified since their creation, and whose
+values are all read from the METAR (no randomized missing values).
+"""
+import collections
+import datetime
+import threading
+import typing
+
+import dataclasses
+
+from elib_wx import Config, avwx
+
+_CacheKey = typing.Tuple[str, str]
+
+
+@dataclasses.dataclass
+class ReportCacheStats:
+    """
+    Statistics of the report cache
+
+    Hits and misses count both parsing and rendering lookups.
+    """
+    size: int
+    max_size: int
+    hits: int
+    misses: int
+    evictions: int
+
+
+class _CacheEntry:
+    __slots__ = ('metar_data', 'metar_units', 'rendered')
+
+    def __init__(self, metar_data: avwx.metar.MetarData, metar_units: avwx.structs.Units) -> None:
+        self.metar_data = metar_data
+        self.metar_units = metar_units
+        self.rendered: typing.Dict[bool, str] = {}
+
+
+class ReportCache:
+    """
+    LRU cache of parsed and rendered METAR reports, keyed on station ICAO and raw METAR string
+    """
+
+    def __init__(self) -> None:
+        self._entries: typing.MutableMapping[_CacheKey, _CacheEntry] = collections.OrderedDict()
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+    @staticmethod
+    def is_enabled() -> bool:
+        """
+        :return: True if the report cache is enabled
+        :rtype: bool
+        """
+        return Config.report_cache_size > 0
+
+    def _get_entry(self, key: _CacheKey) -> typing.Optional[_CacheEntry]:
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries.move_to_end(key)  # type: ignore
+        return entry
+
+    def _evict(self) -> None:
+        while len(self._entries) > Config.report_cache_size:
+            self._entries.popitem(last=False)  # type: ignore
+            self._evictions += 1
+
+    def parse(self,
+              station_icao: str,
+              raw_metar_str: str,
+              reference_time: typing.Optional[datetime.datetime] = None,
+              ) -> typing.Tuple[avwx.metar.MetarData, avwx.structs.Units]:
+        """
+        Parses a raw METAR string, re-using cached results when available
+
+        Reports parsed against an explicit reference time are not cached.
+
+        :param station_icao: ICAO code of the station
+        :type station_icao: str
+        :param raw_metar_str: raw METAR string
+        :type raw_metar_str: str
+        :param reference_time: time the METAR timestamp is relative to (naive, UTC; defaults to now)
+        :type reference_time: datetime.datetime
+        :return: parsed METAR data and units
+        :rtype: tuple of MetarData and Units
+        """
+        if reference_time is not None:
+            return avwx.metar.parse(station_icao, raw_metar_str, reference_time)
+        if not self.is_enabled():
+            return avwx.metar.parse(station_icao, raw_metar_str)
+        key = (station_icao, raw_metar_str)
+        with self._lock:
+            entry = self._get_entry(key)
+            if entry is not None:
+                self._hits += 1
+                return entry.metar_data, entry.metar_units
+            self._misses += 1
+        metar_data, metar_units = avwx.metar.parse(station_icao, raw_metar_str)
+        with self._lock:
+            self._entries[key] = _CacheEntry(metar_data, metar_units)
+            self._evict()
+        return metar_data, metar_units
+
+    def get_rendered(self, key: _CacheKey, spoken: bool) -> typing.Optional[str]:
+        """
+        :param key: station ICAO and raw METAR string
+        :type key: tuple
+        :param spoken: tailor outputs for TTS engines
+        :type spoken: bool
+        :return: cached rendered string, if any
+        :rtype: str
+        """
+        with self._lock:
+            entry = self._get_entry(key)
+            if entry is None or spoken not in entry.rendered:
+                self._misses += 1
+                return None
+            self._hits += 1
+            return entry.rendered[spoken]
+
+    def set_rendered(self, key: _CacheKey, spoken: bool, rendered: str) -> None:
+        """
+        Stores a rendered string for a report that is already in the cache
+
+        :param key: station ICAO and raw METAR string
+        :type key: tuple
+        :param spoken: tailor outputs for TTS engines
+        :type spoken: bool
+        :param rendered: rendered string
+        :type rendered: str
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                entry.rendered[spoken] = rendered
+
+    def stats(self) -> ReportCacheStats:
+        """
+        :return: current statistics of the cache
+        :rtype: ReportCacheStats
+        """
+        with self._lock:
+            return ReportCacheStats(size=len(self._entries),
+                                    max_size=Config.report_cache_size,
+                                    hits=self._hits,
+                                    misses=self._misses,
+                                    evictions=self._evictions)
+
+    def clear(self) -> None:
+        """
+        Removes all reports from the cache and resets statistics
+        """
+        with self._lock:
+            self._entries.clear()
+            self._hits = 0
+            self._misses = 0
+            self._evictions = 0
+
+
+REPORT_CACHE = ReportCache()
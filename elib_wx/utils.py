@@ -2,10 +2,10 @@
 """
 This module contains various utility functions
 """
+import functools
+import re
 import typing
 
-import inflect
-
 from elib_wx.avwx.core import valid_station
 from elib_wx.static import PRESSURE_TENDENCIES, UNIT_TRANSLATION
 
@@ -23,13 +23,99 @@ def extract_station_from_metar_str(metar_str: str) -> str:
     return valid_station(_station)
 
 
-_CONVERT = inflect.engine()
+_DIGIT_WORDS = ('zero', 'one', 'two', 'three', 'four', 'five', 'six', 'seven', 'eight', 'nine')
+_TEEN_WORDS = ('ten', 'eleven', 'twelve', 'thirteen', 'fourteen', 'fifteen', 'sixteen', 'seventeen', 'eighteen',
+               'nineteen')
+_TENS_WORDS = ('', '', 'twenty', 'thirty', 'forty', 'fifty', 'sixty', 'seventy', 'eighty', 'ninety')
+# words for 0-99, the building block for every number in the table range
+_BELOW_HUNDRED_WORDS = _DIGIT_WORDS + _TEEN_WORDS + tuple(
+    _TENS_WORDS[tens] + ('-' + _DIGIT_WORDS[units] if units else '')
+    for tens in range(2, 10)
+    for units in range(10)
+)
+_ORDINAL_WORDS = {
+    'one': 'first',
+    'two': 'second',
+    'three': 'third',
+    'five': 'fifth',
+    'eight': 'eighth',
+    'nine': 'ninth',
+    'twelve': 'twelfth',
+}
+# headings, speeds, visibilities, flight levels, times, ... all fit in there
+_MAX_TABLE_VALUE = 9999
+_ASCII_DIGITS_RE = re.compile(r'[0-9]+')
+_NUMBER_RE = re.compile(r'^(?P<integer>\d+)(?:\.(?P<decimals>\d+))?$')
+_ORDINAL_RE = re.compile(r'^(?P<integer>\d+)(?:st|nd|rd|th)$')
+_CONVERT = None
+
+
+def _inflect_engine():
+    # inflect is slow to import, so it is only loaded for numbers outside of the tables
+    global _CONVERT  # pylint: disable=global-statement
+    if _CONVERT is None:
+        import inflect  # pylint: disable=import-outside-toplevel
+        _CONVERT = inflect.engine()
+    return _CONVERT
+
+
+def _int_to_words(num: int) -> str:
+    thousands, rest = divmod(num, 1000)
+    hundreds, rest = divmod(rest, 100)
+    words = []
+    if thousands:
+        words.append(f'{_DIGIT_WORDS[thousands]} thousand')
+    if hundreds:
+        words.append(f'{_DIGIT_WORDS[hundreds]} hundred')
+    if rest or not words:
+        if words:
+            words.append('and')
+        words.append(_BELOW_HUNDRED_WORDS[rest])
+    return ' '.join(words)
+
+
+def _to_ordinal_words(words: str) -> str:
+    head, _, last_word = words.rpartition(' ')
+    prefix, hyphen, last_word = last_word.rpartition('-')
+    if last_word in _ORDINAL_WORDS:
+        last_word = _ORDINAL_WORDS[last_word]
+    elif last_word.endswith('y'):
+        last_word = last_word[:-1] + 'ieth'
+    else:
+        last_word += 'th'
+    return f'{head} {prefix}{hyphen}{last_word}' if head else f'{prefix}{hyphen}{last_word}'
+
+
+def _num_to_words_from_tables(num: typing.Union[str, float], group: int) -> typing.Optional[str]:
+    if isinstance(num, bool) or not isinstance(num, (str, int, float)):
+        return None
+    num_as_str = num if isinstance(num, str) else str(num)
+    if group == 1:
+        if _ASCII_DIGITS_RE.fullmatch(num_as_str):
+            return ' '.join(_DIGIT_WORDS[int(digit)] for digit in num_as_str)
+        return None
+    if group != 0:
+        return None
+    match = _ORDINAL_RE.match(num_as_str)
+    if match and int(match.group('integer')) <= _MAX_TABLE_VALUE:
+        return _to_ordinal_words(_int_to_words(int(match.group('integer'))))
+    match = _NUMBER_RE.match(num_as_str)
+    if not match or int(match.group('integer')) > _MAX_TABLE_VALUE:
+        return None
+    words = _int_to_words(int(match.group('integer')))
+    if match.group('decimals'):
+        words += ' point ' + ' '.join(_DIGIT_WORDS[int(digit)] for digit in match.group('decimals'))
+    return words
 
 
+@functools.lru_cache(maxsize=4096, typed=True)
 def num_to_words(num: typing.Union[str, float], group: int = 1) -> str:
     """
     Translates numbers to words
 
+    Positive numbers up to 9999 are translated using word tables, anything else falls back to inflect.
+    Results are memoized.
+
     :param num: number to translate
     :type num: float, int, str
     :param group: 1, 2 or 3 to group numbers before turning into words
@@ -37,9 +123,13 @@ def num_to_words(num: typing.Union[str, float], group: int = 1) -> str:
     :return: number as str
     :rtype: str
     """
-    return _CONVERT.number_to_words(num, group=group).replace(',', '')
+    words = _num_to_words_from_tables(num, group)
+    if words is None:
+        words = _inflect_engine().number_to_words(num, group=group)
+    return words.replace(',', '')
 
 
+@functools.lru_cache(maxsize=1024, typed=True)
 def num_to_ordinal(num: typing.Union[str, float]) -> str:
     """
     Return the ordinal of num.
@@ -51,7 +141,18 @@ def num_to_ordinal(num: typing.Union[str, float]) -> str:
     :return: translated ordinal
     :rtype: str
     """
-    return _CONVERT.ordinal(num)
+    if isinstance(num, int) and not isinstance(num, bool) and num >= 0:
+        num = str(num)
+        return num + _ordinal_suffix(num)
+    if isinstance(num, str) and _ASCII_DIGITS_RE.fullmatch(num):
+        return num + _ordinal_suffix(num)
+    return _inflect_engine().ordinal(num)
+
+
+def _ordinal_suffix(digits: str) -> str:
+    if digits[-2:-1] == '1':
+        return 'th'
+    return {'1': 'st', '2': 'nd', '3': 'rd'}.get(digits[-1], 'th')
 
 
 def _translate_unit(unit: str) -> str:
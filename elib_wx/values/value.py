@@ -8,17 +8,14 @@ import random
 import typing
 
 import dataclasses
-import inflect
 
 from elib_wx import avwx
 
 LOGGER = logging.getLogger('elib.wx')
 
-_CONVERT = inflect.engine()
 
-
-def _gauss(mean: float, sigma: int) -> int:
-    return int(random.gauss(mean, sigma))
+def _gauss(mean: float, sigma: int, rng: typing.Optional[random.Random] = None) -> int:
+    return int((rng or random).gauss(mean, sigma))
 
 
 @dataclasses.dataclass
@@ -241,23 +238,27 @@ class Direction(Value):
         return value % 360
 
     @staticmethod
-    def random_value() -> float:
+    def random_value(rng: typing.Optional[random.Random] = None) -> float:
         """
         Creates a random
+        :param rng: optional random number generator
+        :type rng: random.Random
         :return:
         :rtype:
         """
-        return random.randint(0, 359)  # nosec
+        return (rng or random).randint(0, 359)  # nosec
 
     @staticmethod
-    def random() -> 'Direction':
+    def random(rng: typing.Optional[random.Random] = None) -> 'Direction':
         """
         Creates a random direction value
 
+        :param rng: optional random number generator
+        :type rng: random.Random
         :return: random direction
         :rtype: Direction
         """
-        return Direction(Direction.random_value())
+        return Direction(Direction.random_value(rng))
 
     def reverse(self) -> 'Direction':
         """
@@ -274,30 +275,38 @@ class WindDirection(Direction):
     Represents the direction of the wind
     """
 
-    def __init__(self, value: typing.Optional[typing.Union[int, float]], unit: typing.Optional[str] = None) -> None:
+    def __init__(self,
+                 value: typing.Optional[typing.Union[int, float]],
+                 unit: typing.Optional[str] = None,
+                 rng: typing.Optional[random.Random] = None,
+                 ) -> None:
         if value is None:
-            value = self.random_value()
+            value = self.random_value(rng)
         super(WindDirection, self).__init__(value, unit)
 
-    def randomize_at_2000m(self) -> 'WindDirection':
+    def randomize_at_2000m(self, rng: typing.Optional[random.Random] = None) -> 'WindDirection':
         """
         Creates a randomized wind direction at 2000M for DCS
 
+        :param rng: optional random number generator
+        :type rng: random.Random
         :return: random wind direction
         :rtype: WindDirection
         """
-        value = _gauss(self.value(), 40)
+        value = _gauss(self.value(), 40, rng)
         normalized_value = self.normalize(value)
         return WindDirection(normalized_value)
 
-    def randomize_at_8000m(self) -> 'WindDirection':
+    def randomize_at_8000m(self, rng: typing.Optional[random.Random] = None) -> 'WindDirection':
         """
         Creates a randomized wind direction at 8000M for DCS
 
+        :param rng: optional random number generator
+        :type rng: random.Random
         :return: random wind direction
         :rtype: WindDirection
         """
-        value = _gauss(self.value(), 80)
+        value = _gauss(self.value(), 80, rng)
         normalized_value = self.normalize(value)
         return WindDirection(normalized_value)
 
@@ -311,14 +320,16 @@ class WindDirection(Direction):
         return WindDirection(self.normalize(self.value() - 180))
 
     @staticmethod
-    def random() -> 'WindDirection':
+    def random(rng: typing.Optional[random.Random] = None) -> 'WindDirection':
         """
         Creates a random Wind direction
 
+        :param rng: optional random number generator
+        :type rng: random.Random
         :return: random wind direction
         :rtype: WindDirection
         """
-        return WindDirection(Direction.random_value())
+        return WindDirection(Direction.random_value(rng))
 
 
 class Speed(Value):
@@ -344,18 +355,21 @@ class WindSpeed(Speed):
         super(WindSpeed, self).__init__(value, unit)
 
     @staticmethod
-    def random_value() -> float:
+    def random_value(rng: typing.Optional[random.Random] = None) -> float:
         """
+        :param rng: optional random number generator
+        :type rng: random.Random
         :return: random wind direction
         :rtype: float
         """
-        return random.triangular(low=0, high=15, mode=5)  # nosec
+        return (rng or random).triangular(low=0, high=15, mode=5)  # nosec
 
     @staticmethod
     def randomize(base_speed: 'WindSpeed',
                   offset: float = 0.0,
                   coef: float = 1.0,
-                  sigma: typing.Optional[int] = None
+                  sigma: typing.Optional[int] = None,
+                  rng: typing.Optional[random.Random] = None,
                   ) -> 'WindSpeed':
         """
         Creates a random wind direction using a gaussian distribution model
@@ -368,39 +382,47 @@ class WindSpeed(Speed):
         :type coef: float
         :param sigma: gauss sigma
         :type sigma: int
+        :param rng: optional random number generator
+        :type rng: random.Random
         :return: randomized wind speed
         :rtype: WindSpeed
         """
         if base_speed is None:
-            base_speed = WindSpeed.random()
+            base_speed = WindSpeed.random(rng)
         if sigma is None:
             int_sigma = int(base_speed.value() / 4)
         else:
             int_sigma = sigma
-        value = _gauss(offset + base_speed.value() * coef, int_sigma)
+        value = _gauss(offset + base_speed.value() * coef, int_sigma, rng)
         return WindSpeed(value=value)
 
-    def randomize_at_2000m(self) -> 'WindSpeed':
+    def randomize_at_2000m(self, rng: typing.Optional[random.Random] = None) -> 'WindSpeed':
         """
+        :param rng: optional random number generator
+        :type rng: random.Random
         :return: random wind at 2000m for DCS (based on self)
         :rtype: WindSpeed
         """
-        return WindSpeed.randomize(self, offset=5, coef=2)
+        return WindSpeed.randomize(self, offset=5, coef=2, rng=rng)
 
-    def randomize_at_8000m(self) -> 'WindSpeed':
+    def randomize_at_8000m(self, rng: typing.Optional[random.Random] = None) -> 'WindSpeed':
         """
+        :param rng: optional random number generator
+        :type rng: random.Random
         :return: random wind at 2000m for DCS (based on self)
         :rtype: WindSpeed
         """
-        return WindSpeed.randomize(self, offset=10, coef=3)
+        return WindSpeed.randomize(self, offset=10, coef=3, rng=rng)
 
     @staticmethod
-    def random() -> 'WindSpeed':
+    def random(rng: typing.Optional[random.Random] = None) -> 'WindSpeed':
         """
+        :param rng: optional random number generator
+        :type rng: random.Random
         :return: random WindSpeed
         :rtype: WindSpeed
         """
-        return WindSpeed(WindSpeed.random_value(), 'kt')
+        return WindSpeed(WindSpeed.random_value(rng), 'kt')
 
 
 class Altitude(Value):
@@ -443,17 +465,19 @@ class Temperature(Value):
         'f': Unit(1.8, '°F', 'degrees fahrenheit', 0),
     }
 
-    def make_dummy_dew_point(self) -> 'Temperature':
+    def make_dummy_dew_point(self, rng: typing.Optional[random.Random] = None) -> 'Temperature':
         """
         Creates a dummy, semi sensible dew point for this temperature
 
         Method used: http://www-das.uwyo.edu/~geerts/cwx/notes/chap06/dewpoint.html
 
+        :param rng: optional random number generator
+        :type rng: random.Random
         :return: dew point
         :rtype: Temperature
         """
         _value = self.value()
-        _relative_humidity = random.triangular(low=65, high=75, mode=70)  # nosec
+        _relative_humidity = (rng or random).triangular(low=65, high=75, mode=70)  # nosec
         _dew_point_value = int(round(_value - ((100 - _relative_humidity) / 5), 0))
         return Temperature(_dew_point_value, unit='c')
 
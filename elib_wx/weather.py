@@ -3,31 +3,127 @@
 Main interface module for elib_wx
 """
 
+import datetime
+import random
+import typing
+
 import elib_miz
 
 from elib_wx import (
-    LOGGER, airports_db, exc, weather_dcs_generate, weather_from_icao, weather_from_metar_data,
-    weather_from_metar_string, weather_from_miz, weather_to_mission, weather_to_miz, weather_translate,
+    airports_db, avwx, exc, report_cache, weather_dcs_generate, weather_from_icao, weather_from_metar_data,
+    weather_from_metar_string, weather_from_miz, weather_lazy, weather_render, weather_to_mission, weather_to_miz,
+    weather_translate,
 )
 from elib_wx.weather_abc import WeatherABC
 from elib_wx.weather_dcs import DCSWeather
+from elib_wx.weather_segment import Segment
+
+# attributes that do not feed the rendered strings
+_ATTRIBUTES_KEEPING_RENDER_CACHE = frozenset({
+    '_render_cache', '_report_cache_key', '_report_render_key', '_dcs_weather_cache', 'cache_dcs_weather', 'seed',
+})
 
 
 class Weather(WeatherABC):  # pylint: disable=too-many-instance-attributes
     """
     Represents a "weather" situation
+
+    If created with "lazy=True" from an ICAO code or a METAR string, derived fields are only computed on first
+    access (see elib_wx.weather_lazy).
+
+    The METAR timestamp (day of month and time) is dated relative to "reference_time" (naive, UTC) if given, for
+    example the observation time of an archived report, else relative to the current UTC time. MIZ files carry
+    their own date.
+
+    Rendered strings (as_str, as_speech) are cached until any of the values they are rendered from changes,
+    including values modified in place (see weather_render.make_render_key).
     """
 
-    def __init__(self, source: str) -> None:
+    station_name = weather_lazy.LazyField(weather_lazy.load_station_name)
+    raw_metar_str = weather_lazy.LazyField(weather_lazy.load_raw_metar_str)
+    metar_data = weather_lazy.LazyField(weather_lazy.load_metar_data)
+    metar_units = weather_lazy.LazyField(weather_lazy.load_metar_data)
+    altimeter = weather_lazy.LazyField(weather_lazy.load_values)
+    cloud_layers = weather_lazy.LazyField(weather_lazy.load_values)
+    visibility = weather_lazy.LazyField(weather_lazy.load_values)
+    temperature = weather_lazy.LazyField(weather_lazy.load_values)
+    dew_point = weather_lazy.LazyField(weather_lazy.load_values)
+    wind_speed = weather_lazy.LazyField(weather_lazy.load_values)
+    wind_direction = weather_lazy.LazyField(weather_lazy.load_values)
+    wind_direction_range = weather_lazy.LazyField(weather_lazy.load_values)
+    wind_gust = weather_lazy.LazyField(weather_lazy.load_values)
+    wind_direction_is_variable = weather_lazy.LazyField(weather_lazy.load_values)
+    date_time = weather_lazy.LazyField(weather_lazy.load_values)
+    other = weather_lazy.LazyField(weather_lazy.load_values)
+    remarks = weather_lazy.LazyField(weather_lazy.load_values)
+
+    def __init__(self,
+                 source: str,
+                 *,
+                 seed: typing.Optional[int] = None,
+                 cache_dcs_weather: bool = False,
+                 lazy: bool = False,
+                 reference_time: typing.Optional[datetime.datetime] = None,
+                 ) -> None:
         if not isinstance(source, str):
             raise exc.InvalidWeatherSourceError(source, f'expected a string, got {type(source)}')
         self.source = source
+        self.seed = seed
+        self.cache_dcs_weather = cache_dcs_weather
+        self.lazy = lazy
+        self.reference_time = reference_time
         if len(source) == 4:
             self._from_icao()
         elif source.lower().endswith('.miz'):
             self._from_miz_file()
         else:
             self._from_metar_string()
+        self._set_report_cache_key()
+
+    @classmethod
+    def from_metar_data(cls,
+                        metar_data: avwx.metar.MetarData,
+                        metar_units: avwx.structs.Units,
+                        *,
+                        source_type: str = 'METAR data',
+                        seed: typing.Optional[int] = None,
+                        cache_dcs_weather: bool = False,
+                        ) -> 'Weather':
+        """
+        Creates a Weather object from METAR data that has already been parsed or built, for example from a TAF
+        forecast (see elib_wx.weather_forecast)
+
+        "metar_data.raw" is used as source and raw METAR string.
+
+        :param metar_data: METAR data
+        :type metar_data: MetarData
+        :param metar_units: units of the METAR data
+        :type metar_units: Units
+        :param source_type: description of the source of the METAR data
+        :type source_type: str
+        :param seed: optional seed for missing values
+        :type seed: int
+        :param cache_dcs_weather: cache the generated DCSWeather (see generate_dcs_weather)
+        :type cache_dcs_weather: bool
+        :return: new Weather object
+        :rtype: Weather
+        """
+        weather_object = cls.__new__(cls)
+        weather_object.source = metar_data.raw
+        weather_object.seed = seed
+        weather_object.cache_dcs_weather = cache_dcs_weather
+        weather_object.source_type = source_type
+        weather_object.station_icao = metar_data.station
+        weather_object.raw_metar_str = metar_data.raw
+        weather_object.metar_data, weather_object.metar_units = metar_data, metar_units
+        weather_object.fill_from_metar_data()
+        return weather_object
+
+    def __setattr__(self, name, value):
+        if name not in _ATTRIBUTES_KEEPING_RENDER_CACHE:
+            self.__dict__['_render_cache'] = None
+            self.__dict__['_report_cache_key'] = None
+        super(Weather, self).__setattr__(name, value)
 
     @property
     def is_cavok(self) -> bool:
@@ -70,16 +166,38 @@ class Weather(WeatherABC):  # pylint: disable=too-many-instance-attributes
                                             out_file=out_file,
                                             overwrite=overwrite)
 
-    def generate_dcs_weather(self) -> DCSWeather:
+    def generate_dcs_weather(self, rng: typing.Optional[random.Random] = None) -> DCSWeather:
         """
         Creates a DCSWeather from this Weather object.
 
         All DCS specific constraints regarding the different values are enforced
 
+        If "cache_dcs_weather" is set and no "rng" is given, the result is cached until any of the values it
+        was generated from changes.
+
+        :param rng: optional random number generator (defaults to one seeded with this object's seed)
+        :type rng: random.Random
         :return: a valid DCSWeather object
         :rtype: DCSWeather
         """
-        return weather_dcs_generate.generate_dcs_weather(weather_object=self)
+        if self.cache_dcs_weather and rng is None:
+            return weather_dcs_generate.generate_cached_dcs_weather(weather_object=self)
+        return weather_dcs_generate.generate_dcs_weather(weather_object=self, rng=rng)
+
+    def generate_dcs_weather_ensemble(self, n: int, seed: typing.Optional[int] = None) -> typing.List[DCSWeather]:
+        """
+        Creates "n" randomized DCSWeather variants from this Weather object.
+
+        Deterministic values are computed once, and only winds aloft and cloud coverage are sampled per variant.
+
+        :param n: number of variants to create
+        :type n: int
+        :param seed: optional seed (defaults to this object's seed)
+        :type seed: int
+        :return: list of valid DCSWeather objects
+        :rtype: list of DCSWeather
+        """
+        return weather_dcs_generate.generate_dcs_weather_ensemble(weather_object=self, n=n, seed=seed)
 
     def fill_from_metar_data(self):
         weather_from_metar_data.weather_from_metar_data(weather_object=self)
@@ -89,7 +207,12 @@ class Weather(WeatherABC):  # pylint: disable=too-many-instance-attributes
         Sets the name of the airport for this station from the ICAO code.
 
         If the ICAO code isn't found in the database, returns "unknown station".
+
+        In lazy mode, the name is only resolved on first access.
         """
+        if self.lazy:
+            self.__dict__.pop('station_name', None)
+            return
         self.station_name = airports_db.get_airport_name_from_icao(self.station_icao)
 
     def _from_icao(self):
@@ -128,21 +251,42 @@ class Weather(WeatherABC):  # pylint: disable=too-many-instance-attributes
     def _make_str_intro(self, spoken: bool) -> str:
         return weather_translate.intro(weather_object=self, spoken=spoken)
 
+    def _set_report_cache_key(self) -> None:
+        """
+        Allows sharing rendered strings through the report cache, if this object's values only depend on the METAR
+
+        The render key of the values at creation is kept, so that an object modified in place since then neither
+        reads nor publishes shared rendered strings.
+        """
+        if not report_cache.REPORT_CACHE.is_enabled() or self.lazy or self.source_type == 'MIZ file' \
+                or self.reference_time is not None:
+            return
+        if not weather_from_metar_data.has_randomized_values(self.metar_data):
+            self._report_cache_key = (self.station_icao, self.raw_metar_str)
+            self._report_render_key = weather_render.make_render_key(self)
+
     def _as_str(self, spoken: bool) -> str:
-        intro = self._make_str_intro(spoken=spoken)
-        wind = self._wind_as_str(spoken=spoken)
-        visibility = self._visibility_as_str(spoken=spoken)
-        temperature = self._temperature_as_str(spoken=spoken)
-        dew_point = self._dew_point_as_str(spoken=spoken)
-        altimeter = self._altimeter_as_str(spoken=spoken)
-        other = self._others_as_str()
-        clouds = self._clouds_as_str(spoken=spoken)
-        try:
-            remarks = self._remarks_as_str(spoken=spoken) or ''
-        except (IndexError, ValueError):
-            LOGGER.warning('failed to parse remarks: %s', self.remarks)
-            remarks = ''
-        _result = [intro, wind, visibility, temperature, dew_point, altimeter, other, clouds, remarks]
-        _result = [x for x in _result if x != '']
-        result = ' '.join(_result)
-        return result.replace('  ', ' ')
+        render_key = weather_render.make_render_key(self)
+        if self._render_cache is None or self._render_cache[0] != render_key:
+            self._render_cache = (render_key, {})
+        rendered_by_mode = self._render_cache[1]
+        if spoken in rendered_by_mode:
+            return rendered_by_mode[spoken]
+        report_cache_key = self._report_cache_key
+        if render_key != self._report_render_key:
+            report_cache_key = None
+        rendered = None
+        if report_cache_key is not None:
+            rendered = report_cache.REPORT_CACHE.get_rendered(report_cache_key, spoken)
+        if rendered is None:
+            rendered = weather_render.render(weather_object=self, spoken=spoken)
+            if report_cache_key is not None:
+                report_cache.REPORT_CACHE.set_rendered(report_cache_key, spoken, rendered)
+        rendered_by_mode[spoken] = rendered
+        return rendered
+
+    def _iter_str(self, spoken: bool) -> typing.Iterator[str]:
+        return weather_render.iter_render(weather_object=self, spoken=spoken)
+
+    def _iter_segments(self, spoken: bool) -> typing.Iterator[Segment]:
+        return weather_render.iter_segments(weather_object=self, spoken=spoken)
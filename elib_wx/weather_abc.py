@@ -2,6 +2,8 @@
 """
 Abstract base class for Weather classes
 """
+import datetime
+import random
 import typing
 
 import dataclasses
@@ -13,6 +15,7 @@ from elib_wx.values.value import (
     WindSpeed,
 )
 from elib_wx.weather_dcs import DCSWeather
+from elib_wx.weather_segment import Segment
 
 
 @dataclasses.dataclass
@@ -42,6 +45,14 @@ class WeatherABC:
     remarks: str
     wind_direction_is_variable: bool = False
     original_dcs_weather: typing.Optional[DCSWeather] = None
+    seed: typing.Optional[int] = None
+    cache_dcs_weather: bool = False
+    lazy: bool = False
+    reference_time: typing.Optional[datetime.datetime] = None
+    _dcs_weather_cache: typing.Optional[typing.Tuple[tuple, DCSWeather]] = None
+    _render_cache: typing.Optional[typing.Tuple[tuple, typing.Dict[bool, str]]] = None
+    _report_cache_key: typing.Optional[typing.Tuple[str, str]] = None
+    _report_render_key: typing.Optional[tuple] = None
 
     @property
     def station_icao(self):
@@ -71,6 +82,18 @@ class WeatherABC:
         self._station_icao = value
         self._set_station_name()
 
+    def make_rng(self) -> random.Random:
+        """
+        Creates a new random number generator for this weather object
+
+        If a seed has been set, the generator is seeded with it, so that identical inputs always yield identical
+        outputs.
+
+        :return: random number generator
+        :rtype: random.Random
+        """
+        return random.Random(self.seed)
+
     def apply_to_mission_dict(self, mission: elib_miz.Mission) -> elib_miz.Mission:
         """
         Generates a DCSWeather object from self and creates a new elib_miz.Mission object out of it
@@ -95,17 +118,32 @@ class WeatherABC:
         """
         raise NotImplementedError()
 
-    def generate_dcs_weather(self) -> DCSWeather:
+    def generate_dcs_weather(self, rng: typing.Optional[random.Random] = None) -> DCSWeather:
         """
         Creates a DCSWeather from this Weather object.
 
         All DCS specific constraints regarding the different values are enforced
 
+        :param rng: optional random number generator
+        :type rng: random.Random
         :return: a valid DCSWeather object
         :rtype: DCSWeather
         """
         raise NotImplementedError()
 
+    def generate_dcs_weather_ensemble(self, n: int, seed: typing.Optional[int] = None) -> typing.List[DCSWeather]:
+        """
+        Creates "n" randomized DCSWeather variants from this Weather object.
+
+        :param n: number of variants to create
+        :type n: int
+        :param seed: optional seed (defaults to this object's seed)
+        :type seed: int
+        :return: list of valid DCSWeather objects
+        :rtype: list of DCSWeather
+        """
+        raise NotImplementedError()
+
     def fill_from_metar_data(self) -> None:
         """
         Creates the Weather object from METAR data
@@ -234,6 +272,24 @@ class WeatherABC:
         """
         raise NotImplementedError()
 
+    def _iter_str(self, spoken: bool) -> typing.Iterator[str]:
+        """
+        :param spoken: tailor outputs for TTS engines
+        :type spoken: bool
+        :return: iterator over weather segments as strings
+        :rtype: iterator of str
+        """
+        raise NotImplementedError()
+
+    def _iter_segments(self, spoken: bool) -> typing.Iterator[Segment]:
+        """
+        :param spoken: tailor outputs for TTS engines
+        :type spoken: bool
+        :return: iterator over weather segments
+        :rtype: iterator of Segment
+        """
+        raise NotImplementedError()
+
     def as_str(self) -> str:
         """
         :return: current weather as string
@@ -247,3 +303,24 @@ class WeatherABC:
         :rtype: str
         """
         return self._as_str(spoken=True)
+
+    def iter_speech(self) -> typing.Iterator[str]:
+        """
+        Yields the segments of the spoken text (intro, wind, visibility, ...) as soon as they are translated
+
+        Joining the segments with a space gives the same text as "as_speech".
+
+        :return: iterator over spoken text segments
+        :rtype: iterator of str
+        """
+        return self._iter_str(spoken=True)
+
+    def speech_segments(self) -> typing.List[Segment]:
+        """
+        Spoken text as a list of segments (intro, wind, visibility, ...), each with a key that only depends on its
+        text (see elib_wx.weather_segment.Segment)
+
+        :return: spoken text segments
+        :rtype: list of Segment
+        """
+        return list(self._iter_segments(spoken=True))
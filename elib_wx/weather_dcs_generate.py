@@ -3,13 +3,14 @@
 Generates a DCSWeather object that can be applied to a MIZ file from a an ABCWeather object
 """
 
+import functools
 import random
 import typing
 
 # pylint: disable=possibly-unused-variable
 import dataclasses
 
-from elib_wx import LOGGER
+from elib_wx import LOGGER, avwx
 from elib_wx.static import CLOUD_METAR_TO_DCS
 from elib_wx.values.value import (
     CloudBase, WindSpeed,
@@ -18,6 +19,20 @@ from elib_wx.weather_abc import WeatherABC
 from elib_wx.weather_dcs import DCSWeather
 
 
+@functools.lru_cache(maxsize=1024)
+def _split_wx_codes(other: typing.Tuple[str, ...]) -> typing.FrozenSet[str]:
+    return avwx.core.split_wx_codes(other)
+
+
+def _wx_codes(weather_object) -> typing.FrozenSet[str]:
+    """
+    Set of 2-letter weather code components found in the "other" values of the weather object itself
+
+    Read from the weather object rather than from its METAR data, so that "other" can be edited in place.
+    """
+    return _split_wx_codes(tuple(weather_object.other))
+
+
 def _make_ground_wind(weather_object) -> typing.Tuple[int, int, int]:
     if weather_object.wind_gust.value() > 0:
         if weather_object.wind_speed.value() == 0:
@@ -38,17 +53,17 @@ def _make_ground_wind(weather_object) -> typing.Tuple[int, int, int]:
     return wind_ground_speed, wind_ground_dir, turbulence
 
 
-def _make_wind_in_altitude(weather_object) -> typing.Tuple[int, int, int, int]:
+def _make_wind_in_altitude(weather_object, rng: random.Random) -> typing.Tuple[int, int, int, int]:
     wind_2000_speed = DCSWeather.normalize_wind_speed(
-        weather_object.wind_speed.randomize_at_2000m().value(),
+        weather_object.wind_speed.randomize_at_2000m(rng).value(),
         'wind speed at 2000 meters'
     )
-    wind_2000_dir = weather_object.wind_direction.randomize_at_2000m().reverse().value()
+    wind_2000_dir = weather_object.wind_direction.randomize_at_2000m(rng).reverse().value()
     wind_8000_speed = DCSWeather.normalize_wind_speed(
-        weather_object.wind_speed.randomize_at_8000m().value(),
+        weather_object.wind_speed.randomize_at_8000m(rng).value(),
         'wind speed at 8000 meters'
     )
-    wind_8000_dir = weather_object.wind_direction.randomize_at_8000m().reverse().value()
+    wind_8000_dir = weather_object.wind_direction.randomize_at_8000m(rng).reverse().value()
     return wind_2000_speed, wind_2000_dir, wind_8000_speed, wind_8000_dir
 
 
@@ -64,43 +79,37 @@ def _make_fog(weather_object) -> typing.Tuple[bool, int, int]:
     return fog_enabled, fog_thickness, fog_visibility
 
 
+DUST_INDICATORS = frozenset({'DU', 'DS', 'PO', 'SS'})
+
+
 def _make_dust(weather_object) -> typing.Tuple[bool, int]:
     dust_enabled = False
     dust_density = 3000
-    for _dust_indicator in {'DU', 'DS', 'PO', 'SS'}:
-        if any(_dust_indicator in other for other in weather_object.metar_data.other):
-            if weather_object.visibility.value() > 5000:
-                LOGGER.debug('there is dust in the area but visibility is over 5000m, not adding dust')
-                break
-            else:
-                LOGGER.warning('there is dust in the area, visibility will be severely restricted')
-                dust_enabled = True
-                dust_density = DCSWeather.normalize_dust_density(weather_object.visibility.value())
-                break
+    if not DUST_INDICATORS.isdisjoint(_wx_codes(weather_object)):
+        if weather_object.visibility.value() > 5000:
+            LOGGER.debug('there is dust in the area but visibility is over 5000m, not adding dust')
+        else:
+            LOGGER.warning('there is dust in the area, visibility will be severely restricted')
+            dust_enabled = True
+            dust_density = DCSWeather.normalize_dust_density(weather_object.visibility.value())
     return dust_enabled, dust_density
 
 
-def _make_clouds(weather_object) -> typing.Tuple[int, int, int]:
-    cloud_density = 0
+def _make_cloud_layer(weather_object, layer_in_use, cloud_density: int, rng: random.Random
+                      ) -> typing.Tuple[int, int, int]:
     cloud_base = 300
     cloud_thickness = 200
-    _layer_in_use = None
-    for _layer in weather_object.cloud_layers:
-        _coverage = random.randint(*CLOUD_METAR_TO_DCS[_layer.type])  # nosec
-        if _coverage > cloud_density:
-            cloud_density = _coverage
-            _layer_in_use = _layer
-    if _layer_in_use:
-        LOGGER.debug('using cloud layer: %s', _layer_in_use.repr)
-        if not _layer_in_use.altitude:
+    if layer_in_use:
+        LOGGER.debug('using cloud layer: %s', layer_in_use.repr)
+        if not layer_in_use.altitude:
             LOGGER.warning(
                 'no cloud altitude data found in METAR, using random number between 5 and 35 thousand feet'
             )
-            cloud_base = random.randint(5, 25) * 1000  # nosec
+            cloud_base = rng.randint(5, 25) * 1000  # nosec
         else:
             if not weather_object.metar_units.altitude == 'ft':
                 raise ValueError(weather_object.metar_units.altitude)
-            cloud_base = CloudBase(_layer_in_use.altitude * 100, 'ft').value('m')
+            cloud_base = CloudBase(layer_in_use.altitude * 100, 'ft').value('m')
         cloud_thickness = int(cloud_density / 10 * 2000)
     else:
         LOGGER.debug('no clouds')
@@ -111,6 +120,17 @@ def _make_clouds(weather_object) -> typing.Tuple[int, int, int]:
     return cloud_base, cloud_density, cloud_thickness
 
 
+def _make_clouds(weather_object, rng: random.Random) -> typing.Tuple[int, int, int]:
+    cloud_density = 0
+    _layer_in_use = None
+    for _layer in weather_object.cloud_layers:
+        _coverage = rng.randint(*CLOUD_METAR_TO_DCS[_layer.type])  # nosec
+        if _coverage > cloud_density:
+            cloud_density = _coverage
+            _layer_in_use = _layer
+    return _make_cloud_layer(weather_object, _layer_in_use, cloud_density, rng)
+
+
 @dataclasses.dataclass
 class WeatherPhenomenon:
     """
@@ -154,46 +174,57 @@ WEATHER_PHENOMENONS = [
 
 def _make_precipitations(weather_object, temperature, cloud_density) -> typing.Tuple[int, int, int]:
     precipitation_code = 0
+    wx_codes = _wx_codes(weather_object)
     for phenomenon in WEATHER_PHENOMENONS:
-        for indicator in phenomenon.indicators:
-            if any(indicator in other for other in weather_object.metar_data.other):
-                precipitation_code = phenomenon.precipitation_code
-                LOGGER.warning('%s reported in the area', phenomenon.name)
-                if phenomenon.min_temp is not None and temperature < phenomenon.min_temp:
-                    LOGGER.warning('forcing temperature to %s due to %s', phenomenon.min_temp, phenomenon.name)
-                    temperature = phenomenon.min_temp
-                if phenomenon.max_temp is not None and temperature > phenomenon.max_temp:
-                    LOGGER.warning('forcing temperature to %s due to %s', phenomenon.max_temp, phenomenon.name)
-                    temperature = phenomenon.max_temp
-                if cloud_density < phenomenon.min_cloud_density:
-                    LOGGER.warning('forcing cloud density to %s due to %s',
-                                   phenomenon.min_cloud_density, phenomenon.name)
-                    cloud_density = phenomenon.min_cloud_density
-                break
+        if phenomenon.indicators.isdisjoint(wx_codes):
+            continue
+        precipitation_code = phenomenon.precipitation_code
+        LOGGER.warning('%s reported in the area', phenomenon.name)
+        if phenomenon.min_temp is not None and temperature < phenomenon.min_temp:
+            LOGGER.warning('forcing temperature to %s due to %s', phenomenon.min_temp, phenomenon.name)
+            temperature = phenomenon.min_temp
+        if phenomenon.max_temp is not None and temperature > phenomenon.max_temp:
+            LOGGER.warning('forcing temperature to %s due to %s', phenomenon.max_temp, phenomenon.name)
+            temperature = phenomenon.max_temp
+        if cloud_density < phenomenon.min_cloud_density:
+            LOGGER.warning('forcing cloud density to %s due to %s',
+                           phenomenon.min_cloud_density, phenomenon.name)
+            cloud_density = phenomenon.min_cloud_density
 
     return precipitation_code, temperature, cloud_density
 
 
-def generate_dcs_weather(weather_object: WeatherABC) -> DCSWeather:  # pylint: disable=too-many-locals
+def generate_dcs_weather(weather_object: WeatherABC,  # pylint: disable=too-many-locals
+                         rng: typing.Optional[random.Random] = None,
+                         ) -> DCSWeather:
     """
     Creates a DCSWeather from a Weather object.
 
     All DCS specific constraints regarding the different values are enforced
 
+    If "rng" isn't given, a new generator is created from the seed of the weather object, so that a seeded
+    weather object always yields the same DCSWeather.
+
+    :param weather_object: source weather object
+    :type weather_object: WeatherABC
+    :param rng: optional random number generator
+    :type rng: random.Random
     :return: a valid DCSWeather object
     :rtype: DCSWeather
     """
     if weather_object.original_dcs_weather is not None:
         return weather_object.original_dcs_weather
+    if rng is None:
+        rng = weather_object.make_rng()
 
     altimeter = DCSWeather.normalize_altimeter(weather_object.altimeter.value('mmhg'))
     temperature = DCSWeather.normalize_temperature(weather_object.temperature.value('c'))
 
     wind_ground_speed, wind_ground_dir, turbulence = _make_ground_wind(weather_object)
-    wind_2000_speed, wind_2000_dir, wind_8000_speed, wind_8000_dir = _make_wind_in_altitude(weather_object)
+    wind_2000_speed, wind_2000_dir, wind_8000_speed, wind_8000_dir = _make_wind_in_altitude(weather_object, rng)
     fog_enabled, fog_thickness, fog_visibility = _make_fog(weather_object)
     dust_enabled, dust_density = _make_dust(weather_object)
-    cloud_base, cloud_density, cloud_thickness = _make_clouds(weather_object)
+    cloud_base, cloud_density, cloud_thickness = _make_clouds(weather_object, rng)
     precipitation_code, temperature, cloud_density = _make_precipitations(weather_object,
                                                                           temperature,
                                                                           cloud_density,
@@ -201,5 +232,126 @@ def generate_dcs_weather(weather_object: WeatherABC) -> DCSWeather:  # pylint: d
 
     _local_data = dict(**locals())
     del _local_data['weather_object']
+    del _local_data['rng']
     _data = {key: _local_data[key] for key in _local_data.keys() if not key.startswith('_')}
     return DCSWeather(**_data)
+
+
+def generate_dcs_weather_ensemble(weather_object: WeatherABC,  # pylint: disable=too-many-locals
+                                  n: int,
+                                  seed: typing.Optional[int] = None,
+                                  ) -> typing.List[DCSWeather]:
+    """
+    Creates "n" randomized DCSWeather variants from a single Weather object.
+
+    Everything that doesn't depend on random values (altimeter, ground wind, fog, dust, weather phenomenons, ...)
+    is computed only once; winds aloft and cloud coverage are then sampled for all variants at once.
+
+    :param weather_object: source weather object
+    :type weather_object: WeatherABC
+    :param n: number of variants to create
+    :type n: int
+    :param seed: optional seed (defaults to the seed of the weather object)
+    :type seed: int
+    :return: list of valid DCSWeather objects
+    :rtype: list of DCSWeather
+    """
+    if weather_object.original_dcs_weather is not None:
+        return [dataclasses.replace(weather_object.original_dcs_weather) for _ in range(n)]
+    rng = weather_object.make_rng() if seed is None else random.Random(seed)
+
+    altimeter = DCSWeather.normalize_altimeter(weather_object.altimeter.value('mmhg'))
+    temperature = DCSWeather.normalize_temperature(weather_object.temperature.value('c'))
+    wind_ground_speed, wind_ground_dir, turbulence = _make_ground_wind(weather_object)
+    fog_enabled, fog_thickness, fog_visibility = _make_fog(weather_object)
+    dust_enabled, dust_density = _make_dust(weather_object)
+    # Phenomenons only ever raise the cloud density, so the minimal density can be computed once
+    precipitation_code, temperature, min_cloud_density = _make_precipitations(weather_object, temperature, 0)
+
+    wind_speed, wind_direction = weather_object.wind_speed, weather_object.wind_direction
+    wind_2000_speeds = [DCSWeather.normalize_wind_speed(wind_speed.randomize_at_2000m(rng).value(),
+                                                        'wind speed at 2000 meters')
+                        for _ in range(n)]
+    wind_2000_dirs = [wind_direction.randomize_at_2000m(rng).reverse().value() for _ in range(n)]
+    wind_8000_speeds = [DCSWeather.normalize_wind_speed(wind_speed.randomize_at_8000m(rng).value(),
+                                                        'wind speed at 8000 meters')
+                        for _ in range(n)]
+    wind_8000_dirs = [wind_direction.randomize_at_8000m(rng).reverse().value() for _ in range(n)]
+    coverages = [[rng.randint(*CLOUD_METAR_TO_DCS[layer.type]) for _ in range(n)]  # nosec
+                 for layer in weather_object.cloud_layers]
+
+    result = []
+    for index in range(n):
+        _density, _layer_in_use = 0, None
+        for _layer, _layer_coverages in zip(weather_object.cloud_layers, coverages):
+            if _layer_coverages[index] > _density:
+                _density, _layer_in_use = _layer_coverages[index], _layer
+        cloud_base, cloud_density, cloud_thickness = _make_cloud_layer(weather_object, _layer_in_use, _density, rng)
+        result.append(DCSWeather(
+            altimeter=altimeter,
+            turbulence=turbulence,
+            temperature=temperature,
+            wind_ground_speed=wind_ground_speed,
+            wind_ground_dir=wind_ground_dir,
+            wind_2000_speed=wind_2000_speeds[index],
+            wind_2000_dir=wind_2000_dirs[index],
+            wind_8000_speed=wind_8000_speeds[index],
+            wind_8000_dir=wind_8000_dirs[index],
+            precipitation_code=precipitation_code,
+            cloud_density=max(cloud_density, min_cloud_density),
+            cloud_base=cloud_base,
+            cloud_thickness=cloud_thickness,
+            fog_enabled=fog_enabled,
+            fog_visibility=fog_visibility,
+            fog_thickness=fog_thickness,
+            dust_enabled=dust_enabled,
+            dust_density=dust_density,
+        ))
+    return result
+
+
+def make_cache_key(weather_object: WeatherABC) -> tuple:
+    """
+    Builds a key out of every value of a Weather object that is used to generate a DCSWeather
+
+    Two weather objects with the same key always generate the same DCSWeather (given the same seed).
+
+    :param weather_object: source weather object
+    :type weather_object: WeatherABC
+    :return: cache key
+    :rtype: tuple
+    """
+    return (
+        weather_object.seed,
+        weather_object.altimeter.value('mmhg'),
+        weather_object.temperature.value('c'),
+        weather_object.wind_speed.value(),
+        weather_object.wind_gust.value(),
+        weather_object.wind_direction.value(),
+        weather_object.visibility.value(),
+        tuple((layer.type, layer.altitude) for layer in weather_object.cloud_layers),
+        tuple(weather_object.other),
+        weather_object.metar_units.altitude,
+    )
+
+
+def generate_cached_dcs_weather(weather_object: WeatherABC) -> DCSWeather:
+    """
+    Creates a DCSWeather from a Weather object, re-using the last generated one if none of its inputs changed
+
+    :param weather_object: source weather object
+    :type weather_object: WeatherABC
+    :return: a valid DCSWeather object
+    :rtype: DCSWeather
+    """
+    if weather_object.original_dcs_weather is not None:
+        return weather_object.original_dcs_weather
+    # pylint: disable=protected-access
+    cache = weather_object._dcs_weather_cache
+    if cache is not None and cache[0] == make_cache_key(weather_object):
+        LOGGER.debug('re-using cached DCS weather')
+        return cache[1]
+    dcs_weather = generate_dcs_weather(weather_object)
+    # The key is computed after generation since a gusty, windless ground wind gets a 1 m/s speed in the process
+    weather_object._dcs_weather_cache = (make_cache_key(weather_object), dcs_weather)
+    return dcs_weather
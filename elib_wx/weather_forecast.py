@@ -0,0 +1,255 @@
+# coding=utf-8
+"""
+Time series of the prevailing weather forecast by a TAF
+
+Each forecast period (initial forecast, "FM" and "BECMG" groups) is resolved once, carrying forward whatever a
+group does not change, so that the weather at any instant of the TAF validity is found by bisection and turned into
+a Weather (or DCSWeather) object without parsing the report again.
+
+TEMPO, INTER and PROB groups describe temporary conditions and do not change the prevailing weather. Changes
+announced by a BECMG group are applied from the start of the group.
+"""
+import bisect
+import datetime
+import typing
+
+import dataclasses
+
+from elib_wx import avwx
+from elib_wx.avwx.structs import Cloud, MetarData, Number, TafData, TafLineData, Timestamp, Units
+from elib_wx.weather import Weather
+from elib_wx.weather_dcs import DCSWeather
+
+# tokens that clear the cloud layers of the previous period
+_SKY_CLEAR = ('SKC', 'NSC', 'CLR', 'CAVOK')
+
+
+@dataclasses.dataclass
+class ForecastPeriod:  # pylint: disable=too-many-instance-attributes
+    """
+    Prevailing weather over a period of a TAF, with the values carried forward from the previous periods
+
+    "end_time" is None if the TAF does not give one for its last period.
+    """
+    start_time: datetime.datetime
+    end_time: typing.Optional[datetime.datetime]
+    line: TafLineData
+    altimeter: typing.Optional[Number]
+    wind_direction: typing.Optional[Number]
+    wind_speed: typing.Optional[Number]
+    wind_gust: typing.Optional[Number]
+    visibility: typing.Optional[Number]
+    clouds: typing.List[Cloud]
+    other: typing.List[str]
+    sky_clear: str = ''
+
+    @property
+    def flight_rules(self) -> str:
+        """
+        :return: flight rules for the resolved visibility and clouds
+        :rtype: str
+        """
+        ceiling = avwx.core.get_ceiling(self.clouds)
+        return avwx.static.FLIGHT_RULES[avwx.core.get_flight_rules(self.visibility, ceiling)]
+
+    def as_metar_str(self, units: Units) -> str:
+        """
+        Builds the METAR body (without station and time) matching this period
+
+        :param units: units of the TAF
+        :type units: Units
+        :return: METAR body
+        :rtype: str
+        """
+        result = []
+        if self.wind_speed:
+            wind_direction = self.wind_direction.repr if self.wind_direction else '///'
+            wind_gust = f'G{self.wind_gust.repr}' if self.wind_gust else ''
+            result.append(f'{wind_direction}{self.wind_speed.repr}{wind_gust}{units.wind_speed.upper()}')
+        if self.visibility:
+            if self.visibility.repr != 'CAVOK' and units.visibility == 'sm':
+                result.append(f'{self.visibility.repr}SM')
+            else:
+                result.append(self.visibility.repr)
+        result.extend(self.other)
+        result.extend(cloud.repr for cloud in self.clouds)
+        if self.sky_clear and self.sky_clear != 'CAVOK':
+            result.append(self.sky_clear)
+        if self.altimeter:
+            result.append(('A' if units.altimeter == 'inHg' else 'Q') + self.altimeter.repr)
+        return ' '.join(result)
+
+
+def _is_temporary(line: TafLineData) -> bool:
+    return line.type in ('TEMPO', 'INTER') or line.type.startswith('PROB') or line.probability is not None
+
+
+def _resolve_period(line: TafLineData, previous: typing.Optional[ForecastPeriod]) -> ForecastPeriod:
+    tokens = line.sanitized.split()
+    sky_clear = next((token for token in tokens if token in _SKY_CLEAR), '')
+    if previous is None or line.type == 'FROM':
+        # a new forecast replaces the significant weather
+        other = [item for item in line.other if item != 'NSW']
+    elif 'NSW' in line.other:
+        other = [item for item in line.other if item != 'NSW']
+    else:
+        other = list(line.other) or list(previous.other)
+    if line.clouds or sky_clear or previous is None:
+        clouds = list(line.clouds)
+    else:
+        clouds, sky_clear = list(previous.clouds), previous.sky_clear
+    return ForecastPeriod(
+        start_time=line.start_time.dt,
+        end_time=None,
+        line=line,
+        altimeter=line.altimeter or (previous.altimeter if previous else None),
+        wind_direction=line.wind_direction or (previous.wind_direction if previous else None),
+        wind_speed=line.wind_speed or (previous.wind_speed if previous else None),
+        wind_gust=line.wind_gust if line.wind_speed else (previous.wind_gust if previous else None),
+        visibility=line.visibility or (previous.visibility if previous else None),
+        clouds=clouds,
+        other=other,
+        sky_clear=sky_clear,
+    )
+
+
+class ForecastTimeline:
+    """
+    Prevailing weather forecast by a TAF, queried by time (naive datetime, UTC)
+
+    Periods are resolved once when the timeline is created; queries are O(log n) in the number of periods.
+    """
+
+    def __init__(self, taf_data: TafData, taf_units: Units) -> None:
+        self.taf_data = taf_data
+        self.taf_units = taf_units
+        self.start_time: typing.Optional[datetime.datetime] = taf_data.start_time.dt if taf_data.start_time else None
+        self.end_time: typing.Optional[datetime.datetime] = taf_data.end_time.dt if taf_data.end_time else None
+        self.periods: typing.List[ForecastPeriod] = []
+        for line in taf_data.forecast:
+            if _is_temporary(line) or not line.start_time:
+                continue
+            previous = self.periods[-1] if self.periods else None
+            period = _resolve_period(line, previous)
+            if previous is not None:
+                if period.start_time < previous.start_time:
+                    continue
+                previous.end_time = period.start_time
+            self.periods.append(period)
+        if self.periods:
+            self.periods[-1].end_time = self.end_time
+            if self.start_time is None:
+                self.start_time = self.periods[0].start_time
+        self._start_times = [period.start_time for period in self.periods]
+
+    @classmethod
+    def from_taf_str(cls,
+                     taf_str: str,
+                     reference_time: typing.Optional[datetime.datetime] = None,
+                     ) -> 'ForecastTimeline':
+        """
+        Parses a raw TAF and creates its timeline
+
+        :param taf_str: raw TAF
+        :type taf_str: str
+        :param reference_time: time the TAF timestamps are relative to (naive, UTC; defaults to now)
+        :type reference_time: datetime.datetime
+        :return: forecast timeline
+        :rtype: ForecastTimeline
+        """
+        station = taf_str
+        while station[:4] in ('TAF ', 'AMD ', 'COR '):
+            station = station[4:]
+        taf_data, taf_units = avwx.taf.parse(station[:4], taf_str, reference_time)
+        return cls(taf_data, taf_units)
+
+    def period_at(self, time: datetime.datetime) -> ForecastPeriod:
+        """
+        :param time: instant to look up (naive, UTC)
+        :type time: datetime.datetime
+        :return: forecast period the instant belongs to
+        :rtype: ForecastPeriod
+        :raises ValueError: if the instant is outside of the TAF validity
+        """
+        index = bisect.bisect_right(self._start_times, time) - 1
+        if index < 0 or (self.end_time is not None and time >= self.end_time):
+            raise ValueError(f'{time} is outside of the forecast validity ({self.start_time} to {self.end_time})')
+        return self.periods[index]
+
+    def metar_data_at(self, time: datetime.datetime) -> MetarData:
+        """
+        Builds the METAR data matching the forecast at a given instant
+
+        Temperature and dew point are not part of the forecast periods, and are left empty.
+
+        :param time: instant to look up (naive, UTC)
+        :type time: datetime.datetime
+        :return: METAR data
+        :rtype: MetarData
+        :raises ValueError: if the instant is outside of the TAF validity
+        """
+        period = self.period_at(time)
+        timestamp = Timestamp(time.strftime('%d%H%MZ'), time)
+        station = self.taf_data.station
+        raw = ' '.join(item for item in (station, timestamp.repr, period.as_metar_str(self.taf_units)) if item)
+        return MetarData(
+            raw=raw,
+            remarks='',
+            station=station,
+            time=timestamp,
+            altimeter=period.altimeter,
+            clouds=list(period.clouds),
+            flight_rules=period.flight_rules,
+            other=list(period.other),
+            sanitized=raw,
+            visibility=period.visibility,
+            wind_direction=period.wind_direction,
+            wind_gust=period.wind_gust,
+            wind_speed=period.wind_speed,
+            dewpoint=None,  # type: ignore
+            remarks_info=None,  # type: ignore
+            runway_visibility=[],
+            temperature=None,  # type: ignore
+            wind_variable_direction=[],
+        )
+
+    def weather_at(self,
+                   time: datetime.datetime,
+                   *,
+                   seed: typing.Optional[int] = None,
+                   cache_dcs_weather: bool = False,
+                   ) -> Weather:
+        """
+        Creates a Weather object for the forecast at a given instant
+
+        Values missing from the forecast (temperature, dew point, ...) are randomized as for a METAR.
+
+        :param time: instant to look up (naive, UTC)
+        :type time: datetime.datetime
+        :param seed: optional seed for the randomized values
+        :type seed: int
+        :param cache_dcs_weather: cache the generated DCSWeather (see Weather.generate_dcs_weather)
+        :type cache_dcs_weather: bool
+        :return: weather at the given instant
+        :rtype: Weather
+        :raises ValueError: if the instant is outside of the TAF validity
+        """
+        return Weather.from_metar_data(self.metar_data_at(time),
+                                       dataclasses.replace(self.taf_units),
+                                       source_type='TAF',
+                                       seed=seed,
+                                       cache_dcs_weather=cache_dcs_weather)
+
+    def dcs_weather_at(self, time: datetime.datetime, *, seed: typing.Optional[int] = None) -> DCSWeather:
+        """
+        Creates a DCSWeather object for the forecast at a given instant, e.g. a mission start time
+
+        :param time: instant to look up (naive, UTC)
+        :type time: datetime.datetime
+        :param seed: optional seed for the randomized values
+        :type seed: int
+        :return: DCS weather at the given instant
+        :rtype: DCSWeather
+        :raises ValueError: if the instant is outside of the TAF validity
+        """
+        return self.weather_at(time, seed=seed).generate_dcs_weather()
@@ -3,7 +3,7 @@
 Creates a Weather object from a given ICAO
 """
 
-from elib_wx import LOGGER, avwx
+from elib_wx import LOGGER, negative_cache, report_cache
 from elib_wx.weather_abc import WeatherABC
 
 
@@ -17,7 +17,11 @@ def weather_from_icao(weather_object: WeatherABC):
     LOGGER.debug('building Weather from ICAO code')
     weather_object.source_type = 'ICAO'
     weather_object.station_icao = weather_object.source.upper()
-    weather_object.raw_metar_str = avwx.metar.fetch(weather_object.station_icao)
-    weather_object.metar_data, weather_object.metar_units = avwx.metar.parse(weather_object.station_icao,
-                                                                             weather_object.raw_metar_str)
+    if weather_object.lazy:
+        LOGGER.debug('lazy mode: METAR will be fetched on first access')
+        return
+    weather_object.raw_metar_str = negative_cache.NEGATIVE_CACHE.fetch_metar(weather_object.station_icao)
+    weather_object.metar_data, weather_object.metar_units = report_cache.REPORT_CACHE.parse(
+        weather_object.station_icao, weather_object.raw_metar_str, weather_object.reference_time
+    )
     weather_object.fill_from_metar_data()
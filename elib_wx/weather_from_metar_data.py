@@ -3,6 +3,9 @@
 Builds a Weather object from METAR data as parsed by AVWX
 """
 import random
+import typing
+
+import dataclasses
 
 from elib_wx import (
     LOGGER,
@@ -14,22 +17,22 @@ from elib_wx.values.value import (
 from elib_wx.weather_abc import WeatherABC
 
 
-def _make_altimeter(weather_object):
+def _make_altimeter(weather_object, rng: random.Random):
     if not weather_object.metar_data.altimeter:
         LOGGER.warning('no altimeter data found in METAR, using triangular randomized pressure '
                        '(low=720, high=790, mode= 760) [mmHg]')
-        weather_object.altimeter = Pressure(int(random.triangular(720, 790, mode=760)))  # nosec
+        weather_object.altimeter = Pressure(int(rng.triangular(720, 790, mode=760)))  # nosec
     else:
         weather_object.altimeter = Pressure(weather_object.metar_data.altimeter.value,
                                             weather_object.metar_units.altimeter)
 
 
-def _make_visibility(weather_object):
+def _make_visibility(weather_object, rng: random.Random):
     if not weather_object.metar_data.visibility:
         LOGGER.warning('no visibility data found in METAR, using triangular randomized visibility '
                        '(low=2000, high=20000, mode= 15000) [meters]')
         weather_object.visibility = Visibility(
-            min((round(int(random.triangular(2000, 20000, mode=15000)), -2), 9999)))  # nosec
+            min((round(int(rng.triangular(2000, 20000, mode=15000)), -2), 9999)))  # nosec
     else:
         if weather_object.metar_data.visibility.repr == 'P6':
             weather_object.visibility = Visibility(9999, 'm')
@@ -40,43 +43,46 @@ def _make_visibility(weather_object):
                                                    weather_object.metar_units.visibility)
 
 
-def _make_temperature(weather_object):
+def _make_temperature(weather_object, rng: random.Random):
     if weather_object.metar_data.temperature:
         weather_object.temperature = Temperature(weather_object.metar_data.temperature.value,
                                                  weather_object.metar_units.temperature)
     else:
         LOGGER.warning('no temperature value found in METAR, using triangular randomized temperature '
                        '(low=-10, high=40, mode= 18) [degrees Celsius]')
-        weather_object.temperature = Temperature(round(int(random.triangular(-10, 40, mode=18)), 0), 'c')  # nosec
+        weather_object.temperature = Temperature(round(int(rng.triangular(-10, 40, mode=18)), 0), 'c')  # nosec
 
 
-def _make_dew_point(weather_object):
+def _make_dew_point(weather_object, rng: random.Random):
     if weather_object.metar_data.dewpoint:
         weather_object.dew_point = Temperature(weather_object.metar_data.dewpoint.value,
                                                weather_object.metar_units.temperature)
     else:
         LOGGER.warning('no dew point data found in METAR, creating dummy dew point from temperature')
-        weather_object.dew_point = weather_object.temperature.make_dummy_dew_point()
+        weather_object.dew_point = weather_object.temperature.make_dummy_dew_point(rng)
 
 
-def _make_wind(weather_object):
+def _make_wind(weather_object, rng: random.Random):
     if not weather_object.metar_data.wind_speed:
         LOGGER.warning('no wind speed data found in METAR, using triangular randomized wind speed '
                        '(low=0, high=25, mode= 7) [knots]')
-        weather_object.wind_speed = WindSpeed(random.triangular(0, 25, mode=7), 'kt')  # nosec
+        weather_object.wind_speed = WindSpeed(rng.triangular(0, 25, mode=7), 'kt')  # nosec
     else:
         weather_object.wind_speed = WindSpeed(weather_object.metar_data.wind_speed.value,
                                               weather_object.metar_units.wind_speed)
     if not weather_object.metar_data.wind_direction:
         LOGGER.warning('no wind direction data found in METAR, using random wind direction'
                        '(between 0 and 359) [degrees]')
-        weather_object.wind_direction = WindDirection(random.randint(0, 359))  # nosec
+        weather_object.wind_direction_is_variable = False
+        weather_object.wind_direction = WindDirection(rng.randint(0, 359))  # nosec
     else:
-        if weather_object.metar_data.wind_direction.repr == 'VRB':
-            weather_object.wind_direction_is_variable = True
-        weather_object.wind_direction = WindDirection(weather_object.metar_data.wind_direction.value)
+        weather_object.wind_direction_is_variable = weather_object.metar_data.wind_direction.repr == 'VRB'
+        _wind_direction = weather_object.metar_data.wind_direction.value
+        if _wind_direction is None:
+            _wind_direction = WindDirection.random_value(rng)
+        weather_object.wind_direction = WindDirection(_wind_direction)
     weather_object.wind_direction_range = [
-        WindDirection(wind_dir.value)
+        WindDirection(wind_dir.value, rng=rng)
         for wind_dir in weather_object.metar_data.wind_variable_direction
     ]
     if weather_object.metar_data.wind_gust:
@@ -86,25 +92,51 @@ def _make_wind(weather_object):
         weather_object.wind_gust = WindSpeed(0)
 
 
-def weather_from_metar_data(weather_object: WeatherABC):
+def has_randomized_values(metar_data) -> bool:
+    """
+    Checks whether building a Weather object from this METAR data requires randomizing missing values
+
+    :param metar_data: METAR data as parsed by AVWX
+    :type metar_data: MetarData
+    :return: True if at least one value is randomized
+    :rtype: bool
+    """
+    return not (metar_data.altimeter and
+                metar_data.visibility and
+                metar_data.temperature and
+                metar_data.dewpoint and
+                metar_data.wind_speed and
+                metar_data.wind_direction and
+                metar_data.wind_direction.value is not None)
+
+
+def weather_from_metar_data(weather_object: WeatherABC, rng: typing.Optional[random.Random] = None):
     """
     Builds a Weather object from METAR data as parsed by AVWX
 
+    Missing values are randomized using "rng"; if it isn't given, a new generator is created from the seed
+    of the weather object.
+
     :param weather_object: weather object to build
     :type weather_object: WeatherABC
+    :param rng: optional random number generator
+    :type rng: random.Random
     """
+    if rng is None:
+        rng = weather_object.make_rng()
     LOGGER.debug('creating weather object based on METAR data')
     LOGGER.debug('METAR data: %s', weather_object.metar_data)
     LOGGER.debug('METAR units: %s', weather_object.metar_units)
 
-    _make_altimeter(weather_object)
-    _make_visibility(weather_object)
-    weather_object.cloud_layers = [cloud_layer for cloud_layer in weather_object.metar_data.clouds]
-    _make_temperature(weather_object)
-    _make_dew_point(weather_object)
-    _make_wind(weather_object)
+    _make_altimeter(weather_object, rng)
+    _make_visibility(weather_object, rng)
+    # METAR data may be shared through the report cache, so mutable values are copied
+    weather_object.cloud_layers = [dataclasses.replace(cloud_layer) for cloud_layer in weather_object.metar_data.clouds]
+    _make_temperature(weather_object, rng)
+    _make_dew_point(weather_object, rng)
+    _make_wind(weather_object, rng)
 
     weather_object.date_time = weather_object.metar_data.time
-    weather_object.other = weather_object.metar_data.other
+    weather_object.other = list(weather_object.metar_data.other)
     weather_object.remarks = weather_object.metar_data.remarks
-    LOGGER.debug('resulting weather object: %s', repr(weather_object))  # pylint: disable=possibly-unused-variable
+    LOGGER.debug('resulting weather object: %r', weather_object)
@@ -3,7 +3,7 @@
 Creates a Weather object from a METAR string
 """
 
-from elib_wx import LOGGER, avwx, utils
+from elib_wx import LOGGER, report_cache, utils
 from elib_wx.weather_abc import WeatherABC
 
 
@@ -20,6 +20,10 @@ def weather_from_metar_string(weather_object: WeatherABC):
     weather_object.station_icao = utils.extract_station_from_metar_str(weather_object.source)
     LOGGER.debug('station: %s', weather_object.station_icao)
     weather_object.raw_metar_str = weather_object.source
-    weather_object.metar_data, weather_object.metar_units = avwx.metar.parse(weather_object.station_icao,
-                                                                             weather_object.raw_metar_str)
+    if weather_object.lazy:
+        LOGGER.debug('lazy mode: METAR will be parsed on first access')
+        return
+    weather_object.metar_data, weather_object.metar_units = report_cache.REPORT_CACHE.parse(
+        weather_object.station_icao, weather_object.raw_metar_str, weather_object.reference_time
+    )
     weather_object.fill_from_metar_data()
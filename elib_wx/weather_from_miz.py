@@ -158,7 +158,7 @@ def weather_from_miz_file(weather_object: WeatherABC):
     LOGGER.debug('inferred visibility: %s', weather_object.visibility)
     weather_object.temperature = Temperature(mission_weather.temperature, 'c')
     LOGGER.debug('inferred temperature: %s', weather_object.temperature)
-    weather_object.dew_point = weather_object.temperature.make_dummy_dew_point()
+    weather_object.dew_point = weather_object.temperature.make_dummy_dew_point(weather_object.make_rng())
     LOGGER.debug('inferred dew point: %s', weather_object.dew_point)
 
     _make_turbulence(weather_object, mission_weather)
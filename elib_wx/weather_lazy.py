@@ -0,0 +1,101 @@
+# coding=utf-8
+"""
+Computes the derived fields of a lazy Weather object on first access
+
+In lazy mode, a Weather object only stores its source, station ICAO and (for METAR sources) raw METAR string at
+creation time. Everything else (fetching, parsing, building values, resolving the station name) is deferred until
+the corresponding attribute is first read, and the result is then cached on the instance.
+"""
+import typing
+
+from elib_wx import LOGGER, airports_db, negative_cache, report_cache
+from elib_wx.weather_abc import WeatherABC
+
+LAZY_SOURCE_TYPES = ('ICAO', 'METAR')
+
+
+def _is_lazy(weather_object: WeatherABC) -> bool:
+    return weather_object.lazy and getattr(weather_object, 'source_type', None) in LAZY_SOURCE_TYPES
+
+
+def load_station_name(weather_object: WeatherABC):
+    """
+    Resolves the station name from the ICAO code
+
+    :param weather_object: weather object to fill
+    :type weather_object: WeatherABC
+    """
+    if weather_object.lazy:
+        LOGGER.debug('lazy: resolving station name')
+        weather_object.station_name = airports_db.get_airport_name_from_icao(weather_object.station_icao)
+
+
+def load_raw_metar_str(weather_object: WeatherABC):
+    """
+    Fetches the METAR for weather objects created from an ICAO code
+
+    :param weather_object: weather object to fill
+    :type weather_object: WeatherABC
+    """
+    if _is_lazy(weather_object) and weather_object.source_type == 'ICAO':
+        LOGGER.debug('lazy: fetching METAR')
+        weather_object.raw_metar_str = negative_cache.NEGATIVE_CACHE.fetch_metar(weather_object.station_icao)
+
+
+def load_metar_data(weather_object: WeatherABC):
+    """
+    Parses the raw METAR string
+
+    :param weather_object: weather object to fill
+    :type weather_object: WeatherABC
+    """
+    if _is_lazy(weather_object):
+        LOGGER.debug('lazy: parsing METAR')
+        weather_object.metar_data, weather_object.metar_units = report_cache.REPORT_CACHE.parse(
+            weather_object.station_icao, weather_object.raw_metar_str, weather_object.reference_time
+        )
+
+
+def load_values(weather_object: WeatherABC):
+    """
+    Builds all values (altimeter, wind, clouds, ...) from the parsed METAR data
+
+    Values are built all at once, so that seeded weather objects get the same values whether they are lazy or not.
+
+    :param weather_object: weather object to fill
+    :type weather_object: WeatherABC
+    """
+    if _is_lazy(weather_object):
+        LOGGER.debug('lazy: building values from METAR data')
+        weather_object.fill_from_metar_data()
+
+
+class LazyField:
+    """
+    Descriptor for a Weather field that is computed on first access
+
+    This is a non-data descriptor: once the loader has stored the value in the instance dictionary, regular
+    attribute lookup finds it there and the descriptor isn't called anymore.
+    """
+
+    def __init__(self, loader: typing.Callable[[WeatherABC], None]) -> None:
+        self.loader = loader
+        self.name: str = ''
+
+    def __set_name__(self, owner, name: str):
+        self.name = name
+
+    def __get__(self, instance, owner):
+        if instance is None:
+            return self
+        self.loader(instance)
+        try:
+            return instance.__dict__[self.name]
+        except KeyError:
+            pass
+        # fall back to the default value of the field, if any
+        for klass in owner.__mro__:
+            default = klass.__dict__.get(self.name, self)
+            if not isinstance(default, LazyField):
+                return default
+        raise AttributeError(self.name)
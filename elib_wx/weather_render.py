@@ -0,0 +1,411 @@
+# coding=utf-8
+"""
+Renders a Weather object as a readable/speakable string in a single pass
+
+The texts of all sections are defined here (elib_wx.weather_translate translates single sections through this
+module). Values used while rendering (CAVOK status, wind and visibility values, flags of the raw METAR string, date
+parts, remarks groups) are derived once per rendering, and the sections are written into one buffer.
+"""
+import concurrent.futures
+import threading
+import typing
+
+from elib_wx import LOGGER, avwx, static, utils
+from elib_wx.values.value import Altitude
+from elib_wx.weather_abc import WeatherABC
+from elib_wx.weather_segment import Segment
+
+
+def _remark_groups(weather_object) -> typing.List[avwx.structs.RemarkGroup]:
+    # re-use groups decoded while parsing the METAR, unless the remarks have been changed since
+    metar_data = getattr(weather_object, 'metar_data', None)
+    remarks_info = getattr(metar_data, 'remarks_info', None)
+    if isinstance(remarks_info, avwx.structs.RemarksData) and metar_data.remarks == weather_object.remarks:
+        return remarks_info.groups
+    return avwx.remarks.decode(str(weather_object.remarks))
+
+
+class _RenderState:  # pylint: disable=too-many-instance-attributes,too-few-public-methods
+    """
+    Values derived once per rendering from a Weather object, shared by the sections
+    """
+    __slots__ = (
+        'weather_object', 'spoken', 'is_cavok', 'wind_speed', 'wind_gust', 'visibility', 'is_nsc', 'is_clear',
+        'is_nosig',
+    )
+
+    def __init__(self, weather_object: WeatherABC, spoken: bool) -> None:
+        self.weather_object = weather_object
+        self.spoken = spoken
+        self.is_cavok = weather_object.is_cavok
+        self.wind_speed = weather_object.wind_speed.value()
+        self.wind_gust = weather_object.wind_gust.value()
+        self.visibility = weather_object.visibility.value()
+        raw_metar_str = weather_object.raw_metar_str
+        self.is_nsc = ' NSC ' in raw_metar_str
+        self.is_clear = ' CLR ' in raw_metar_str or ' SKC ' in raw_metar_str
+        self.is_nosig = 'NOSIG' in raw_metar_str
+
+
+def _intro(state: _RenderState) -> str:
+    station_name = state.weather_object.station_name
+    date_time = state.weather_object.date_time.dt
+    if not date_time:
+        return f'Weather for {station_name}.'
+    day_name, day_date, month, time = date_time.strftime('%A|%d|%B|%H%M').split('|')
+    day_date = utils.num_to_ordinal(day_date)
+    if state.spoken:
+        day_date = utils.num_to_words(day_date, group=0)
+        time = utils.num_to_words(time)
+    return f'Weather for {station_name} on {day_name} the {day_date} of {month} at {time} zulu.'
+
+
+def _wind(state: _RenderState) -> str:
+    if state.wind_speed == 0:
+        return 'Wind calm.'
+    weather_object, spoken = state.weather_object, state.spoken
+    if weather_object.wind_direction_is_variable:
+        wind_dir = 'variable'
+    else:
+        wind_dir = weather_object.wind_direction.to_string(spoken=spoken)
+    wind_direction_range = weather_object.wind_direction_range
+    if wind_direction_range and isinstance(wind_direction_range, list):
+        var1 = wind_direction_range[0].to_string(spoken=spoken)
+        var2 = wind_direction_range[1].to_string(spoken=spoken)
+        wind_dir += f' (variable {var1} to {var2})'
+    wind_speed = weather_object.wind_speed.to_string(unit='kt', spoken=spoken)
+    if state.wind_gust > 0:
+        gust_speed = weather_object.wind_gust.to_string(unit='kt', spoken=spoken)
+        wind_speed += f' (gusting {gust_speed} knots)'
+    return f'Wind {wind_dir} {wind_speed}.'
+
+
+def _visibility(state: _RenderState) -> str:
+    spoken = state.spoken
+    if state.is_cavok:
+        return 'cavok.' if spoken else 'CAVOK.'
+    if state.visibility >= 9999:
+        if spoken:
+            return 'Visibility ten kilometers or more, ten miles or more.'
+        return 'Visibility 10km or more, 10SM or more.'
+    visibility_object = state.weather_object.visibility
+    if not spoken:
+        return f'Visibility {visibility_object.to_string(all_units=True)}.'
+    m_val = visibility_object.value('m')
+    if m_val % 1000 == 0:
+        value_as_str_meters = utils.num_to_words(int(m_val / 1000), group=0) + ' kilometers'
+    else:
+        value_as_str_meters = utils.num_to_words(m_val, group=0) + ' meters'
+    value_as_str_miles = utils.num_to_words(visibility_object.value('sm'), group=0) + ' miles'
+    return f'Visibility {value_as_str_meters}, {value_as_str_miles}.'
+
+
+def _temperature(state: _RenderState) -> str:
+    return f'Temperature {state.weather_object.temperature.to_string(spoken=state.spoken, all_units=True)}.'
+
+
+def _dew_point(state: _RenderState) -> str:
+    return f'Dew point {state.weather_object.dew_point.to_string(spoken=state.spoken, all_units=True)}.'
+
+
+def _altimeter(state: _RenderState) -> str:
+    return f'Altimeter {state.weather_object.altimeter.to_string(spoken=state.spoken, all_units=True)}.'
+
+
+def _other(state: _RenderState) -> str:
+    other = avwx.speech.other(state.weather_object.other)
+    if other:
+        return other + '.'
+    return ''
+
+
+def _cloud_layer(cloud: avwx.structs.Cloud, altitude_unit: str, spoken: bool) -> typing.Optional[str]:
+    if cloud.altitude is None:
+        LOGGER.warning('no altitude given, skipping cloud layer: %s', cloud.repr)
+        return None
+    cloud_str = static.CLOUD_TRANSLATIONS[cloud.type]
+    if cloud.modifier:
+        try:
+            cloud_str += f' ({static.CLOUD_TRANSLATIONS[cloud.modifier]})'
+        except KeyError:
+            LOGGER.warning('unknown cloud modifier: %s', cloud.modifier)
+    if not spoken:
+        cloud_base = Altitude(cloud.altitude * 100, altitude_unit)
+        return cloud_str.format(cloud_base.to_string(unit='ft'))
+    cloud_alt = []
+    thousands, hundreds = divmod(cloud.altitude, 10)
+    if thousands > 0:
+        cloud_alt.append(utils.num_to_words(thousands, group=0) + ' thousand')
+    if hundreds:
+        cloud_alt.append(utils.num_to_words(str(hundreds), group=0))
+        cloud_alt.append('hundred')
+    cloud_alt.append('feet')
+    return cloud_str.format(' '.join(cloud_alt))
+
+
+def _clouds(state: _RenderState) -> str:
+    if state.is_cavok:
+        return ''
+    if state.is_nsc:
+        return 'No significant cloud.'
+    cloud_layers = state.weather_object.cloud_layers
+    if state.is_clear or not cloud_layers:
+        return 'Sky clear.'
+    altitude_unit = state.weather_object.metar_units.altitude
+    ret = [cloud_str for cloud_str in (_cloud_layer(cloud, altitude_unit, state.spoken) for cloud in cloud_layers)
+           if cloud_str is not None]
+    if ret:
+        return ', '.join(ret) + '.'
+    return 'Sky clear.'
+
+
+def _remark_group(group: avwx.structs.RemarkGroup, spoken: bool) -> typing.Optional[str]:
+    code = group.code
+    if group.kind == 'group':
+        return avwx.remarks.REMARKS_GROUPS_BY_CODE[code]
+    if group.kind == 'element':
+        return avwx.static.REMARKS_ELEMENTS[code]
+    if group.kind == 'len5':
+        return utils.LEN5_DECODE[code[0]](code, spoken=spoken)  # type: ignore
+    if group.kind == 'temperature_minmax_24':
+        val1, val2 = utils.translate_temperature_str(code[1:5]), utils.translate_temperature_str(code[5:])
+        return f'24-hour temperature: max {val1} min {val2}'
+    if group.kind == 'sea_level_pressure':
+        if spoken:
+            val_1, val_2 = utils.num_to_words(int('10' + code[3:5])), utils.num_to_words(int('10' + code[5]))
+            return f'Sea level pressure: {val_1} point {val_2} hecto pascal'
+        return f'Sea level pressure: 10{code[3:5]}.{code[5]} hPa'
+    if group.kind == 'precipitation':
+        if spoken:
+            val_1 = utils.num_to_words(int(code[1:3]))
+            val_2 = utils.num_to_words(code[3:])
+            return f'Hourly precipitation: {val_1} point {val_2} inches'
+        return f'Hourly precipitation: {int(code[1:3])}.{code[3:]} in'
+    if group.kind == 'weather_began_ended':
+        event = 'began' if code[2] == 'B' else 'ended'
+        return f'{avwx.static.WX_TRANSLATIONS[code[:2]]} {event} at :{code[3:]}'
+    # temperature/dew point with decimal (T02220183) are not translated
+    return None
+
+
+def _remarks(state: _RenderState) -> str:
+    result = []
+    for group in _remark_groups(state.weather_object):
+        group_str = _remark_group(group, state.spoken)
+        if group_str is not None:
+            result.append(group_str)
+    if state.is_nosig:
+        result.append('No significant change')
+    if result:
+        return '. '.join(result) + '.'
+    return ''
+
+
+# sections names and functions, in order of appearance in the rendered string
+SECTIONS: typing.Tuple[typing.Tuple[str, typing.Callable[[_RenderState], str]], ...] = (
+    ('intro', _intro),
+    ('wind', _wind),
+    ('visibility', _visibility),
+    ('temperature', _temperature),
+    ('dew_point', _dew_point),
+    ('altimeter', _altimeter),
+    ('other', _other),
+    ('clouds', _clouds),
+    ('remarks', _remarks),
+)
+_SECTIONS_BY_NAME = dict(SECTIONS)
+
+
+def make_render_key(weather_object: WeatherABC) -> tuple:
+    """
+    Builds a key out of every value of a Weather object that is used to render it
+
+    Two weather objects with the same key always render the same strings, so the key changes when a value is
+    modified in place (for example with "temperature.set_value").
+
+    :param weather_object: source weather object
+    :type weather_object: WeatherABC
+    :return: render key
+    :rtype: tuple
+    """
+    return (
+        weather_object.station_name,
+        weather_object.date_time.dt,
+        weather_object.raw_metar_str,
+        weather_object.wind_speed.value(),
+        weather_object.wind_gust.value(),
+        weather_object.wind_direction.value(),
+        weather_object.wind_direction_is_variable,
+        tuple(wind_direction.value() for wind_direction in weather_object.wind_direction_range or ()),
+        weather_object.visibility.value(),
+        weather_object.temperature.value(),
+        weather_object.dew_point.value(),
+        weather_object.altimeter.value(),
+        tuple(weather_object.other),
+        tuple((layer.type, layer.altitude, layer.modifier) for layer in weather_object.cloud_layers),
+        weather_object.metar_units.altitude,
+        weather_object.remarks,
+    )
+
+
+def render(weather_object: WeatherABC, spoken: bool) -> str:
+    """
+    Translates a Weather object into a readable/speakable string
+
+    :param weather_object: source weather object
+    :type weather_object: WeatherABC
+    :param spoken: tailor outputs for TTS engines
+    :type spoken: bool
+    :return: translated result
+    :rtype: str
+    """
+    # doubled spaces are still collapsed over the whole string: some airport names contain them, or end with a space
+    return ' '.join(_iter_sections(_RenderState(weather_object, spoken))).replace('  ', ' ')
+
+
+def render_section(name: str, weather_object: WeatherABC, spoken: bool) -> str:
+    """
+    Translates a single section (intro, wind, visibility, ...) of a Weather object
+
+    :param name: name of the section (see SECTIONS)
+    :type name: str
+    :param weather_object: source weather object
+    :type weather_object: WeatherABC
+    :param spoken: tailor outputs for TTS engines
+    :type spoken: bool
+    :return: translated section, or an empty string if there is nothing to say
+    :rtype: str
+    """
+    return _SECTIONS_BY_NAME[name](_RenderState(weather_object, spoken))
+
+
+def _iter_sections(state: _RenderState) -> typing.Iterator[str]:
+    for _, section in SECTIONS:
+        section_str = section(state)
+        if section_str:
+            yield section_str
+
+
+def iter_render(weather_object: WeatherABC, spoken: bool) -> typing.Iterator[str]:
+    """
+    Translates a Weather object into readable/speakable segments (intro, wind, visibility, ...), yielding each
+    segment as soon as it is translated
+
+    Joining the segments with a space gives the same string as "render".
+
+    :param weather_object: source weather object
+    :type weather_object: WeatherABC
+    :param spoken: tailor outputs for TTS engines
+    :type spoken: bool
+    :return: iterator over the translated segments
+    :rtype: iterator of str
+    """
+    for section_str in _iter_sections(_RenderState(weather_object, spoken)):
+        yield section_str.replace('  ', ' ')
+
+
+def iter_segments(weather_object: WeatherABC, spoken: bool) -> typing.Iterator[Segment]:
+    """
+    Translates a Weather object into named segments, yielding each segment as soon as it is translated
+
+    Texts are the same as the ones yielded by "iter_render".
+
+    :param weather_object: source weather object
+    :type weather_object: WeatherABC
+    :param spoken: tailor outputs for TTS engines
+    :type spoken: bool
+    :return: iterator over the translated segments
+    :rtype: iterator of Segment
+    """
+    state = _RenderState(weather_object, spoken)
+    for name, section in SECTIONS:
+        section_str = section(state)
+        if section_str:
+            yield Segment.from_text(name, section_str.replace('  ', ' '))
+
+
+_WARM_UP_LOCK = threading.Lock()
+_WARMED_UP = False
+
+
+def warm_up_speech_vocabulary() -> None:
+    """
+    Pre-computes the number words used in spoken reports
+
+    Number words are memoized by utils.num_to_words and utils.num_to_ordinal; this fills them up front for days,
+    times, visibilities and cloud altitudes, so that the first reports rendered by a process are not slower than
+    the following ones. Cloud types and unit names are static lookup tables already.
+
+    Number words are only computed on the first call in a process.
+    """
+    global _WARMED_UP  # pylint: disable=global-statement
+    if _WARMED_UP:
+        return
+    with _WARM_UP_LOCK:
+        if _WARMED_UP:
+            return
+        for day in range(1, 32):
+            utils.num_to_words(utils.num_to_ordinal(f'{day:02}'), group=0)
+        for hour in range(24):
+            for minute in range(60):
+                utils.num_to_words(f'{hour:02}{minute:02}')
+        for meters in range(100, 10000, 100):
+            utils.num_to_words(meters, group=0)
+        for kilometers in range(1, 10):
+            utils.num_to_words(kilometers, group=0)
+        for tenth_of_miles in range(63):
+            utils.num_to_words(tenth_of_miles / 10, group=0)
+        for altitude in range(1, 100):
+            utils.num_to_words(altitude, group=0)
+        for digit in '123456789':
+            utils.num_to_words(digit, group=0)
+        _WARMED_UP = True
+
+
+def _render_speech(weather_object: WeatherABC) -> str:
+    return weather_object.as_speech()
+
+
+def render_speech_many(weathers: typing.Iterable[WeatherABC],
+                       *,
+                       pool: typing.Optional[str] = None,
+                       max_workers: typing.Optional[int] = None,
+                       ) -> typing.List[str]:
+    """
+    Renders a batch of Weather objects as spoken text
+
+    The shared number words are pre-computed once per process (see warm_up_speech_vocabulary).
+
+    :param weathers: weather objects to render
+    :type weathers: iterable of WeatherABC
+    :param pool: None to render in the current thread, "thread" or "process" to render in a pool
+    :type pool: str
+    :param max_workers: maximum number of workers in the pool (defaults to the executor's default)
+    :type max_workers: int
+    :return: spoken texts, in the same order as the given weather objects
+    :rtype: list of str
+    """
+    weathers = list(weathers)
+    if pool is None:
+        warm_up_speech_vocabulary()
+        return [_render_speech(weather_object) for weather_object in weathers]
+    executor: concurrent.futures.Executor
+    if pool == 'thread':
+        warm_up_speech_vocabulary()
+        executor = concurrent.futures.ThreadPoolExecutor(max_workers=max_workers)
+    elif pool == 'process':
+        executor = concurrent.futures.ProcessPoolExecutor(max_workers=max_workers,
+                                                          initializer=warm_up_speech_vocabulary)
+    else:
+        raise ValueError(f'unknown pool: {pool} (expected "thread" or "process")')
+    with executor:
+        results = list(executor.map(_render_speech, weathers))
+    if pool == 'process':
+        # objects were rendered in other processes, keep the results in their own cache
+        # pylint: disable=protected-access
+        for weather_object, result in zip(weathers, results):
+            render_key = make_render_key(weather_object)
+            if weather_object._render_cache is None or weather_object._render_cache[0] != render_key:
+                weather_object._render_cache = (render_key, {})
+            weather_object._render_cache[1][True] = result
+    return results
@@ -0,0 +1,49 @@
+# coding=utf-8
+"""
+Named section of a translated Weather object, with a key that only depends on its text
+"""
+import hashlib
+import typing
+
+import dataclasses
+
+
+@dataclasses.dataclass(frozen=True)
+class Segment:
+    """
+    Translated section of a Weather object
+
+    "key" only depends on the text of the segment: two segments with the same key have the same text, whichever
+    station or report they come from, so it can be used to cache anything derived from the text (e.g. synthesized
+    audio). "name" identifies the section, to compare the segments of successive reports.
+    """
+    name: str
+    text: str
+    key: str
+
+    @classmethod
+    def from_text(cls, name: str, text: str) -> 'Segment':
+        """
+        :param name: name of the section
+        :type name: str
+        :param text: translated section
+        :type text: str
+        :return: segment
+        :rtype: Segment
+        """
+        return cls(name=name, text=text, key=hashlib.sha1(text.encode('utf8')).hexdigest())
+
+
+def changed_segments(previous: typing.Iterable[Segment], current: typing.Iterable[Segment]) -> typing.List[Segment]:
+    """
+    Compares the segments of two successive reports
+
+    :param previous: segments of the previous report
+    :type previous: iterable of Segment
+    :param current: segments of the current report
+    :type current: iterable of Segment
+    :return: segments of the current report that are new or whose text changed, in order
+    :rtype: list of Segment
+    """
+    previous_keys = {(segment.name, segment.key) for segment in previous}
+    return [segment for segment in current if (segment.name, segment.key) not in previous_keys]
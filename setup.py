@@ -8,7 +8,6 @@ import os
 from setuptools import find_packages, setup
 
 requirements = [
-    'python-dateutil',
     'requests',
     'xmltodict',
     'dataclasses',
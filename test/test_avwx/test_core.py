@@ -7,16 +7,22 @@ Modified by etcher@daribouca.net
 
 # pylint: disable=E1101,C0103
 
+import json
+import os
+import timeit
 import unittest
 # stdlib
 from copy import deepcopy
 from datetime import datetime
+from glob import glob
 
 # library
 import pytest
 
 # module
+from elib_wx import LOGGER
 from elib_wx.avwx import core, exceptions, static, structs
+from test.refresh_test_data import iterate_test_data
 
 
 class BaseTest(unittest.TestCase):
@@ -160,6 +166,29 @@ class TestGlobal(BaseTest):
         self.assertEqual(number.value, 40)
         self.assertEqual(number.spoken, 'zero four zero')
 
+    def test_split_wx_codes(self):
+        """
+        Tests splitting weather codes into a set of 2-character components
+        """
+        self.assertEqual(core.split_wx_codes([]), frozenset())
+        codes = core.split_wx_codes(['+TSRA', 'VCSH', 'BR'])
+        for code in ('TS', 'RA', 'VC', 'SH', 'BR'):
+            self.assertIn(code, codes)
+        self.assertNotIn('SN', codes)
+
+    def test_make_number_shared(self):
+        """
+        Tests that identical numbers are only built once
+        """
+        for num, repr_, speak in (('10', None, None), ('1/2', None, None), ('CAVOK', None, None),
+                                  ('060', None, '060'), ('1013', 'Q1013', None)):
+            self.assertIs(core.make_number(num, repr_, speak), core.make_number(num, repr_, speak))
+        self.assertIsNot(core.make_number('1013'), core.make_number('1013', 'Q1013'))
+        self.assertEqual('Q1013', core.make_number('1013', 'Q1013').repr)
+        self.assertEqual('1013', core.make_number('1013').repr)
+        self.assertEqual('zero six zero', core.make_number('060', speak='060').spoken)
+        self.assertEqual('six zero', core.make_number('060').spoken)
+
     def test_find_first_in_list(self):
         """
         Tests a function which finds the first occurence in a string from a list
@@ -276,8 +305,7 @@ class TestGlobal(BaseTest):
             (['VRB10MPS', '1'], 'm/s', ('VRB',), ('10', 10), (None,), []),
             (['VRB20G30KMH', '1'], 'km/h', ('VRB',), ('20', 20), ('30', 30), [])
         ):
-            units = structs.Units(**static.NA_UNITS)
-            wx, *winds, var = core.get_wind(wx, units)
+            wx, *winds, var, units = core.get_wind(wx, core.NA_DEFAULT_UNITS)
             self.assertEqual(wx, ['1'])
             for i in range(len(wind)):
                 self.assert_number(winds[i], *wind[i])
@@ -305,8 +333,7 @@ class TestGlobal(BaseTest):
             (['M1000', '1'], 'm', ('1000', 1000)),
             (['2KM', '1'], 'm', ('2000', 2000)),
         ):
-            units = structs.Units(**static.NA_UNITS)
-            wx, vis = core.get_visibility(wx, units)
+            wx, vis, units = core.get_visibility(wx, core.NA_DEFAULT_UNITS)
             self.assertEqual(wx, ['1'])
             self.assert_number(vis, *visibility)
             self.assertEqual(units.visibility, unit)
@@ -410,6 +437,41 @@ class TestGlobal(BaseTest):
         self.assertEqual(parsed.hour, today.hour)
         self.assertEqual(parsed.minute, today.minute)
 
+    def test_parse_date_reference_time(self):
+        """
+        Tests that report timestamps are parsed relative to a given reference time, rolling months over
+        """
+        for rts, now, expected in (
+            ('121050Z', datetime(2019, 6, 12, 11), datetime(2019, 6, 12, 10, 50)),
+            ('312300Z', datetime(2019, 1, 1, 2), datetime(2018, 12, 31, 23)),
+            ('010100Z', datetime(2019, 1, 31, 22), datetime(2019, 2, 1, 1)),
+            ('302300Z', datetime(2019, 3, 1, 0, 30), datetime(2019, 2, 28, 23)),
+            ('0124', datetime(2019, 1, 1, 3), datetime(2019, 1, 1, 0)),
+            ('312355Z', datetime(2018, 9, 1, 0, 5), datetime(2018, 8, 31, 23, 55)),
+            ('300000Z', datetime(2019, 2, 1), datetime(2019, 1, 30)),
+            ('290600Z', datetime(2019, 2, 27), datetime(2019, 1, 29, 6)),
+            ('010100Z', datetime(2019, 2, 28, 23), datetime(2019, 3, 1, 1)),
+            ('001200Z', datetime(2019, 2, 1), None),
+            ('321200Z', datetime(2019, 2, 1), None),
+        ):
+            self.assertEqual(expected, core.parse_date(rts, now=now))
+            with core.parse_context(now):
+                self.assertEqual(expected, core.parse_date(rts))
+                self.assertEqual(expected, core.make_timestamp(rts).dt)
+
+    def test_parse_context(self):
+        """
+        Tests that the reference time is captured once per parse context
+        """
+        with core.parse_context() as now:
+            self.assertEqual(now.replace(second=0, microsecond=0), core.parse_date(now.strftime(r'%d%H%MZ')))
+            with core.parse_context() as nested_now:
+                self.assertIs(now, nested_now)
+            with core.parse_context(datetime(2019, 1, 1)) as nested_now:
+                self.assertEqual(datetime(2019, 1, 1), nested_now)
+                self.assertEqual(datetime(2019, 1, 2, 3), core.parse_date('020300Z'))
+            self.assertIs(core.parse_date('020300Z'), core.parse_date('020300Z'))
+
     def test_make_timestamp(self):
         """
         Tests that a report timestamp is converted into a Timestamp dataclass
@@ -452,37 +514,34 @@ class TestMetar(BaseTest):
         Tests that the correct alimeter item gets removed from the end of the wx list
         """
         # North American default
-        units = structs.Units(**static.NA_UNITS)
-        for wx, alt in (
-            (['1', '2'], (None,)),
-            (['1', '2', 'A2992'], ('2992', 29.92)),
-            (['1', '2', '2992'], ('2992', 29.92)),
-            (['1', '2', 'A2992', 'Q1000'], ('2992', 29.92)),
-            (['1', '2', 'Q1000', 'A2992'], ('2992', 29.92)),
-            (['1', '2', 'Q1000'], ('1000', 1000)),
+        for wx, alt, unit in (
+            (['1', '2'], (None,), 'inHg'),
+            (['1', '2', 'A2992'], ('2992', 29.92), 'inHg'),
+            (['1', '2', '2992'], ('2992', 29.92), 'inHg'),
+            (['1', '2', 'A2992', 'Q1000'], ('2992', 29.92), 'inHg'),
+            (['1', '2', 'Q1000', 'A2992'], ('2992', 29.92), 'inHg'),
+            (['1', '2', 'Q1000'], ('1000', 1000), 'hPa'),
         ):
-            self.assertEqual(units.altimeter, 'inHg')
-            retwx, ret_alt = core.get_altimeter(wx, units)
+            retwx, ret_alt, units = core.get_altimeter(wx, core.NA_DEFAULT_UNITS)
             self.assertEqual(retwx, ['1', '2'])
             self.assert_number(ret_alt, *alt)
-        # The last one should have changed the unit
-        self.assertEqual(units.altimeter, 'hPa')
+            self.assertEqual(units.altimeter, unit)
+        # The shared units are left untouched
+        self.assertEqual(core.NA_DEFAULT_UNITS.altimeter, 'inHg')
         # International
-        units = structs.Units(**static.IN_UNITS)
-        for wx, alt in (
-            (['1', '2'], (None,)),
-            (['1', '2', 'Q.1000'], ('1000', 1000)),
-            (['1', '2', 'Q1000/10'], ('1000', 1000)),
-            (['1', '2', 'A2992', 'Q1000'], ('1000', 1000)),
-            (['1', '2', 'Q1000', 'A2992'], ('1000', 1000)),
-            (['1', '2', 'A2992'], ('2992', 29.92)),
+        for wx, alt, unit in (
+            (['1', '2'], (None,), 'hPa'),
+            (['1', '2', 'Q.1000'], ('1000', 1000), 'hPa'),
+            (['1', '2', 'Q1000/10'], ('1000', 1000), 'hPa'),
+            (['1', '2', 'A2992', 'Q1000'], ('1000', 1000), 'hPa'),
+            (['1', '2', 'Q1000', 'A2992'], ('1000', 1000), 'hPa'),
+            (['1', '2', 'A2992'], ('2992', 29.92), 'inHg'),
         ):
-            self.assertEqual(units.altimeter, 'hPa')
-            retwx, ret_alt = core.get_altimeter(wx, units, 'IN')
+            retwx, ret_alt, units = core.get_altimeter(wx, core.IN_DEFAULT_UNITS, 'IN')
             self.assertEqual(retwx, ['1', '2'])
             self.assert_number(ret_alt, *alt)
-        # The last one should have changed the unit
-        self.assertEqual(units.altimeter, 'inHg')
+            self.assertEqual(units.altimeter, unit)
+        self.assertEqual(core.IN_DEFAULT_UNITS.altimeter, 'hPa')
 
 
 class TestTaf(unittest.TestCase):
@@ -668,3 +727,187 @@ def test_get_clouds(wx, clouds):
         assert isinstance(cloud, structs.Cloud)
         for j, key in enumerate(('type', 'altitude', 'modifier')):
             assert clouds[i][j] == getattr(cloud, key)
+
+
+def test_spoken_headings():
+    assert 361 == len(core.SPOKEN_HEADINGS)
+    assert 'zero two zero' == core.spoken_number('020')
+    assert 'three six zero' == core.spoken_number('360')
+    assert 'three six one' == core.spoken_number('361')
+
+
+def _get_remarks_by_find(txt):
+    # reference implementation: looks for each remarks signifier separately
+    txt = txt.replace('?', '').strip()
+    alt_index = len(txt) + 1
+    for item in [' A2', ' A3', ' Q1', ' Q0', ' Q9']:
+        index = txt.find(item)
+        if len(txt) - 6 > index > -1 and txt[index + 2:index + 6].isdigit():
+            alt_index = index
+    sig_index = core.find_first_in_list(txt, static.METAR_RMK)
+    if sig_index == -1:
+        sig_index = len(txt) + 1
+    if sig_index > alt_index > -1:
+        return txt[:alt_index + 6].strip().split(' '), txt[alt_index + 7:]
+    if alt_index > sig_index > -1:
+        return txt[:sig_index].strip().split(' '), txt[sig_index + 1:]
+    return txt.strip().split(' '), ''
+
+
+@pytest.mark.parametrize(
+    'txt',
+    ['', 'RMK', 'FOO RMK BAR', '1 2 BLU+ 3', '1 TEMPO 2 BECMG 3', '1 2 3 A2992 RMK Hi', 'CHECK RWY 28']
+)
+def test_remarks_signifiers(txt):
+    match = core._METAR_RMK_RE.search(txt)
+    assert core.find_first_in_list(txt, static.METAR_RMK) == (match.start() if match else -1)
+    match = core._TAF_RMK_RE.search(txt)
+    assert core.find_first_in_list(txt, static.TAF_RMK) == (match.start() if match else -1)
+
+
+@pytest.mark.long
+def test_get_remarks_benchmark():
+    test_data = [core.sanitize_report_string(metar_str) for metar_str in iterate_test_data()]
+    for txt in test_data:
+        assert _get_remarks_by_find(txt) == core.get_remarks(txt)
+
+    def _by_find():
+        for txt_ in test_data:
+            _get_remarks_by_find(txt_)
+
+    def _by_regex():
+        for txt_ in test_data:
+            core.get_remarks(txt_)
+
+    by_find = min(timeit.repeat(_by_find, number=1, repeat=5))
+    by_regex = min(timeit.repeat(_by_regex, number=1, repeat=5))
+    LOGGER.info('splitting remarks of %s reports: by find: %.3fs, by regex: %.3fs', len(test_data), by_find, by_regex)
+
+
+def _sanitize_report_list_reference(wxdata, remove_clr_and_skc=True):  # noqa pylint: disable=too-many-branches
+    # reference implementation: pops items while iterating over a reversed copy of the list
+    shear = ''
+    runway_vis = []
+    for i, item in reversed(list(enumerate(wxdata))):
+        ilen = len(item)
+        _i5d = item[:5].isdigit()
+        _i3d = item[1:3].isdigit()
+        _ivrb = item.startswith('VRB')
+        try:
+            _i5kt = item[5] in ['K', 'T']
+        except IndexError:
+            _i5kt = False
+        try:
+            _i8kt = item[8] in ['K', 'T']
+        except IndexError:
+            _i8kt = False
+        cond1 = (ilen == 6 and _i5kt and (_i5d or _ivrb))
+        cond2 = (ilen == 9 and _i8kt and item[5] == 'G' and (_i5d or _ivrb))
+        # Remove elements containing only '/'
+        # noinspection SpellCheckingInspection
+        if core.is_unknown(item):
+            wxdata.pop(i)
+        # Identify Runway Visibility
+        elif ilen > 4 and item[0] == 'R' and (item[3] == '/' or item[4] == '/') and _i3d:
+            runway_vis.append(wxdata.pop(i))
+        # Remove RE from wx codes, REVCTS -> VCTS
+        elif ilen in [4, 6] and item.startswith('RE'):
+            wxdata[i] = item[2:]
+        # Fix a slew of easily identifiable conditions where a space does not belong
+        elif i and core.extra_space_exists(wxdata[i - 1], item):
+            wxdata[i - 1] += wxdata.pop(i)
+        # Remove spurious elements
+        elif item in core.ITEM_REMV:
+            wxdata.pop(i)
+        # Remove 'Sky Clear' from METAR but not TAF
+        elif remove_clr_and_skc and item in ['CLR', 'SKC']:
+            wxdata.pop(i)
+        # Replace certain items
+        elif item in core.ITEM_REPL:
+            wxdata[i] = core.ITEM_REPL[item]
+        # Remove amend signifier from start of report ('CCA', 'CCB',etc)
+        elif ilen == 3 and item.startswith('CC') and item[2].isalpha():
+            wxdata.pop(i)
+        # Identify Wind Shear
+        elif ilen > 6 and item.startswith('WS') and item[5] == '/':
+            shear = wxdata.pop(i).replace('KT', '')
+        # Fix inconsistent 'P6SM' Ex: TP6SM or 6PSM -> P6SM
+        elif ilen > 3 and item[-4:] in core.VIS_PERMUTATIONS:
+            wxdata[i] = 'P6SM'
+        # Fix wind T
+        elif cond1 or cond2:
+            wxdata[i] = item[:-1] + 'KT'
+        # Fix joined TX-TN
+        elif ilen > 16 and len(item.split('/')) == 3:
+            if item.startswith('TX') and 'TN' not in item:
+                tn_index = item.find('TN')
+                wxdata.insert(i + 1, item[:tn_index])
+                wxdata[i] = item[tn_index:]
+            elif item.startswith('TN') and item.find('TX') != -1:
+                tx_index = item.find('TX')
+                wxdata.insert(i + 1, item[:tx_index])
+                wxdata[i] = item[tx_index:]
+    return wxdata, runway_vis, shear
+
+
+def _sanitize_test_data():
+    for metar_str in iterate_test_data():
+        yield core.get_remarks(core.sanitize_report_string(metar_str))[0]
+    for path in glob(os.path.dirname(os.path.realpath(__file__)) + '/test_taf/*.json'):
+        taf_str = json.load(open(path))['data']['raw']
+        for line in core.split_taf(core.get_taf_remarks(core.sanitize_report_string(taf_str))[0]):
+            yield core.sanitize_line(line).split()
+
+
+@pytest.mark.parametrize(
+    'wx',
+    [
+        [],
+        ['36010', 'G20', 'KT', 'RERA', 'OVC', '040', '12/', '10', 'Q', '1001'],
+        ['EGLL', '1', 'SM', 'R10/1000', 'RERA'],
+        ['TX20/10ZTN10/05Z1', 'TN10/05ZTX20/10Z', 'TX201/10ZTX10/05Z'],
+        ['EGLL', '36010T', 'VRB05T', '36010G20T', 'CCA', 'WS020/07040KT', 'TP6SM', 'CLR', 'SKC', 'CALM', 'X.X', '.'],
+        ['FM', '122400', 'TX', '20/10', 'OVC022', 'CB', '12/1', '0'],
+    ]
+)
+@pytest.mark.parametrize('remove_clr_and_skc', [True, False])
+def test_sanitize_report_list_cases(wx, remove_clr_and_skc):
+    assert _sanitize_report_list_reference(list(wx), remove_clr_and_skc) == \
+        core.sanitize_report_list(list(wx), remove_clr_and_skc)
+
+
+@pytest.mark.weather
+def test_sanitize_report_list_identical():
+    for wx in _sanitize_test_data():
+        for remove_clr_and_skc in (True, False):
+            assert _sanitize_report_list_reference(list(wx), remove_clr_and_skc) == \
+                core.sanitize_report_list(list(wx), remove_clr_and_skc)
+
+
+@pytest.mark.parametrize(
+    'item, expected',
+    [
+        ('', True), ('/', True), ('////', True), ('.', True), ('/./', True), ('XX', True), ('X.X', True),
+        ('/X', False), ('X/', False), ('M', False), ('1/2', False), ('RA', False), ('A/', False),
+    ]
+)
+def test_is_unknown_item(item, expected):
+    assert expected == core._is_unknown_item(item)
+    assert expected == core.is_unknown(item)
+
+
+@pytest.mark.long
+def test_sanitize_report_list_benchmark():
+    test_data = list(_sanitize_test_data())
+
+    def _reference():
+        for wx in test_data:
+            _sanitize_report_list_reference(list(wx))
+
+    def _single_pass():
+        for wx in test_data:
+            core.sanitize_report_list(list(wx))
+
+    reference = min(timeit.repeat(_reference, number=1, repeat=5))
+    single_pass = min(timeit.repeat(_single_pass, number=1, repeat=5))
+    LOGGER.info('sanitizing %s reports: reference: %.3fs, single pass: %.3fs', len(test_data), reference, single_pass)
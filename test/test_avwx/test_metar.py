@@ -6,16 +6,22 @@ Modified by etcher@daribouca.net
 """
 
 # library
+import cProfile
 import json
 import os
+import pstats
 import unittest
 from datetime import datetime
 from glob import glob
 
+import pytest
 from dataclasses import asdict
 
 # module
+from elib_wx import LOGGER
 from elib_wx.avwx import Metar, metar, structs
+from elib_wx.exc import ELIBWxError
+from test.refresh_test_data import iterate_test_data
 
 
 class TestMetar(unittest.TestCase):
@@ -56,3 +62,47 @@ class TestMetar(unittest.TestCase):
             self.assertEqual(station.summary, ref['summary'])
             self.assertEqual(station.speech, ref['speech'])
             # self.assertEqual(asdict(station.station_info), ref['station_info'])
+
+
+def test_wx_codes():
+    report = 'KJFK 032151Z 16008KT 3SM +TSRA BR FEW034 27/23 A3013'
+    data, _ = metar.parse(report[:4], report)
+    assert {'TS', 'RA', 'BR'} <= data.wx_codes
+    assert data.wx_codes is data.wx_codes
+    data.other.append('SN')
+    assert 'SN' in data.wx_codes
+
+
+def test_parse_reference_time():
+    report = 'KJFK 032151Z 16008KT 10SM FEW034 27/23 A3013'
+    data, _ = metar.parse(report[:4], report, datetime(2015, 3, 4, 1, 0))
+    assert datetime(2015, 3, 3, 21, 51) == data.time.dt
+    report = 'KJFK 312351Z 16008KT 10SM FEW034 27/23 A3013'
+    data, _ = metar.parse(report[:4], report, datetime(2016, 1, 1, 0, 0))
+    assert datetime(2015, 12, 31, 23, 51) == data.time.dt
+
+
+_LIST_CONSUMING_METHODS = ("<method 'pop' of 'list' objects>", "<method 'remove' of 'list' objects>")
+
+
+@pytest.mark.long
+def test_parse_list_pops_benchmark():
+    # the parsing stages consume a shared token list in place; this logs the share of the end-to-end parse time
+    # spent in list pops and removes (measured under cProfile, whose overhead depends on the interpreter)
+    test_data = list(iterate_test_data())
+
+    def _parse_all():
+        for metar_str in test_data:
+            try:
+                metar.parse(metar_str[:4], metar_str)
+            except ELIBWxError:
+                pass
+
+    profiler = cProfile.Profile()
+    profiler.runcall(_parse_all)
+    stats = pstats.Stats(profiler)
+    total_time = stats.total_tt  # type: ignore
+    list_time = sum(timings[2] for (_, _, function_name), timings in stats.stats.items()  # type: ignore
+                    if function_name in _LIST_CONSUMING_METHODS)
+    LOGGER.info('parsing %s reports: %.3fs, list pops and removes: %.3fs (%.2f%%)',
+                len(test_data), total_time, list_time, 100 * list_time / total_time)
@@ -0,0 +1,106 @@
+# coding=utf-8
+
+import itertools
+
+import pytest
+from mockito import when
+
+from elib_wx.avwx import core, metar, profiling
+from test.refresh_test_data import iterate_test_data
+
+METAR_IN = 'UGTB 121050Z 24008KT 9999 FEW030 12/07 Q1021 NOSIG'
+METAR_NA = 'KJFK 032151Z 16008KT 10SM FEW034 FEW130 BKN250 27/23 A3013 RMK AO2 SLP201'
+
+
+def test_profile_stages():
+    with profiling.profile_metar_parsing() as profiler:
+        metar.parse('UGTB', METAR_IN)
+        metar.parse('KJFK', METAR_NA)
+    stats = profiler.stats()
+    for stage in ('get_remarks', 'sanitize_report_list', 'get_wind', 'get_altimeter', 'get_visibility',
+                  'get_temp_and_dew', 'remarks.parse'):
+        assert 2 == stats[stage].calls
+        assert 0 == stats[stage].errors
+        assert 0 < stats[stage].total_seconds
+        assert stats[stage].max_seconds <= stats[stage].total_seconds
+    assert 2 == stats['get_clouds'].calls
+
+
+def test_profile_same_results():
+    metar_strings = list(itertools.islice(iterate_test_data(), 200))
+    expected = [metar.parse(metar_str[:4], metar_str) for metar_str in metar_strings]
+    with profiling.profile_metar_parsing() as profiler:
+        assert expected == [metar.parse(metar_str[:4], metar_str) for metar_str in metar_strings]
+    assert len(metar_strings) == profiler.stats()['get_remarks'].calls
+
+
+def test_disabled_outside_of_context():
+    with profiling.profile_metar_parsing() as profiler:
+        assert metar.STAGE_TIMER is not None
+    assert metar.STAGE_TIMER is None
+    metar.parse('UGTB', METAR_IN)
+    assert {} == profiler.as_dict()
+
+
+def test_stages_called_directly_when_disabled():
+    assert (core, metar.remarks) == metar._stage_modules()
+    with profiling.profile_metar_parsing():
+        core_stages, remarks_stages = metar._stage_modules()
+        assert core_stages is not core
+        assert remarks_stages is not metar.remarks
+
+
+def test_nested_contexts():
+    with profiling.profile_metar_parsing() as outer:
+        metar.parse('UGTB', METAR_IN)
+        with profiling.profile_metar_parsing() as inner:
+            metar.parse('UGTB', METAR_IN)
+        assert metar.STAGE_TIMER is not None
+        metar.parse('UGTB', METAR_IN)
+    assert metar.STAGE_TIMER is None
+    assert 3 == outer.stats()['get_wind'].calls
+    assert 1 == inner.stats()['get_wind'].calls
+
+
+def test_shared_profiler():
+    profiler = profiling.ParseProfiler()
+    for _ in range(2):
+        with profiling.profile_metar_parsing(profiler):
+            metar.parse('UGTB', METAR_IN)
+    assert 2 == profiler.stats()['get_wind'].calls
+    profiler.reset()
+    assert {} == profiler.as_dict()
+
+
+def test_errors():
+    when(core).get_altimeter(...).thenRaise(ValueError)
+    with profiling.profile_metar_parsing() as profiler:
+        with pytest.raises(ValueError):
+            metar.parse('UGTB', METAR_IN)
+    stats = profiler.stats()
+    assert 1 == stats['get_altimeter'].calls
+    assert 1 == stats['get_altimeter'].errors
+    assert 'get_visibility' not in stats
+    assert metar.STAGE_TIMER is None
+
+
+def test_as_dict():
+    profiler = profiling.ParseProfiler()
+    profiler.record('get_wind', 0.5)
+    profiler.record('get_wind', 0.25, failed=True)
+    assert {'get_wind': {'calls': 2, 'errors': 1, 'total_seconds': 0.75, 'max_seconds': 0.5}} == profiler.as_dict()
+
+
+def test_as_prometheus():
+    profiler = profiling.ParseProfiler()
+    profiler.record('get_wind', 0.5)
+    profiler.record('remarks.parse', 0.25, failed=True)
+    text = profiler.as_prometheus()
+    assert text.endswith('\n')
+    lines = text.splitlines()
+    assert '# TYPE elib_wx_metar_parse_stage_calls_total counter' in lines
+    assert 'elib_wx_metar_parse_stage_calls_total{stage="get_wind"} 1' in lines
+    assert 'elib_wx_metar_parse_stage_errors_total{stage="remarks.parse"} 1' in lines
+    assert 'elib_wx_metar_parse_stage_seconds_total{stage="get_wind"} 0.5' in lines
+    assert 'elib_wx_metar_parse_stage_max_seconds{stage="remarks.parse"} 0.25' in lines
+    assert 'wx_stage_calls_total{stage="get_wind"} 1' in profiler.as_prometheus(prefix='wx').splitlines()
@@ -126,3 +126,43 @@ class TestRemarks(unittest.TestCase):
             }),
         ):
             self.assertEqual(remarks.translate(rmk), out)
+
+    def test_translate_malformed(self):
+        """
+        Tests that malformed groups are skipped instead of failing the whole translation
+        """
+        for rmk, out in (
+            ('RMK AO2 SLPNO $', {
+                'AO2': 'Automated with precipitation sensor',
+                '$': 'ASOS requires maintenance',
+            }),
+            ('RMK SLP/// 59012 SLP 137', {}),
+        ):
+            self.assertEqual(remarks.translate(rmk), out)
+
+    def test_decode(self):
+        """
+        Tests decoding the remarks groups
+        """
+        self.assertEqual(
+            [
+                structs.RemarkGroup('group', 'ACFT MSHP'),
+                structs.RemarkGroup('element', 'AO1'),
+                structs.RemarkGroup('sea_level_pressure', 'SLP137'),
+                structs.RemarkGroup('temperature_decimal', 'T02720183'),
+                structs.RemarkGroup('len5', '51014'),
+                structs.RemarkGroup('temperature_minmax_24', '401001015'),
+                structs.RemarkGroup('precipitation', 'P0123'),
+                structs.RemarkGroup('weather_began_ended', 'TSB20'),
+            ],
+            remarks.decode('RMK AO1 ACFT MSHP SLP137 T02720183 51014 AO1 401001015 1234 P0123 TSB20 XXB20 SLPNO')
+        )
+
+    def test_parse_decodes_groups(self):
+        """
+        Tests that parsing the remarks also decodes the groups, and that translation re-uses them
+        """
+        rmk = 'RMK AO2 SLP141 T02670189 $'
+        remarks_info = remarks.parse(rmk)
+        self.assertEqual(remarks.decode(rmk), remarks_info.groups)
+        self.assertEqual(remarks.translate(rmk), remarks.translate('', remarks_info.groups))
@@ -6,9 +6,12 @@ Modified by etcher@daribouca.net
 """
 
 # library
+import builtins
 import unittest
 
 import pytest
+import requests
+from mockito import mock, when
 from requests import ConnectionError
 
 # module
@@ -133,3 +136,111 @@ class TestModule(unittest.TestCase):
         ):
             for station in stations:
                 self.assertIsInstance(service.get_service(station)(station), serv)
+
+
+_NOAA_RESPONSE = '<response><data><METAR><raw_text>KJFK 032151Z 16008KT 10SM FEW034 27/23 A3013</raw_text>' \
+                 '</METAR></data></response>'
+
+
+def _response(status_code=200, text=_NOAA_RESPONSE):
+    return mock({'status_code': status_code, 'text': text, 'content': text.encode()})
+
+
+@pytest.fixture(name='metrics')
+def _metrics():
+    service.FETCH_METRICS.reset()
+    yield service.FETCH_METRICS
+    service.set_metrics_exporter(None)
+    service.FETCH_METRICS.reset()
+
+
+def test_metrics(metrics):
+    when(requests).get(...).thenReturn(_response())
+    for _ in range(2):
+        assert 'KJFK 032151Z 16008KT 10SM FEW034 27/23 A3013' == service.NOAA('metar').fetch('KJFK')
+    stats = metrics.get('NOAA', 'metar')
+    assert 2 == stats.requests
+    assert {200: 2} == stats.status_codes
+    assert {} == stats.errors
+    assert 2 == stats.latency.count
+    assert 2 == sum(stats.latency.counts)
+    assert 2 * len(_NOAA_RESPONSE) == stats.response_bytes.sum
+    assert 2 == stats.response_bytes.counts[0]
+    assert 0 == metrics.get('NOAA', 'taf').requests
+    assert [('NOAA', 'metar')] == list(metrics.stats())
+
+
+def test_metrics_source_error(metrics):
+    when(requests).get(...).thenReturn(_response(status_code=500, text='error'))
+    with pytest.raises(exceptions.SourceError):
+        service.NOAA('taf').fetch('KJFK')
+    stats = metrics.get('NOAA', 'taf')
+    assert {500: 1} == stats.status_codes
+    assert {'SourceError': 1} == stats.errors
+    assert 5 == stats.response_bytes.sum
+
+
+def test_metrics_connection_error(metrics):
+    when(requests).post(...).thenRaise(requests.exceptions.ConnectionError)
+    with pytest.raises(builtins.ConnectionError):
+        service.MAC('metar').fetch('SKBO')
+    stats = metrics.get('MAC', 'metar')
+    assert 1 == stats.requests
+    assert {} == stats.status_codes
+    assert 0 == stats.response_bytes.count
+    assert 1 == stats.latency.count
+    assert {'ConnectionError': 1} == stats.errors
+
+
+def test_metrics_extraction_error(metrics):
+    when(requests).get(...).thenReturn(_response(text='<response><errors/></response>'))
+    with pytest.raises(exceptions.InvalidRequestError):
+        service.NOAA('metar').fetch('KJFK')
+    assert {'InvalidRequestError': 1} == metrics.get('NOAA', 'metar').errors
+
+
+def test_metrics_bad_station_not_recorded(metrics):
+    with pytest.raises(exceptions.BadStationError):
+        service.NOAA('metar').fetch('12K')
+    assert {} == metrics.stats()
+
+
+def test_histogram():
+    histogram = service.Histogram((1, 10))
+    for value in (0.5, 1, 5, 10, 11):
+        histogram.observe(value)
+    assert [2, 2, 1] == histogram.counts
+    assert 5 == histogram.count
+    assert 27.5 == histogram.sum
+
+
+class _Exporter(service.FetchMetricsExporter):
+
+    def __init__(self):
+        self.samples = []
+
+    def record(self, sample):
+        self.samples.append(sample)
+
+
+def test_custom_exporter(metrics):
+    exporter = _Exporter()
+    service.set_metrics_exporter(exporter)
+    assert exporter is service.get_metrics_exporter()
+    when(requests).get(...).thenReturn(_response())
+    service.NOAA('metar').fetch('KJFK')
+    sample, = exporter.samples
+    assert ('NOAA', 'metar', 200, len(_NOAA_RESPONSE), None) == \
+        (sample.service, sample.rtype, sample.status_code, sample.response_bytes, sample.error)
+    assert 0 <= sample.seconds
+    assert {} == metrics.stats()
+    service.set_metrics_exporter(None)
+    assert metrics is service.get_metrics_exporter()
+
+
+def test_failing_exporter(metrics):
+    exporter = _Exporter()
+    exporter.record = None
+    service.set_metrics_exporter(exporter)
+    when(requests).get(...).thenReturn(_response())
+    assert service.NOAA('metar').fetch('KJFK').startswith('KJFK')
@@ -0,0 +1,83 @@
+# coding=utf-8
+
+import copy
+import pickle
+import tracemalloc
+
+import pytest
+from dataclasses import FrozenInstanceError
+
+from elib_wx import LOGGER
+from elib_wx.avwx import core, metar, structs
+from test.refresh_test_data import iterate_test_data
+
+
+@pytest.mark.parametrize(
+    'obj',
+    [
+        core.make_number('10'),
+        core.make_number('1/2'),
+        core.make_timestamp('121050Z'),
+        core.make_cloud('BKN015CB'),
+        structs.Cloud(),
+        structs.Units('hPa', 'ft', 'C', 'm', 'kt'),
+        structs.RemarkGroup('sea_level_pressure', 'SLP134'),
+    ]
+)
+def test_slotted(obj):
+    assert not hasattr(obj, '__dict__')
+    assert obj == pickle.loads(pickle.dumps(obj))
+    assert obj == copy.deepcopy(obj)
+
+
+@pytest.mark.parametrize(
+    'obj, attribute',
+    [
+        (core.make_number('10'), 'value'),
+        (core.make_number('1/2'), 'numerator'),
+        (core.make_timestamp('121050Z'), 'dt'),
+        (structs.RemarkGroup('sea_level_pressure', 'SLP134'), 'code'),
+    ]
+)
+def test_frozen(obj, attribute):
+    with pytest.raises(FrozenInstanceError):
+        setattr(obj, attribute, None)
+
+
+def test_cloud_is_mutable():
+    cloud = core.make_cloud('BKN015')
+    cloud.altitude = None
+    assert structs.Cloud('BKN015', 'BKN', None, None) == cloud
+
+
+def test_cloud_type_interned():
+    assert core.make_cloud('BKN015CB').type is core.make_cloud('BKN030').type
+    assert core.make_cloud('BKN015CB').modifier is core.make_cloud('FEW040CB').modifier
+
+
+def test_sanitized_string_shared():
+    report = 'UGTB 121050Z 24008KT 9999 FEW030 12/07 Q1021 NOSIG'
+    assert core.sanitize_report_string(report) is report
+    metar_data, _ = metar.parse('UGTB', report)
+    assert metar_data.sanitized is metar_data.raw
+
+
+@pytest.mark.long
+def test_report_memory():
+    reports = list(iterate_test_data())
+    tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        parsed = []
+        for report in reports:
+            try:
+                parsed.append(metar.parse(report[:4], report))
+            except Exception:  # pylint: disable=broad-except
+                pass
+        after = tracemalloc.get_traced_memory()[0]
+    finally:
+        tracemalloc.stop()
+    per_report = (after - before) / len(parsed)
+    LOGGER.info('memory per parsed report: %.0f bytes (%s reports)', per_report, len(parsed))
+    # about 2800 bytes per report with plain dataclasses, about 1200 bytes with slotted structs and shared values
+    assert per_report < 1600
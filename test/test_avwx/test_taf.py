@@ -7,6 +7,7 @@ Modified by etcher@daribouca.net
 
 import json
 import os
+import timeit
 from copy import deepcopy
 from datetime import datetime
 from glob import glob
@@ -16,6 +17,7 @@ import pytest
 from dataclasses import asdict
 
 # module
+from elib_wx import LOGGER
 from elib_wx.avwx import Taf, core, structs, taf
 
 
@@ -42,6 +44,16 @@ def test_parse():
     assert data.raw == report
 
 
+def test_parse_reference_time():
+    report = ('PHNL 042339Z 0500/0606 06018G25KT P6SM FEW030 SCT060 FM050600 06010KT '
+              'P6SM FEW025 SCT060 FM052000 06012G20KT P6SM FEW030 SCT060')
+    data, _ = taf.parse(report[:4], report, datetime(2016, 2, 5, 0, 0))
+    assert datetime(2016, 2, 4, 23, 39) == data.time.dt
+    assert datetime(2016, 2, 5, 0, 0) == data.start_time.dt
+    assert datetime(2016, 2, 6, 6, 0) == data.end_time.dt
+    assert datetime(2016, 2, 5, 6, 0) == data.forecast[1].start_time.dt
+
+
 def test_prob_line():
     """
     Even though PROB__ is not in TAF_NEWLINE, it should still separate,
@@ -126,3 +138,155 @@ def test_taf_ete():
         assert station.summary == ref['summary']
         assert _nodate(station.speech) == _nodate(ref['speech'])
         # assert asdict(station.station_info) == ref['station_info']
+
+
+def _sanitize_line_reference(txt):
+    # reference implementation: one find and slice rebuild per fix
+    for key in core.LINE_FIXES:
+        index = txt.find(key)
+        if index > -1:
+            txt = txt[:index] + core.LINE_FIXES[key] + txt[index + len(key):]
+    for item in ['BECMG', 'TEMPO']:
+        if item in txt and item + ' ' not in txt:
+            index = txt.find(item) + len(item)
+            txt = txt[:index] + ' ' + txt[index:]
+    return txt
+
+
+def _get_next_time_reference(lines, target):
+    for line in lines:
+        if line[target] and not core._is_tempo_or_prob(line['type']):
+            return line[target]
+    return ''
+
+
+def _find_missing_taf_times_reference(lines, start, end):
+    # reference implementation: searches the previous and next lines for each line
+    if not lines:
+        return lines
+    lines[0]['start_time'] = start
+    last_fm_line = 0
+    for i, line in enumerate(lines):
+        if core._is_tempo_or_prob(line['type']):
+            continue
+        last_fm_line = i
+        for target, other, direc in (('start', 'end', -1), ('end', 'start', 1)):
+            target += '_time'
+            if not line[target]:
+                line[target] = _get_next_time_reference(lines[i::direc][1:], other + '_time')
+    if last_fm_line:
+        lines[last_fm_line]['end_time'] = end
+    if lines and not lines[0]['end_time']:
+        lines[0]['end_time'] = end
+    return lines
+
+
+def _get_taf_flight_rules_reference(lines):
+    # reference implementation: searches the previous lines for each line
+    for i, line in enumerate(lines):
+        temp_vis, temp_cloud = line['visibility'], line['clouds']
+        for report in reversed(lines[:i]):
+            if not core._is_tempo_or_prob(report['type']):
+                if temp_vis == '':
+                    temp_vis = report['visibility']
+                if 'SKC' in report['other'] or 'CLR' in report['other']:
+                    temp_cloud = 'temp-clear'
+                elif not temp_cloud:
+                    temp_cloud = report['clouds']
+                if temp_vis != '' and temp_cloud != []:
+                    break
+        if temp_cloud == 'temp-clear':
+            temp_cloud = []
+        line['flight_rules'] = core.FLIGHT_RULES[core.get_flight_rules(temp_vis, core.get_ceiling(temp_cloud))]
+    return lines
+
+
+def _taf_test_data():
+    for path in sorted(glob(os.path.dirname(os.path.realpath(__file__)) + '/test_taf/*.json')):
+        txt = json.load(open(path))['data']['raw']
+        station = txt[:4]
+        _, station, time = core.get_station_and_time(txt[:20].split(' '))
+        txt = txt.replace(station, '').replace(time, '').strip()
+        txt, _ = core.get_taf_remarks(txt)
+        units = core.NA_DEFAULT_UNITS if core.uses_na_format(station) else core.IN_DEFAULT_UNITS
+        lines = core.split_taf(txt)
+        parsed_lines, _ = taf.parse_lines(lines, units, core.uses_na_format(station))
+        start, end = parsed_lines[0]['start_time'], parsed_lines[0]['end_time']
+        parsed_lines[0]['end_time'] = None
+        yield lines, parsed_lines, start, end
+
+
+def _with_clear_sky(lines):
+    # adds a CLR/SKC line to each TAF, so that looking for the clear sky of prior lines is covered
+    lines = deepcopy(lines)
+    lines.insert(1, dict(lines[0], other=['SKC'], clouds=[], type='BECMG'))
+    lines.insert(3, dict(lines[0], other=['CLR'], clouds=[], visibility='', type='TEMPO'))
+    return lines
+
+
+def test_taf_pipeline_identical():
+    for lines, parsed_lines, start, end in _taf_test_data():
+        for line in lines:
+            assert _sanitize_line_reference(line) == core.sanitize_line(line)
+        for test_lines in (parsed_lines, _with_clear_sky(parsed_lines)):
+            reference = _find_missing_taf_times_reference(deepcopy(test_lines), start, end)
+            assert reference == core.find_missing_taf_times(deepcopy(test_lines), start, end)
+            assert _get_taf_flight_rules_reference(deepcopy(reference)) == core.get_taf_flight_rules(reference)
+
+
+def _flight_rules_line(type_, visibility='', clouds=(), other=()):
+    return {
+        'type': type_,
+        'visibility': core.make_number(visibility) if visibility else '',
+        'clouds': [structs.Cloud(cloud, cloud[:3], int(cloud[3:])) for cloud in clouds],
+        'other': list(other),
+    }
+
+
+@pytest.mark.parametrize(
+    'lines, expected',
+    [
+        # the line has its own data, but the closest prior FROM line is still searched, and its clear sky wins
+        ([('FM', '6', [], ['SKC']), ('FM', '6', ['OVC002'], [])], ['VFR', 'VFR']),
+        # without a clear sky, the line's own clouds are kept
+        ([('FM', '6', ['BKN050'], []), ('FM', '6', ['OVC002'], [])], ['VFR', 'LIFR']),
+        # only the closest prior FROM line is searched when the line has its own data
+        ([('FM', '6', [], ['SKC']), ('FM', '6', ['BKN050'], []), ('FM', '6', ['OVC002'], [])],
+         ['VFR', 'VFR', 'LIFR']),
+        # the search goes on for the missing visibility, and goes through a clear sky on the way
+        ([('FM', '6', [], ['SKC']), ('FM', '', ['BKN050'], []), ('FM', '', ['OVC002'], [])],
+         ['VFR', 'VFR', 'VFR']),
+        # TEMPO lines are never searched
+        ([('FM', '6', ['BKN050'], []), ('TEMPO', '1', ['OVC002'], []), ('FM', '', [], [])],
+         ['VFR', 'LIFR', 'VFR']),
+    ]
+)
+def test_get_taf_flight_rules(lines, expected):
+    lines = [_flight_rules_line(*line) for line in lines]
+    assert expected == [line['flight_rules'] for line in core.get_taf_flight_rules(deepcopy(lines))]
+    assert expected == [line['flight_rules'] for line in _get_taf_flight_rules_reference(deepcopy(lines))]
+
+
+@pytest.mark.long
+def test_taf_pipeline_benchmark():
+    test_data = list(_taf_test_data())
+    # the fixtures only have a few lines each, a long TAF shows how each implementation scales
+    long_taf = [line for _, parsed_lines, _, _ in test_data for line in parsed_lines] * 10
+    test_data.append(([], long_taf, long_taf[0]['start_time'], long_taf[0]['end_time']))
+
+    def _run(sanitize_line, find_missing_taf_times, get_taf_flight_rules):
+        # lines are updated in place, each implementation gets its own copy
+        own_test_data = deepcopy(test_data)
+
+        def _pipeline():
+            for lines, parsed_lines, start, end in own_test_data:
+                for line in lines:
+                    sanitize_line(line)
+                get_taf_flight_rules(find_missing_taf_times(parsed_lines, start, end))
+
+        return min(timeit.repeat(_pipeline, number=20, repeat=5))
+
+    reference = _run(_sanitize_line_reference, _find_missing_taf_times_reference, _get_taf_flight_rules_reference)
+    linear = _run(core.sanitize_line, core.find_missing_taf_times, core.get_taf_flight_rules)
+    LOGGER.info('TAF pipeline on %s lines: reference: %.3fs, linear: %.3fs',
+                sum(len(parsed_lines) for _, parsed_lines, _, _ in test_data), reference, linear)
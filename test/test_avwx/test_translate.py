@@ -6,11 +6,13 @@ Modified by etcher@daribouca.net
 """
 
 # library
+import timeit
 import unittest
 
 import pytest
 
 # module
+from elib_wx import LOGGER
 from elib_wx.avwx import core, static, structs, translate
 
 
@@ -302,3 +304,70 @@ class TestTaf(unittest.TestCase):
         for line in translated.forecast:
             self.assertIsInstance(line, structs.TafLineTrans)
         self.assertEqual(translated, trans)
+
+
+def _cardinal_direction_by_ranges(direction: float) -> str:  # noqa
+    # previous implementation of translate.get_cardinal_direction, kept as reference
+    ret = ''
+    direction = int(direction)
+    while direction < 0:
+        direction += 360
+    direction %= 360
+    if 304 <= direction <= 360 or 0 <= direction <= 56:
+        ret += 'N'
+        if 304 <= direction <= 348:
+            if 327 <= direction <= 348:
+                ret += 'N'
+            ret += 'W'
+        elif 12 <= direction <= 56:
+            if 12 <= direction <= 33:
+                ret += 'N'
+            ret += 'E'
+    elif 124 <= direction <= 236:
+        ret += 'S'
+        if 124 <= direction <= 168:
+            if 147 <= direction <= 168:
+                ret += 'S'
+            ret += 'E'
+        elif 192 <= direction <= 236:
+            if 192 <= direction <= 213:
+                ret += 'S'
+            ret += 'W'
+    elif 57 <= direction <= 123:
+        ret += 'E'
+        if 57 <= direction <= 78:
+            ret += 'NE'
+        elif 102 <= direction <= 123:
+            ret += 'SE'
+    elif 237 <= direction <= 303:
+        ret += 'W'
+        if 237 <= direction <= 258:
+            ret += 'SW'
+        elif 282 <= direction <= 303:
+            ret += 'NW'
+    return ret
+
+
+def test_cardinal_direction_table():
+    assert 360 == len(translate.CARDINAL_DIRECTIONS_TABLE)
+    for direction in range(-720, 721):
+        assert _cardinal_direction_by_ranges(direction) == translate.get_cardinal_direction(direction)
+    for direction in (-0.5, 11.9, 12.1, 359.9, 360.5, 1000.1):
+        assert _cardinal_direction_by_ranges(direction) == translate.get_cardinal_direction(direction)
+
+
+@pytest.mark.long
+def test_cardinal_direction_benchmark():
+    directions = list(range(-360, 720))
+
+    def _by_ranges():
+        for direction in directions:
+            _cardinal_direction_by_ranges(direction)
+
+    def _by_table():
+        for direction in directions:
+            translate.get_cardinal_direction(direction)
+
+    by_ranges = min(timeit.repeat(_by_ranges, number=100, repeat=5))
+    by_table = min(timeit.repeat(_by_table, number=100, repeat=5))
+    LOGGER.info('cardinal directions: by ranges: %.4fs, by table: %.4fs', by_ranges, by_table)
@@ -1,11 +1,14 @@
 # coding=utf-8
 
+import random
+
+import dataclasses
 import pytest
 from hypothesis import given, settings, strategies as st
 
 import elib_wx
 import elib_wx.static
-from elib_wx.values.value import Temperature
+from elib_wx.values.value import Temperature, WindDirection
 
 
 @pytest.mark.weather
@@ -155,7 +158,7 @@ def test_missing_cloud_layer_altitude():
 @pytest.mark.weather
 def test_wrong_cloud_layer_altitude():
     wx = elib_wx.Weather('KLAW 121053Z AUTO 06006KT 10SM OVC050 13/12 Q1013')
-    wx.metar_units.altitude = 'test'
+    wx.metar_units = dataclasses.replace(wx.metar_units, altitude='test')
     with pytest.raises(ValueError):
         wx.generate_dcs_weather()
 
@@ -175,3 +178,91 @@ def test_turbulence_but_wind_speed_zero():
 def test_from_miz(caucasus_test_file):
     wx = elib_wx.Weather(str(caucasus_test_file))
     wx.generate_dcs_weather()
+
+
+@pytest.mark.parametrize('seed', [0, 1, 42])
+@pytest.mark.weather
+def test_seeded_dcs_weather_is_deterministic(seed):
+    metar = 'KLAW 121053Z AUTO 06006G12KT 10SM SCT030 BKN050 OVC080 ///// Q1013'
+    wx_1 = elib_wx.Weather(metar, seed=seed)
+    wx_2 = elib_wx.Weather(metar, seed=seed)
+    assert wx_1.dew_point.value() == wx_2.dew_point.value()
+    assert wx_1.generate_dcs_weather() == wx_2.generate_dcs_weather()
+    assert wx_1.generate_dcs_weather() == wx_1.generate_dcs_weather()
+
+
+@pytest.mark.weather
+def test_dcs_weather_explicit_rng():
+    wx = elib_wx.Weather('KLAW 121053Z AUTO 06006KT 10SM SCT030 BKN050 13/12 Q1013')
+    assert wx.generate_dcs_weather(random.Random(1)) == wx.generate_dcs_weather(random.Random(1))
+
+
+@pytest.mark.weather
+def test_cached_dcs_weather():
+    wx = elib_wx.Weather('KLAW 121053Z AUTO 06006KT 10SM SCT030 BKN050 13/12 Q1013', cache_dcs_weather=True)
+    dcs_wx = wx.generate_dcs_weather()
+    assert dcs_wx is wx.generate_dcs_weather()
+    wx.wind_direction.set_value(180)
+    new_dcs_wx = wx.generate_dcs_weather()
+    assert new_dcs_wx is not dcs_wx
+    assert 0 == new_dcs_wx.wind_ground_dir
+    assert new_dcs_wx is wx.generate_dcs_weather()
+    assert new_dcs_wx is not wx.generate_dcs_weather(random.Random(1))
+
+
+@pytest.mark.weather
+@pytest.mark.parametrize('cache_dcs_weather', (False, True))
+def test_dcs_weather_other_modified_in_place(cache_dcs_weather):
+    wx = elib_wx.Weather('KLAW 121053Z AUTO 06006KT 10SM SCT030 BKN050 13/12 Q1013',
+                         cache_dcs_weather=cache_dcs_weather)
+    assert 0 == wx.generate_dcs_weather().precipitation_code
+    wx.other.append('TS')
+    assert 2 == wx.generate_dcs_weather().precipitation_code
+    wx.other.clear()
+    assert 0 == wx.generate_dcs_weather().precipitation_code
+
+
+@pytest.mark.weather
+def test_dcs_weather_not_cached_by_default():
+    wx = elib_wx.Weather('KLAW 121053Z AUTO 06006KT 10SM SCT030 BKN050 13/12 Q1013')
+    assert wx.generate_dcs_weather() is not wx.generate_dcs_weather()
+
+
+@pytest.mark.weather
+def test_dcs_weather_ensemble():
+    wx = elib_wx.Weather('KLAW 121053Z AUTO 06006KT 10SM SCT030 BKN050 13/12 Q1013')
+    ensemble = wx.generate_dcs_weather_ensemble(50, seed=1)
+    assert 50 == len(ensemble)
+    assert ensemble == wx.generate_dcs_weather_ensemble(50, seed=1)
+    single = wx.generate_dcs_weather()
+    for dcs_wx in ensemble:
+        assert single.altimeter == dcs_wx.altimeter
+        assert single.wind_ground_dir == dcs_wx.wind_ground_dir
+        assert 4 <= dcs_wx.cloud_density <= 8
+    assert len({dcs_wx.wind_2000_dir for dcs_wx in ensemble}) > 1
+
+
+@pytest.mark.weather
+def test_dcs_weather_ensemble_phenomenon():
+    wx = elib_wx.Weather('KLAW 121053Z AUTO 06006KT 10SM TS FEW030 M05/M06 Q1013')
+    for dcs_wx in wx.generate_dcs_weather_ensemble(20, seed=1):
+        assert 2 == dcs_wx.precipitation_code
+        assert 9 == dcs_wx.cloud_density
+        assert 0 == dcs_wx.temperature
+
+
+@pytest.mark.weather
+def test_dcs_weather_ensemble_from_miz(caucasus_test_file):
+    wx = elib_wx.Weather(str(caucasus_test_file))
+    assert [wx.generate_dcs_weather()] * 3 == wx.generate_dcs_weather_ensemble(3)
+
+
+@pytest.mark.weather
+def test_seeded_variable_wind_direction():
+    metar = 'KLAW 121053Z AUTO VRB06KT 10SM OVC050 13/12 Q1013'
+    assert elib_wx.Weather(metar, seed=1).generate_dcs_weather() == \
+        elib_wx.Weather(metar, seed=1).generate_dcs_weather()
+
+
+def test_seeded_missing_wind_direction_fallback():
+    assert WindDirection(None, rng=random.Random(1)).value() == WindDirection(None, rng=random.Random(1)).value()
@@ -0,0 +1,123 @@
+# coding=utf-8
+
+import datetime
+
+import pytest
+
+from elib_wx import Weather, avwx
+from elib_wx.weather_dcs import DCSWeather
+from elib_wx.weather_forecast import ForecastTimeline
+
+ISSUE_TIME = datetime.datetime(2018, 8, 12, 11, 30)
+TAF = 'TAF EGLL 121100Z 1212/1318 24010KT 9999 SCT030 BECMG 1214/1216 CAVOK TEMPO 1218/1222 4000 RA BKN010 ' \
+      'BECMG 1300/1302 SKC FM130600 27015G25KT 3000 -RA BKN008 PROB30 1310/1314 TSRA BECMG 1314/1316 NSW NSC'
+
+
+def _at(day, hour, minute=0):
+    return datetime.datetime(2018, 8, day, hour, minute)
+
+
+@pytest.fixture(name='timeline')
+def _timeline():
+    return ForecastTimeline.from_taf_str(TAF, ISSUE_TIME)
+
+
+def test_periods(timeline):
+    assert [_at(12, 12), _at(12, 14), _at(13, 0), _at(13, 6), _at(13, 14)] == \
+        [period.start_time for period in timeline.periods]
+    assert [_at(12, 14), _at(13, 0), _at(13, 6), _at(13, 14), _at(13, 18)] == \
+        [period.end_time for period in timeline.periods]
+    assert _at(12, 12) == timeline.start_time
+    assert _at(13, 18) == timeline.end_time
+
+
+def test_becmg_carries_forward(timeline):
+    period = timeline.period_at(_at(12, 15))
+    assert 'CAVOK' == period.visibility.repr
+    assert [] == period.clouds
+    assert '240' == period.wind_direction.repr
+    assert '10' == period.wind_speed.repr
+
+
+def test_temporary_groups_ignored(timeline):
+    period = timeline.period_at(_at(12, 20))
+    assert [] == period.other
+    assert 'VFR' == period.flight_rules
+    period = timeline.period_at(_at(13, 12))
+    assert ['-RA'] == period.other
+    assert 'IFR' == period.flight_rules
+
+
+def test_from_group_replaces(timeline):
+    period = timeline.period_at(_at(13, 6))
+    assert '27015G25KT 3000 -RA BKN008' == period.as_metar_str(timeline.taf_units)
+    period = timeline.period_at(_at(13, 17, 59))
+    assert [] == period.other
+    assert [] == period.clouds
+    assert '25' == period.wind_gust.repr
+    assert '27015G25KT 3000 NSC' == period.as_metar_str(timeline.taf_units)
+
+
+@pytest.mark.parametrize('time', [_at(12, 11, 59), _at(13, 18), _at(20, 0)])
+def test_outside_validity(timeline, time):
+    with pytest.raises(ValueError):
+        timeline.period_at(time)
+
+
+def test_period_at_matches_linear_search(timeline):
+    time = _at(12, 12)
+    while time < timeline.end_time:
+        expected = [period for period in timeline.periods if period.start_time <= time < period.end_time]
+        assert expected == [timeline.period_at(time)]
+        time += datetime.timedelta(minutes=10)
+
+
+def test_metar_data_at(timeline):
+    metar_data = timeline.metar_data_at(_at(13, 7, 30))
+    assert isinstance(metar_data, avwx.structs.MetarData)
+    assert 'EGLL 130730Z 27015G25KT 3000 -RA BKN008' == metar_data.raw
+    assert _at(13, 7, 30) == metar_data.time.dt
+    assert 'IFR' == metar_data.flight_rules
+
+
+@pytest.mark.weather
+def test_weather_at(timeline, with_db):
+    wx = timeline.weather_at(_at(13, 7, 30), seed=1)
+    assert isinstance(wx, Weather)
+    assert 'TAF' == wx.source_type
+    assert 'EGLL' == wx.station_icao
+    assert _at(13, 7, 30) == wx.date_time.dt
+    assert 3000 == wx.visibility.value()
+    assert 270 == wx.wind_direction.value()
+    assert ['-RA'] == wx.other
+    assert wx.as_str().startswith('Weather for London Heathrow Airport on Monday the 13th of August at 0730 zulu.')
+    assert wx.as_str() == timeline.weather_at(_at(13, 7, 30), seed=1).as_str()
+
+
+@pytest.mark.weather
+def test_weather_at_cavok(timeline):
+    wx = timeline.weather_at(_at(12, 20), seed=1)
+    assert wx.is_cavok
+    assert 'CAVOK.' in wx.as_str()
+
+
+@pytest.mark.weather
+def test_dcs_weather_at(timeline):
+    dcs_weather = timeline.dcs_weather_at(_at(13, 7, 30), seed=1)
+    assert isinstance(dcs_weather, DCSWeather)
+    assert dcs_weather == timeline.weather_at(_at(13, 7, 30), seed=1).generate_dcs_weather()
+
+
+@pytest.mark.weather
+def test_weather_from_metar_data():
+    metar_data, metar_units = avwx.metar.parse('UGTB', 'UGTB 121050Z 24008KT 9999 FEW030 12/07 Q1021 NOSIG')
+    wx = Weather.from_metar_data(metar_data, metar_units, seed=1)
+    assert 'METAR data' == wx.source_type
+    assert wx.as_str() == Weather('UGTB 121050Z 24008KT 9999 FEW030 12/07 Q1021 NOSIG', seed=1).as_str()
+
+
+def test_open_ended_last_period():
+    timeline = ForecastTimeline.from_taf_str('KJFK 121130Z 1212/1318 24010KT P6SM SCT030 FM121800 VRB05KT P6SM SKC',
+                                             ISSUE_TIME)
+    assert 2 == len(timeline.periods)
+    assert 'VRB05KT P6SM SKC' == timeline.period_at(_at(13, 17)).as_metar_str(timeline.taf_units)
@@ -0,0 +1,84 @@
+# coding=utf-8
+
+import pytest
+from mockito import verify, when
+
+from elib_wx import avwx, weather
+
+METAR = 'KLAW 121053Z AUTO VRB05KT 10SM BKN020 OVC250 16/12 A2992 RMK AO2 SLP134 T01610122'
+
+
+@pytest.mark.weather
+def test_lazy_from_metar_string():
+    wx = weather.Weather(METAR, lazy=True)
+    assert wx.source_type == 'METAR'
+    assert wx.station_icao == 'KLAW'
+    assert wx.raw_metar_str == METAR
+    for field in ('station_name', 'metar_data', 'metar_units', 'altimeter', 'cloud_layers'):
+        assert field not in wx.__dict__
+    assert wx.altimeter.value('hpa') == 1013
+    assert 'metar_data' in wx.__dict__
+    assert 'visibility' in wx.__dict__
+    assert 'station_name' not in wx.__dict__
+
+
+@pytest.mark.weather
+def test_lazy_fields_are_cached():
+    wx = weather.Weather(METAR, lazy=True)
+    when(avwx.metar).parse(...).thenCallOriginalImplementation()
+    altimeter = wx.altimeter
+    assert wx.altimeter is altimeter
+    assert wx.metar_data is wx.metar_data
+    verify(avwx.metar, times=1).parse(...)
+
+
+@pytest.mark.weather
+def test_lazy_variable_wind():
+    wx = weather.Weather(METAR, lazy=True)
+    assert wx.wind_direction_is_variable is True
+
+
+@pytest.mark.weather
+def test_lazy_same_as_eager():
+    eager = weather.Weather(METAR, seed=1)
+    lazy = weather.Weather(METAR, seed=1, lazy=True)
+    assert eager.as_str() == lazy.as_str()
+    assert eager.as_speech() == lazy.as_speech()
+    assert eager.generate_dcs_weather() == lazy.generate_dcs_weather()
+
+
+@pytest.mark.weather
+def test_lazy_station_name(with_db):
+    wx = weather.Weather('EBBR 121050Z 24008KT 9999 FEW030 12/07 Q1021', lazy=True)
+    assert 'station_name' not in wx.__dict__
+    assert wx.station_name == 'Brussels Airport'
+    wx.station_icao = 'UGTB'
+    assert 'station_name' not in wx.__dict__
+    assert wx.station_name == 'Tbilisi International Airport'
+
+
+@pytest.mark.weather
+def test_lazy_from_icao():
+    when(avwx.metar).fetch('KLAW').thenReturn(METAR)
+    wx = weather.Weather('KLAW', lazy=True)
+    assert wx.source_type == 'ICAO'
+    assert 'raw_metar_str' not in wx.__dict__
+    verify(avwx.metar, times=0).fetch(...)
+    assert wx.raw_metar_str == METAR
+    assert wx.visibility.value() == 16100
+    verify(avwx.metar, times=1).fetch(...)
+
+
+@pytest.mark.weather
+def test_not_lazy():
+    wx = weather.Weather(METAR)
+    for field in ('station_name', 'metar_data', 'metar_units', 'altimeter', 'cloud_layers'):
+        assert field in wx.__dict__
+
+
+@pytest.mark.weather
+def test_lazy_miz_file(caucasus_test_file):
+    wx = weather.Weather(str(caucasus_test_file), lazy=True)
+    assert wx.source_type == 'MIZ file'
+    with pytest.raises(AttributeError):
+        _ = wx.metar_data
@@ -0,0 +1,143 @@
+# coding=utf-8
+
+import logging
+
+import pytest
+from mockito import verify, when
+
+import elib_wx
+from elib_wx import Config, airports_db, avwx, negative_cache
+
+METAR = 'KLAW 121053Z AUTO VRB05KT 10SM BKN020 OVC250 16/12 A2992 RMK AO2 SLP134 T01610122'
+
+
+class _Clock:
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture(name='clock')
+def _clock(monkeypatch):
+    monkeypatch.setattr(Config, 'negative_cache_ttl', 60)
+    clock = _Clock()
+    monkeypatch.setattr(negative_cache, 'NEGATIVE_CACHE', negative_cache.NegativeCache(clock))
+    yield clock
+
+
+def _fetch_error(station='KLAW'):
+    return avwx.exceptions.InvalidRequestError(f'Could not find report path in NOAA response: {station}')
+
+
+@pytest.mark.weather
+def test_disabled_by_default():
+    assert not negative_cache.NEGATIVE_CACHE.is_enabled()
+    when(avwx.metar).fetch('KLAW').thenRaise(_fetch_error())
+    for _ in range(2):
+        with pytest.raises(avwx.exceptions.InvalidRequestError):
+            elib_wx.Weather('KLAW')
+    verify(avwx.metar, times=2).fetch('KLAW')
+    assert 0 == negative_cache.NEGATIVE_CACHE.stats().size
+
+
+@pytest.mark.weather
+def test_failed_fetch_cached(clock, caplog):
+    when(avwx.metar).fetch('KLAW').thenRaise(_fetch_error())
+    with caplog.at_level(logging.WARNING):
+        for _ in range(3):
+            with pytest.raises(avwx.exceptions.InvalidRequestError):
+                elib_wx.Weather('KLAW')
+    verify(avwx.metar, times=1).fetch('KLAW')
+    assert 1 == len([record for record in caplog.records if 'unable to fetch METAR' in record.getMessage()])
+    stats = negative_cache.NEGATIVE_CACHE.stats()
+    assert 1 == stats.size
+    assert 2 == stats.hits
+    assert 60 == stats.ttl
+
+
+@pytest.mark.weather
+def test_failed_fetch_new_error_per_hit(clock):
+    error = _fetch_error()
+    when(avwx.metar).fetch('KLAW').thenRaise(error)
+    raised = []
+    for _ in range(3):
+        with pytest.raises(avwx.exceptions.InvalidRequestError) as exc_info:
+            negative_cache.NEGATIVE_CACHE.fetch_metar('KLAW')
+        raised.append(exc_info.value)
+    assert raised[0] is error
+    assert raised[1] is not error
+    assert raised[2] is not raised[1]
+    assert {str(error)} == {str(raised_error) for raised_error in raised}
+
+
+@pytest.mark.weather
+def test_failed_fetch_expires(clock):
+    when(avwx.metar).fetch('KLAW').thenRaise(_fetch_error()).thenReturn(METAR)
+    with pytest.raises(avwx.exceptions.InvalidRequestError):
+        elib_wx.Weather('KLAW')
+    clock.now += 59
+    with pytest.raises(avwx.exceptions.InvalidRequestError):
+        elib_wx.Weather('KLAW')
+    clock.now += 1
+    assert METAR == elib_wx.Weather('KLAW').raw_metar_str
+    verify(avwx.metar, times=2).fetch('KLAW')
+    assert 0 == negative_cache.NEGATIVE_CACHE.stats().size
+
+
+@pytest.mark.weather
+@pytest.mark.parametrize('error', [avwx.exceptions.SourceError('NOAA server returned 500'),
+                                   ConnectionError('Unable to connect to NOAA server')])
+def test_fetch_errors_cached(clock, error):
+    when(avwx.metar).fetch('KLAW').thenRaise(error)
+    for _ in range(2):
+        with pytest.raises(type(error)):
+            elib_wx.Weather('KLAW')
+    verify(avwx.metar, times=1).fetch('KLAW')
+
+
+@pytest.mark.weather
+def test_other_stations_fetched(clock):
+    when(avwx.metar).fetch('KLAW').thenRaise(_fetch_error())
+    when(avwx.metar).fetch('KJFK').thenReturn(METAR.replace('KLAW', 'KJFK'))
+    with pytest.raises(avwx.exceptions.InvalidRequestError):
+        elib_wx.Weather('KLAW')
+    assert 'KJFK' == elib_wx.Weather('KJFK').station_icao
+
+
+@pytest.mark.weather
+def test_lazy_failed_fetch_cached(clock):
+    when(avwx.metar).fetch('KLAW').thenRaise(_fetch_error())
+    for _ in range(2):
+        with pytest.raises(avwx.exceptions.InvalidRequestError):
+            _ = elib_wx.Weather('KLAW', lazy=True).raw_metar_str
+    verify(avwx.metar, times=1).fetch('KLAW')
+
+
+@pytest.mark.weather
+def test_unknown_airport_cached(clock, with_db, caplog):
+    with caplog.at_level(logging.WARNING):
+        for _ in range(3):
+            assert 'unknown airport (QQQQ)' == airports_db.get_airport_name_from_icao('qqqq')
+    assert 1 == len([record for record in caplog.records if 'not found' in record.getMessage()])
+    assert 2 == negative_cache.NEGATIVE_CACHE.stats().hits
+    clock.now += 60
+    caplog.clear()
+    with caplog.at_level(logging.WARNING):
+        airports_db.get_airport_name_from_icao('QQQQ')
+    assert 1 == len([record for record in caplog.records if 'not found' in record.getMessage()])
+    assert 'Brussels Airport' == airports_db.get_airport_name_from_icao('EBBR')
+
+
+def test_expired_entries_purged(clock, monkeypatch):
+    monkeypatch.setattr(negative_cache, '_PURGE_THRESHOLD', 2)
+    cache = negative_cache.NEGATIVE_CACHE
+    cache.add(('airport', 'AAAA'), True)
+    cache.add(('airport', 'BBBB'), True)
+    clock.now += 60
+    cache.add(('airport', 'CCCC'), True)
+    assert 1 == cache.stats().size
+    cache.clear()
+    assert 0 == cache.stats().size
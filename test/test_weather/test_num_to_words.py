@@ -0,0 +1,48 @@
+# coding=utf-8
+
+import inflect
+import pytest
+
+from elib_wx import utils
+
+_INFLECT = inflect.engine()
+
+
+@pytest.mark.parametrize('group', [0, 1])
+def test_num_to_words_tables_match_inflect(group):
+    for num in range(0, 10000):
+        assert utils.num_to_words(num, group=group) == _INFLECT.number_to_words(num, group=group).replace(',', '')
+
+
+@pytest.mark.parametrize(
+    'num, group, expected',
+    [
+        (1013, 1, 'one zero one three'),
+        ('0950', 1, 'zero nine five zero'),
+        ('0950', 0, 'nine hundred and fifty'),
+        (9999, 0, 'nine thousand nine hundred and ninety-nine'),
+        (0.5, 0, 'zero point five'),
+        (3.14, 0, 'three point one four'),
+        ('05th', 0, 'fifth'),
+        ('21st', 0, 'twenty-first'),
+        ('30th', 0, 'thirtieth'),
+        (12345, 0, 'twelve thousand three hundred and forty-five'),
+        (-3, 0, 'minus three'),
+        (12, 2, 'twelve'),
+    ]
+)
+def test_num_to_words(num, group, expected):
+    assert expected == utils.num_to_words(num, group=group)
+    assert _INFLECT.number_to_words(num, group=group).replace(',', '') == utils.num_to_words(num, group=group)
+
+
+def test_num_to_words_typed_cache():
+    assert 'one' == utils.num_to_words(1, group=0)
+    assert 'one point zero' == utils.num_to_words(1.0, group=0)
+
+
+@pytest.mark.parametrize(
+    'num', ['01', '02', '03', '04', '11', '12', '13', '21', '22', '23', '31', 0, 1, 2, 111, 'three']
+)
+def test_num_to_ordinal(num):
+    assert _INFLECT.ordinal(num) == utils.num_to_ordinal(num)
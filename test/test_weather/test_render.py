@@ -0,0 +1,162 @@
+# coding=utf-8
+
+import itertools
+import timeit
+
+import pytest
+from mockito import verify, when
+
+import elib_wx
+from elib_wx import LOGGER, weather_render
+from elib_wx.values.value import Temperature
+from test.refresh_test_data import iterate_test_data
+
+
+def _render_by_sections(wx: elib_wx.Weather, spoken: bool) -> str:
+    # reference implementation: joins the individual translated sections, each derived from the weather on its own
+    intro = wx._make_str_intro(spoken=spoken)
+    wind = wx._wind_as_str(spoken=spoken)
+    visibility = wx._visibility_as_str(spoken=spoken)
+    temperature = wx._temperature_as_str(spoken=spoken)
+    dew_point = wx._dew_point_as_str(spoken=spoken)
+    altimeter = wx._altimeter_as_str(spoken=spoken)
+    other = wx._others_as_str()
+    clouds = wx._clouds_as_str(spoken=spoken)
+    try:
+        remarks = wx._remarks_as_str(spoken=spoken) or ''
+    except (IndexError, ValueError):
+        remarks = ''
+    _result = [intro, wind, visibility, temperature, dew_point, altimeter, other, clouds, remarks]
+    _result = [x for x in _result if x != '']
+    result = ' '.join(_result)
+    return result.replace('  ', ' ')
+
+
+def _iterate_weather(count=None):
+    for metar_str in itertools.islice(iterate_test_data(), count):
+        try:
+            yield elib_wx.Weather(metar_str, seed=1)
+        except elib_wx.ELIBWxError:
+            pass
+
+
+def _check_render(weather_objects):
+    for wx in weather_objects:
+        for spoken in (False, True):
+            try:
+                expected = _render_by_sections(wx, spoken)
+            except Exception as expected_error:  # pylint: disable=broad-except
+                with pytest.raises(type(expected_error)):
+                    weather_render.render(wx, spoken)
+            else:
+                assert expected == weather_render.render(wx, spoken)
+
+
+@pytest.mark.weather
+def test_render_identical_to_sections():
+    _check_render(_iterate_weather(200))
+
+
+@pytest.mark.weather
+@pytest.mark.parametrize('spoken', [False, True])
+def test_render_cavok(spoken):
+    wx = elib_wx.Weather('UGTB 121050Z 24008KT CAVOK 12/07 Q1021 NOSIG', seed=1)
+    assert wx.is_cavok
+    assert _render_by_sections(wx, spoken) == weather_render.render(wx, spoken)
+
+
+@pytest.mark.long
+def test_render_benchmark():
+    weather_objects = list(_iterate_weather())
+    _check_render(weather_objects)
+
+    def _by_sections():
+        for wx in weather_objects:
+            for spoken in (False, True):
+                try:
+                    _render_by_sections(wx, spoken)
+                except Exception:  # pylint: disable=broad-except
+                    pass
+
+    def _compiled():
+        for wx in weather_objects:
+            for spoken in (False, True):
+                try:
+                    weather_render.render(wx, spoken)
+                except Exception:  # pylint: disable=broad-except
+                    pass
+
+    by_sections = min(timeit.repeat(_by_sections, number=1, repeat=3))
+    compiled = min(timeit.repeat(_compiled, number=1, repeat=3))
+    # timings are logged for comparison only: most of the time goes into formatting the values, which both paths do
+    # once per section
+    LOGGER.info('rendering %s reports: by sections: %.3fs, compiled: %.3fs',
+                len(weather_objects), by_sections, compiled)
+
+
+@pytest.mark.weather
+def test_render_cache():
+    wx = elib_wx.Weather('UGTB 121050Z 24008KT 9999 FEW030 12/07 Q1021 NOSIG', seed=1)
+    text, speech = wx.as_str(), wx.as_speech()
+    assert (weather_render.make_render_key(wx), {False: text, True: speech}) == wx._render_cache
+    when(weather_render).render(...)
+    assert text == wx.as_str()
+    assert speech == wx.as_speech()
+    verify(weather_render, times=0).render(...)
+
+
+@pytest.mark.weather
+def test_render_cache_invalidation(with_db):
+    wx = elib_wx.Weather('UGTB 121050Z 24008KT 9999 FEW030 12/07 Q1021 NOSIG', seed=1)
+    text = wx.as_str()
+    wx.temperature = Temperature(25)
+    assert wx._render_cache is None
+    assert 'Temperature 25°C, 77°F.' in wx.as_str()
+    assert text.replace('Temperature 12°C, 54°F.', 'Temperature 25°C, 77°F.') == wx.as_str()
+    wx.station_icao = 'EBBR'
+    assert wx.as_str().startswith('Weather for Brussels Airport')
+
+
+@pytest.mark.weather
+def test_render_cache_in_place_changes():
+    wx = elib_wx.Weather('UGTB 121050Z 24008KT 9999 FEW030 12/07 Q1021 NOSIG', seed=1)
+    text = wx.as_str()
+    wx.temperature.set_value(25)
+    assert text.replace('Temperature 12°C, 54°F.', 'Temperature 25°C, 77°F.') == wx.as_str()
+    wx.other.append('RA')
+    assert 'Rain.' in wx.as_str()
+    wx.cloud_layers[0].altitude = 20
+    assert 'Few clouds at 2000ft.' in wx.as_str()
+
+
+@pytest.mark.weather
+def test_render_cache_kept():
+    wx = elib_wx.Weather('UGTB 121050Z 24008KT 9999 FEW030 12/07 Q1021 NOSIG', seed=1, cache_dcs_weather=True)
+    wx.as_str()
+    wx.generate_dcs_weather()
+    assert wx._render_cache
+
+
+@pytest.mark.weather
+def test_iter_speech():
+    wx = elib_wx.Weather('UGTB 121050Z 24008KT 9999 FEW030 12/07 Q1021 NOSIG', seed=1)
+    segments = wx.iter_speech()
+    assert next(segments).startswith('Weather for ')
+    assert next(segments) == 'Wind two four zero eight knots.'
+    assert next(segments) == 'Visibility ten kilometers or more, ten miles or more.'
+    assert ' '.join(wx.iter_speech()) == wx.as_speech()
+
+
+@pytest.mark.weather
+def test_iter_render_identical_to_render():
+    for wx in _iterate_weather(200):
+        for spoken in (False, True):
+            try:
+                expected = weather_render.render(wx, spoken)
+            except Exception as expected_error:  # pylint: disable=broad-except
+                with pytest.raises(type(expected_error)):
+                    list(weather_render.iter_render(wx, spoken))
+            else:
+                segments = list(weather_render.iter_render(wx, spoken))
+                assert all(segments)
+                assert expected == ' '.join(segments)
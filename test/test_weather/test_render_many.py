@@ -0,0 +1,60 @@
+# coding=utf-8
+
+import pytest
+
+import elib_wx
+from elib_wx import utils, weather_render
+
+METARS = [
+    'UGTB 121050Z 24008KT 9999 FEW030 12/07 Q1021 NOSIG',
+    'KLAW 121053Z AUTO VRB05KT 10SM BKN020 OVC250 16/12 A2992 RMK AO2 SLP134 T01610122',
+    'UGTB 121050Z 24008KT CAVOK 12/07 Q1021 NOSIG',
+    'KLAW 121053Z AUTO 18015G25KT 2SM -RA BR OVC008 08/07 A2985',
+]
+
+
+def _make_weathers():
+    return [elib_wx.Weather(metar_str, seed=1) for metar_str in METARS]
+
+
+@pytest.mark.weather
+@pytest.mark.parametrize('pool', [None, 'thread', 'process'])
+def test_render_speech_many(pool):
+    expected = [wx.as_speech() for wx in _make_weathers()]
+    weathers = _make_weathers()
+    assert expected == elib_wx.render_speech_many(weathers, pool=pool, max_workers=2)
+    for wx, speech in zip(weathers, expected):
+        assert speech == wx._render_cache[1][True]
+
+
+@pytest.mark.weather
+def test_render_speech_many_generator():
+    expected = [wx.as_speech() for wx in _make_weathers()]
+    assert expected == elib_wx.render_speech_many(wx for wx in _make_weathers())
+
+
+@pytest.mark.weather
+def test_render_speech_many_empty():
+    assert [] == elib_wx.render_speech_many([], pool='thread')
+
+
+@pytest.mark.weather
+def test_render_speech_many_unknown_pool():
+    with pytest.raises(ValueError):
+        elib_wx.render_speech_many(_make_weathers(), pool='caramba')
+
+
+def test_warm_up_speech_vocabulary():
+    weather_render.warm_up_speech_vocabulary()
+    misses = utils.num_to_words.cache_info().misses
+    assert 'twelfth' == utils.num_to_words(utils.num_to_ordinal('12'), group=0)
+    assert 'one zero five zero' == utils.num_to_words('1050')
+    assert 'four thousand two hundred' == utils.num_to_words(4200, group=0)
+    assert misses == utils.num_to_words.cache_info().misses
+
+
+def test_warm_up_speech_vocabulary_once():
+    weather_render.warm_up_speech_vocabulary()
+    cache_info = utils.num_to_words.cache_info()
+    weather_render.warm_up_speech_vocabulary()
+    assert cache_info == utils.num_to_words.cache_info()
@@ -0,0 +1,90 @@
+# coding=utf-8
+
+import datetime
+
+import pytest
+from mockito import when
+
+from elib_wx import replay
+
+ARCHIVE = '''# archived METARs
+201808121050 UGTB 121050Z 24008KT 9999 FEW030 12/07 Q1021 NOSIG
+2016-01-01T00:53Z METAR KLAW 312353Z AUTO VRB05KT 10SM BKN020 OVC250 16/12 A2992=
+
+not-a-time KLAW 121053Z AUTO VRB05KT 10SM BKN020 16/12 A2992
+201808121050
+2016-01-01T00:53:10 TAF PHNL 312339Z 0100/0206 06018G25KT P6SM FEW030 SCT060
+'''
+
+
+@pytest.mark.parametrize(
+    'observation_time, expected',
+    [
+        ('201808121050', datetime.datetime(2018, 8, 12, 10, 50)),
+        ('2018-08-12T10:50', datetime.datetime(2018, 8, 12, 10, 50)),
+        ('2018-08-12T10:50Z', datetime.datetime(2018, 8, 12, 10, 50)),
+        ('2018-08-12 10:50:30', datetime.datetime(2018, 8, 12, 10, 50, 30)),
+    ]
+)
+def test_parse_observation_time(observation_time, expected):
+    assert expected == replay.parse_observation_time(observation_time)
+
+
+@pytest.mark.parametrize('observation_time', ['', '2018081210', '12/08/2018 10:50', '201813121050'])
+def test_parse_observation_time_invalid(observation_time):
+    with pytest.raises(ValueError):
+        replay.parse_observation_time(observation_time)
+
+
+def test_read_archive():
+    archived_reports = list(replay.read_archive(ARCHIVE.splitlines()))
+    assert 3 == len(archived_reports)
+    assert ['UGTB', 'KLAW', 'PHNL'] == [archived_report.station for archived_report in archived_reports]
+    assert 'KLAW 312353Z AUTO VRB05KT 10SM BKN020 OVC250 16/12 A2992' == archived_reports[1].report
+    assert datetime.datetime(2016, 1, 1, 0, 53) == archived_reports[1].observation_time
+
+
+def test_archived_report_parse():
+    metar_report, _, taf_report = replay.read_archive(ARCHIVE.splitlines())
+    metar_data, _ = metar_report.parse_metar()
+    assert datetime.datetime(2018, 8, 12, 10, 50) == metar_data.time.dt
+    taf_data, _ = taf_report.parse_taf()
+    assert datetime.datetime(2015, 12, 31, 23, 39) == taf_data.time.dt
+    assert datetime.datetime(2016, 1, 1, 0, 0) == taf_data.start_time.dt
+
+
+@pytest.mark.weather
+def test_replay_weather(tmpdir):
+    archive_file = tmpdir.join('archive.txt')
+    archive_file.write('\n'.join(ARCHIVE.splitlines()[:3]))
+    weathers = list(replay.replay_weather(str(archive_file), seed=1))
+    assert ['UGTB', 'KLAW'] == [wx.station_icao for wx in weathers]
+    assert datetime.datetime(2018, 8, 12, 10, 50) == weathers[0].date_time.dt
+    assert datetime.datetime(2015, 12, 31, 23, 53) == weathers[1].date_time.dt
+    assert 'on Sunday the 12th of August' in weathers[0].as_str()
+
+
+@pytest.mark.weather
+def test_replay_weather_lazy():
+    wx, _ = replay.replay_weather(ARCHIVE.splitlines()[:3], lazy=True)
+    assert datetime.datetime(2018, 8, 12, 10, 50) == wx.date_time.dt
+
+
+@pytest.mark.weather
+def test_replay_weather_skips_bad_reports():
+    weathers = list(replay.replay_weather(['201808121050 UGTB 121050Z 24008KT 9999 FEW030 12/07 Q1021',
+                                           '201808121050 XXXXX']))
+    assert 1 == len(weathers)
+
+
+@pytest.mark.weather
+def test_replay_weather_day_missing_from_observation_month():
+    wx, = replay.replay_weather(['2018-09-01T00:05Z UGTB 312355Z 24008KT 9999 FEW030 12/07 Q1021'])
+    assert datetime.datetime(2018, 8, 31, 23, 55) == wx.date_time.dt
+
+
+@pytest.mark.weather
+@pytest.mark.parametrize('error', [ValueError, IndexError])
+def test_replay_weather_skips_reports_raising(error):
+    when(replay).Weather(...).thenRaise(error)
+    assert [] == list(replay.replay_weather(ARCHIVE.splitlines()[:3]))
@@ -0,0 +1,116 @@
+# coding=utf-8
+
+import pytest
+from mockito import verify, when
+
+import elib_wx
+from elib_wx import Config, avwx, report_cache, weather_render
+from elib_wx.values.value import Temperature
+
+METAR = 'UGTB 121050Z 24008KT 9999 FEW030 12/07 Q1021 NOSIG'
+
+
+@pytest.fixture(name='cache')
+def _cache(monkeypatch):
+    monkeypatch.setattr(Config, 'report_cache_size', 2)
+    report_cache.REPORT_CACHE.clear()
+    yield report_cache.REPORT_CACHE
+    report_cache.REPORT_CACHE.clear()
+
+
+@pytest.mark.weather
+def test_disabled_by_default():
+    assert not report_cache.REPORT_CACHE.is_enabled()
+    elib_wx.Weather(METAR).as_speech()
+    assert 0 == report_cache.REPORT_CACHE.stats().size
+
+
+@pytest.mark.weather
+def test_parse_shared(cache):
+    when(avwx.metar).parse(...).thenCallOriginalImplementation()
+    wx1 = elib_wx.Weather(METAR)
+    wx2 = elib_wx.Weather(METAR)
+    verify(avwx.metar, times=1).parse(...)
+    assert wx1.metar_data is wx2.metar_data
+    assert wx1.metar_units is wx2.metar_units
+    stats = cache.stats()
+    assert 1 == stats.size
+    assert 2 == stats.max_size
+    assert 1 == stats.hits
+    assert 1 == stats.misses
+
+
+@pytest.mark.weather
+def test_rendered_shared(cache):
+    speech = elib_wx.Weather(METAR).as_speech()
+    when(weather_render).render(...)
+    assert speech == elib_wx.Weather(METAR).as_speech()
+    verify(weather_render, times=0).render(...)
+
+
+@pytest.mark.weather
+def test_rendered_not_shared_when_modified(cache):
+    text = elib_wx.Weather(METAR).as_str()
+    wx = elib_wx.Weather(METAR)
+    wx.temperature = Temperature(25)
+    assert text != wx.as_str()
+    assert text == elib_wx.Weather(METAR).as_str()
+
+
+@pytest.mark.weather
+def test_rendered_not_shared_when_randomized(cache):
+    metar = 'UGTB 121050Z 9999 FEW030 12/07 Q1021 NOSIG'
+    wx = elib_wx.Weather(metar)
+    assert wx._report_cache_key is None
+    wx.as_str()
+    assert elib_wx.Weather(metar).metar_data is wx.metar_data
+
+
+@pytest.mark.weather
+def test_evictions(cache):
+    for metar in (METAR, METAR.replace('12/07', '13/07'), METAR.replace('12/07', '14/07'), METAR):
+        elib_wx.Weather(metar)
+    stats = cache.stats()
+    assert 2 == stats.size
+    assert 2 == stats.evictions
+    assert 0 == stats.hits
+
+
+@pytest.mark.weather
+def test_clear(cache):
+    elib_wx.Weather(METAR)
+    cache.clear()
+    assert report_cache.ReportCacheStats(size=0, max_size=2, hits=0, misses=0, evictions=0) == cache.stats()
+
+
+@pytest.mark.weather
+def test_cached_metar_data_not_modified_in_place(cache):
+    wx = elib_wx.Weather(METAR)
+    wx.other.append('RA')
+    wx.cloud_layers[0].altitude = 20
+    other_wx = elib_wx.Weather(METAR)
+    assert other_wx.metar_data is wx.metar_data
+    assert [] == other_wx.other
+    assert 30 == other_wx.cloud_layers[0].altitude
+
+
+@pytest.mark.weather
+def test_dcs_weather_reads_other_modified_in_place(cache):
+    wx = elib_wx.Weather(METAR)
+    wx.other.append('TS')
+    assert 2 == wx.generate_dcs_weather().precipitation_code
+    assert 0 == elib_wx.Weather(METAR).generate_dcs_weather().precipitation_code
+
+
+@pytest.mark.weather
+def test_rendered_not_shared_when_modified_in_place(cache):
+    text = elib_wx.Weather(METAR).as_str()
+    wx = elib_wx.Weather(METAR)
+    wx.temperature.set_value(25)
+    assert 'Temperature 25°C' in wx.as_str()
+    assert text == elib_wx.Weather(METAR).as_str()
+    wx = elib_wx.Weather(METAR)
+    wx.temperature.set_value(25)
+    when(report_cache.REPORT_CACHE).set_rendered(...)
+    wx.as_speech()
+    verify(report_cache.REPORT_CACHE, times=0).set_rendered(...)
@@ -0,0 +1,39 @@
+# coding=utf-8
+
+import pytest
+
+import elib_wx
+from elib_wx.weather_segment import Segment, changed_segments
+
+METAR_1 = 'UGTB 121050Z 24008KT 9999 FEW030 12/07 Q1021 NOSIG'
+METAR_2 = 'UGTB 121120Z 24008KT 9999 FEW030 13/07 Q1021 NOSIG'
+
+
+@pytest.mark.weather
+def test_speech_segments():
+    wx = elib_wx.Weather(METAR_1, seed=1)
+    segments = wx.speech_segments()
+    assert [segment.name for segment in segments] == [
+        'intro', 'wind', 'visibility', 'temperature', 'dew_point', 'altimeter', 'clouds', 'remarks'
+    ]
+    assert [segment.text for segment in segments] == list(wx.iter_speech())
+    assert segments[2] == Segment.from_text('visibility', 'Visibility ten kilometers or more, ten miles or more.')
+
+
+@pytest.mark.weather
+def test_speech_segments_keys_are_stable():
+    segments = elib_wx.Weather(METAR_1, seed=1).speech_segments()
+    other_segments = elib_wx.Weather(METAR_1.replace('UGTB', 'UG5X'), seed=1).speech_segments()
+    assert segments[0].key != other_segments[0].key
+    assert segments[1:] == other_segments[1:]
+    assert '7f720991e29382d46e09c5089b7a40ab7e9e9133' == Segment.from_text('clouds', 'Sky clear.').key
+
+
+@pytest.mark.weather
+def test_changed_segments():
+    previous = elib_wx.Weather(METAR_1, seed=1).speech_segments()
+    current = elib_wx.Weather(METAR_2, seed=1).speech_segments()
+    changed = changed_segments(previous, current)
+    assert ['intro', 'temperature'] == [segment.name for segment in changed]
+    assert [] == changed_segments(current, current)
+    assert current == changed_segments([], current)
@@ -79,6 +79,11 @@ _TEST_DATA = [
         'Automated with precipitation sensor. Hourly precipitation: zero point zero two inches. Thunderstorm '
         'information not available.'
     ),
+    (
+        'EQYN 161356Z AUTO A3015 RMK AO2 SLPNO PWINO FZRANO TSNO $ FIBI',
+        'Automated with precipitation sensor. Precipitation identifier information not available. Freezing rain '
+        'information not available. Thunderstorm information not available. ASOS requires maintenance.'
+    ),
 ]
 
 